@@ -0,0 +1,101 @@
+#
+# bench_server.py
+#
+# latency of next guess requests to a running solver daemon, over whole games
+#
+
+import argparse
+import os
+import pathlib
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from wordle import registry  # noqa: E402
+from wordle.feedback import compute_patterns, to_letter_matrix  # noqa: E402
+from wordle.server import SolverClient  # noqa: E402
+
+
+def play_games(
+    client: SolverClient, goal_words: List[str], max_tries: int
+) -> List[float]:
+    """Plays every goal word through the server
+    :return: seconds taken by every request
+    """
+    latencies = []
+    for goal_word in goal_words:
+        history = []
+        for _ in range(max_tries):
+            start = time.perf_counter()
+            guess = client.next_guess(history)["guess"]
+            latencies.append(time.perf_counter() - start)
+            if guess == goal_word:
+                break
+            code = compute_patterns(
+                to_letter_matrix([guess]), to_letter_matrix([goal_word])
+            )
+            history.append((guess, int(code[0, 0])))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time requests to the solver daemon")
+    parser.add_argument("--games", type=int, default=200, help="Games to play")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the goal words")
+    parser.add_argument(
+        "-s", "--strategy", default="MaxLikelihoodStrategy", help="Strategy to use"
+    )
+    parser.add_argument("--processes", type=int, default=1, help="Server workers")
+    args = parser.parse_args()
+
+    with open(registry.word_bank_path("wordle/wordle_bank"), encoding="utf-8") as f:
+        words = f.read().split()
+    goal_words = random.Random(args.seed).sample(words, args.games)
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "solver.sock")
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            str(REPO_DIR.joinpath("main.py")),
+            "serve",
+            "5",
+            "6",
+            "-s",
+            args.strategy,
+            "--bitsets",
+            "--processes",
+            str(args.processes),
+            "--socket",
+            socket_path,
+        ],
+        cwd=REPO_DIR,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while not os.path.exists(socket_path):
+            if server.poll() is not None:
+                raise RuntimeError("solver daemon exited before listening")
+            time.sleep(0.05)
+        with SolverClient(socket_path) as client:
+            latencies = play_games(client, goal_words, 6)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests over {args.games} games")
+    for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        print(f"  {name}: {latencies[int(q * (len(latencies) - 1))] * 1000:.3f}ms")
+    print(f"  max: {latencies[-1] * 1000:.3f}ms")
+    print(f"  mean: {statistics.mean(latencies) * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#
+# bench_solver.py
+#
+# times the solver's hot paths on the bundled word banks, saving the results as a
+# JSON baseline or comparing them against one
+#
+
+import argparse
+import json
+import pathlib
+import platform
+import random
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict
+
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from wordle import registry  # noqa: E402
+from wordle.multi_board import MultiEntropyStrategy  # noqa: E402
+from wordle.wordle import Wordle  # noqa: E402
+from wordle.words.word_bank import WordBank  # noqa: E402
+
+# Goal word and guesses every case is run with, so runs are comparable
+GOAL_WORD = "crane"
+GUESS = "soare"
+
+# Slowdown of the median time, relative to the baseline, that counts as a
+# regression in compare mode
+DEFAULT_THRESHOLD = 0.25
+
+# Board counts of the multi board cases
+NUM_BOARDS = (4, 8)
+
+# Banks of each WordBank mode
+BANK_MODES: Dict[str, Dict[str, bool]] = {
+    "list": {},
+    "array": {"array_backed": True},
+    "feedback_matrix": {"use_feedback_matrix": True},
+    "bitsets": {"use_bitsets": True},
+}
+
+
+def _game(
+    word_bank: WordBank, strategy=None, prob_func=None, goal_word=GOAL_WORD
+) -> Wordle:
+    """A headless game of the benchmark goal word on word_bank"""
+    return Wordle(
+        prob_func or registry.load_probability_function("LetterPositionLikelihood"),
+        strategy or registry.load_strategy("MaxLikelihoodStrategy"),
+        word_bank,
+        6,
+        goal_word=goal_word,
+        render=False,
+    )
+
+
+def build_cases(bank_name: str) -> Dict[str, Callable[[], object]]:
+    """Every benchmark case, by name. Each case is a function that runs the timed
+    code once, with all setup done up front. Cases that filter a bank reset it
+    first, so the reset is included in their time.
+    :param bank_name: name of the word bank in the registry to run on
+    """
+    path = str(registry.word_bank_path(bank_name))
+    cases = {}
+
+    banks = {mode: WordBank(path, **options) for mode, options in BANK_MODES.items()}
+    guess_state = _game(banks["list"]).get_guess_state(GUESS)
+
+    for mode, bank in banks.items():
+
+        def filter_bank(bank=bank):
+            bank.reset_bank()
+            bank.filter_bank(guess_state)
+
+        cases[f"filter_bank[{mode}]"] = filter_bank
+
+    words = banks["list"].original_word_bank
+    cases["is_possible_word[bank]"] = lambda: [
+        WordBank.is_possible_word(word, guess_state) for word in words
+    ]
+
+    for mode in ("list", "feedback_matrix"):
+        game = _game(banks[mode])
+        cases[f"get_guess_state[{mode}]"] = lambda game=game: game.get_guess_state(
+            GUESS
+        )
+
+    # never filtered, so the probability functions always see the whole bank
+    full_bank = WordBank(path, array_backed=True)
+    for name in registry.PROBABILITY_FUNCTIONS:
+        prob_func = registry.load_probability_function(name)(full_bank)
+        cases[f"generate_mapping[{name}]"] = (
+            lambda prob_func=prob_func: prob_func.generate_mapping(full_bank)
+        )
+        cases[f"calc_prob[{name}]"] = lambda prob_func=prob_func: prob_func.calc_prob(
+            GUESS
+        )
+        cases[f"batch_calc_prob[{name}]"] = (
+            lambda prob_func=prob_func: prob_func.batch_calc_prob(full_bank)
+        )
+
+    prob_func = registry.load_probability_function("LetterPositionLikelihood")
+    for name in registry.STRATEGIES:
+        strategy = registry.load_strategy(name)
+        bank = banks["feedback_matrix"]
+
+        def choose_next_word(strategy=strategy, bank=bank):
+            random.seed(0)
+            bank.reset_bank()
+            return strategy.choose_next_word(bank, prob_func)
+
+        cases[f"choose_next_word[{name}]"] = choose_next_word
+
+    # second turn of multi board games, after GUESS on every board
+    multi_strategy = MultiEntropyStrategy()
+    base = banks["feedback_matrix"]
+    for num_boards in NUM_BOARDS:
+        goal_words = random.Random(num_boards).sample(
+            base.original_word_bank, num_boards
+        )
+        boards = []
+        for goal_word in goal_words:
+            board = base.fork()
+            board.filter_bank(_game(board, goal_word=goal_word).get_guess_state(GUESS))
+            boards.append(board)
+        cases[f"choose_next_word[{num_boards} boards]"] = (
+            lambda boards=boards: multi_strategy.choose_next_word(boards, prob_func)
+        )
+
+    for mode, bank in banks.items():
+
+        def play(bank=bank):
+            bank.reset_bank()
+            _game(bank).play()
+
+        cases[f"play[{mode}]"] = play
+
+    return cases
+
+
+def time_case(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Times a case, calling it enough times per sample to take at least 0.2s
+    :return: min and median seconds per call over repeat samples
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    samples = [t / number for t in timer.repeat(repeat, number)]
+    return {"min": min(samples), "median": statistics.median(samples)}
+
+
+def run(bank_name: str, repeat: int, pattern: str = None) -> Dict[str, object]:
+    """Runs every case whose name contains pattern
+    :return: the results along with what they were measured on
+    """
+    results = {}
+    for name, func in build_cases(bank_name).items():
+        if pattern is None or pattern in name:
+            results[name] = time_case(func, repeat)
+            print(f"{name:45s} {_format(results[name]['median'])}", flush=True)
+    return {
+        "word_bank": bank_name,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, object], current: Dict[str, object], threshold: float
+) -> Dict[str, float]:
+    """Compares the median times of the cases in both runs
+    :param threshold: relative slowdown past which a case is a regression
+    :return: relative change of every regressed case
+    """
+    regressions = {}
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["median"]
+        change = result["median"] / before - 1
+        flag = ""
+        if change > threshold:
+            regressions[name] = change
+            flag = "  REGRESSION"
+        print(
+            f"{name:45s} {_format(before)} -> {_format(result['median'])} "
+            f"({change:+.1%}){flag}"
+        )
+    return regressions
+
+
+def _format(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:8.3f}s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.3f}ms"
+    return f"{seconds * 1e6:8.3f}us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the solver's hot paths")
+    parser.add_argument(
+        "-w", "--word_bank", default="wordle/wordle_bank", help="Word bank to use"
+    )
+    parser.add_argument(
+        "-k", "--pattern", default=None, help="Only run cases containing this"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per case")
+    parser.add_argument(
+        "--save", type=str, default=None, help="Write the results to this baseline"
+    )
+    parser.add_argument(
+        "--compare", type=str, default=None, help="Baseline to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    current = run(args.word_bank, args.repeat, args.pattern)
+    if args.save is not None:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {args.compare}:")
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} cases regressed by over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
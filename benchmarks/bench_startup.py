@@ -0,0 +1,69 @@
+#
+# bench_startup.py
+#
+# times invoking main.py, from process start to the first guess being printed
+#
+
+import argparse
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+COMMANDS: Dict[str, List[str]] = {
+    # parsing arguments only, none of the solver should be imported
+    "help": ["--help"],
+    # time until the board is first printed, that is until the first guess is made
+    "first_guess": ["play", "5", "6"],
+}
+
+
+def time_command(args: List[str], repeat: int) -> List[float]:
+    """Runs main.py with args repeat times in a fresh interpreter, stopping each
+    run at its first line of output
+    :return: seconds until the first line of output of every run
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with subprocess.Popen(
+            [sys.executable, "-u", str(REPO_DIR.joinpath("main.py")), *args],
+            cwd=REPO_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        ) as process:
+            process.stdout.readline()
+            times.append(time.perf_counter() - start)
+            process.kill()
+    return times
+
+
+def run(repeat: int) -> Dict[str, Dict[str, float]]:
+    """Times every startup command
+    :return: min and median seconds of each command
+    """
+    results = {}
+    for name, args in COMMANDS.items():
+        times = time_command(args, repeat)
+        results[name] = {"min": min(times), "median": statistics.median(times)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time main.py startup")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per command")
+    args = parser.parse_args()
+
+    for name, stats in run(args.repeat).items():
+        print(
+            f"{name:12s} min {stats['min'] * 1000:7.1f}ms "
+            f"median {stats['median'] * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,11 @@
 # entrypoint to execute stuff in wordle package
 #
 
-from typing import Dict
 import logging
 import argparse
 
-from wordle.helpers import find_available_word_banks
-
-import wordle.strategies as strats
-import wordle.probability_functions as p_fcns
-
-from wordle.wordle import Wordle
+from wordle import registry
+from wordle.constants import MAX_WORD_LENGTH, MIN_WORD_LENGTH
 
 
 def main():
@@ -22,7 +17,9 @@ def main():
     """
     parser = argparse.ArgumentParser(description="Run the wordle package code")
     parser.add_argument(
-        "action", help="What action to take", choices=["play", "process_bank"]
+        "action",
+        help="What action to take",
+        choices=["play", "simulate", "build_tree", "process_bank", "serve", "reverse"],
     )
     parser.add_argument("num_letters", type=int, help="How long the words should be")
     parser.add_argument("num_guesses", type=int, help="How many guesses the user has")
@@ -32,6 +29,7 @@ def main():
         "--strategy",
         type=str,
         help="Strategy to use",
+        choices=registry.STRATEGIES.keys(),
         default="MaxLikelihoodStrategy",
     )
 
@@ -40,17 +38,156 @@ def main():
         "--probability_function",
         type=str,
         help="Probability function to use",
+        choices=registry.PROBABILITY_FUNCTIONS.keys(),
         default="LetterPositionLikelihood",
     )
 
-    banks: Dict[str, str] = find_available_word_banks()
     parser.add_argument(
         "-w",
         "--word_bank",
         type=str,
-        help="File to read the word bank from",
-        choices=banks.keys(),
-        default="wordle/wordle_bank",
+        help=f"Word bank to use, e.g. {', '.join(registry.WORD_BANKS)}. Defaults "
+        "to the bank of num_letters letter words",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--feedback_matrix",
+        help="Filter with a precomputed guess x answer feedback matrix",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--array_bank",
+        help="Hold the word bank as a letter matrix and filter it with array masks",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--bitsets",
+        help="Filter the word bank with precomputed bitset partitions",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--sample",
+        type=int,
+        help="simulate: number of randomly chosen goal words to play, or of games "
+        "with --boards",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="simulate: seed used to choose the sample of goal words",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="simulate, build_tree, process_bank, serve, reverse: number of worker "
+        "processes",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--decision_tree",
+        type=str,
+        help="Decision tree file to follow, or to write with build_tree",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--transposition_table",
+        type=str,
+        help="File to memoize the strategy's decisions in across runs",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--adversarial",
+        help="play, simulate: the goal word dodges the guesses, as in Absurdle",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--quiet",
+        help="play: print only the result of the game instead of the board",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--boards",
+        type=int,
+        help="play, simulate: number of boards every guess is played on, as in "
+        "Quordle (4) or Octordle (8)",
+        default=1,
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="play, simulate: JSON lines file to record the timings of every turn to",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--source",
+        type=str,
+        help="process_bank: dictionary to generate the banks of every word length "
+        "from, instead of compiling --word_bank",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help="serve: unix socket to listen on, instead of localhost TCP",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="serve: localhost TCP port to listen on",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--input",
+        type=str,
+        help="reverse: log of feedback grids, one game per line with its rows of "
+        "colors separated by spaces, e.g. 01002 22222",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="reverse: JSON lines file to write the answers of every game to",
+        default="-",
+    )
+
+    parser.add_argument(
+        "--max_guesses",
+        type=int,
+        help="reverse: also list up to this many guesses that could have shown each "
+        "row, for games with few answers",
+        default=0,
+    )
+
+    parser.add_argument(
+        "--max_answers",
+        type=int,
+        help="reverse: list at most this many answers of each game",
+        default=None,
     )
 
     parser.add_argument(
@@ -66,32 +203,190 @@ def main():
     else:
         logging.basicConfig(level=logging.INFO)
 
-    available_strategies = [
-        strat for strat in dir(strats) if not strat.startswith("__")
-    ]
-    if args.strategy not in available_strategies:
-        raise ImportError(
-            f"{args.strategy} is not an available strategy.\n"
-            "Please check stratgies.py for available stragies.\n"
+    # modules are only imported once the action needs them, which keeps numpy and
+    # friends out of --help and argument errors
+    strat = registry.load_strategy(args.strategy)
+    p_fcn = registry.load_probability_function(args.probability_function)
+    if not MIN_WORD_LENGTH <= args.num_letters <= MAX_WORD_LENGTH:
+        parser.error(f"num_letters must be from {MIN_WORD_LENGTH} to {MAX_WORD_LENGTH}")
+    word_bank = args.word_bank or registry.default_word_bank(args.num_letters)
+    word_bank_path = None
+    # generating the banks from a word list does not need one to exist yet
+    if args.action != "process_bank" or args.source is None:
+        try:
+            word_bank_path = str(registry.word_bank_path(word_bank))
+        except KeyError as e:
+            hint = ""
+            if args.word_bank is None:
+                hint = ", or generate it with process_bank --source <word list>"
+            parser.error(e.args[0] + hint)
+        if registry.word_length(word_bank_path) != args.num_letters:
+            parser.error(f"{word_bank} does not have {args.num_letters} letter words")
+
+    if args.boards > 1 and args.action in ("play", "simulate"):
+        from wordle.multi_board import MultiWordle, simulate_boards
+
+        # only the flags given, so the defaults of multi board games still apply
+        bank_options = {
+            option: True
+            for option, value in [
+                ("use_feedback_matrix", args.feedback_matrix),
+                ("array_backed", args.array_bank),
+                ("use_bitsets", args.bitsets),
+            ]
+            if value
+        }
+        if args.action == "play":
+            result = MultiWordle(
+                p_fcn,
+                strat,
+                word_bank_path,
+                args.boards,
+                args.num_guesses,
+                render=not args.quiet,
+                **bank_options,
+            ).play()
+            print(result)
+        else:
+            report = simulate_boards(
+                p_fcn,
+                strat,
+                word_bank_path,
+                args.boards,
+                args.num_guesses,
+                games=args.sample or 100,
+                seed=args.seed,
+                **bank_options,
+            )
+            print(report)
+    elif args.action == "play":
+        from wordle.wordle import Wordle
+
+        decision_tree = None
+        if args.decision_tree is not None:
+            from wordle.decision_tree import DecisionTree
+            from wordle.words.word_bank import WordBank
+
+            decision_tree = DecisionTree.load(
+                args.decision_tree, WordBank(word_bank_path).original_word_bank
+            )
+        table = None
+        if args.transposition_table is not None:
+            from wordle.transposition import CachedStrategy, TranspositionTable
+
+            table = TranspositionTable.load(args.transposition_table)
+            table.reset_counters()
+        sink = None
+        if args.trace is not None:
+            from wordle.instrumentation import JsonLinesSink
+
+            sink = JsonLinesSink(args.trace)
+        game = Wordle(
+            p_fcn,
+            strat if table is None else CachedStrategy(strat, table),
+            word_bank_path,
+            args.num_guesses,
+            use_feedback_matrix=args.feedback_matrix,
+            array_backed=args.array_bank,
+            use_bitsets=args.bitsets,
+            decision_tree=decision_tree,
+            render=not args.quiet,
+            trace=sink,
+            adversarial=args.adversarial,
         )
-    strat = getattr(strats, args.strategy)
+        result = game.play()
+        if args.quiet:
+            print(result)
+        if sink is not None:
+            sink.close()
+        if table is not None:
+            table.save(args.transposition_table)
+            logging.info("Transposition table: %s", table.stats())
+    elif args.action == "simulate":
+        from wordle.simulation import simulate
 
-    available_prob_fcns = [fcn for fcn in dir(p_fcns) if not fcn.startswith("__")]
-    if args.probability_function not in available_prob_fcns:
-        raise ImportError(
-            f"{args.probability_function} is not an available strategy.\n"
-            "Please check stratgies.py for available stragies.\n"
+        report = simulate(
+            p_fcn,
+            strat,
+            word_bank_path,
+            args.num_guesses,
+            sample=args.sample,
+            seed=args.seed,
+            processes=args.processes,
+            decision_tree_path=args.decision_tree,
+            transposition_table_path=args.transposition_table,
+            trace_path=args.trace,
+            adversarial=args.adversarial,
+            use_feedback_matrix=args.feedback_matrix,
+            array_backed=args.array_bank,
+            use_bitsets=args.bitsets,
         )
-    p_fcn = getattr(p_fcns, args.probability_function)
+        print(report)
+    elif args.action == "build_tree":
+        if args.decision_tree is None:
+            parser.error("build_tree needs --decision_tree to write the tree to")
+        from wordle.decision_tree import build_decision_tree
 
-    if args.action == "play":
-        game = Wordle(
+        tree, solve_depths = build_decision_tree(
             p_fcn,
             strat,
-            banks[args.word_bank],
+            word_bank_path,
             args.num_guesses,
+            processes=args.processes,
+        )
+        tree.save(args.decision_tree)
+        print(f"Nodes: {len(tree)}")
+        for depth, count in sorted(solve_depths.items()):
+            print(f"  {depth or 'unsolved'}: {count}")
+    elif args.action == "process_bank":
+        if args.source is not None:
+            from wordle.words.process_banks import WIKIPEDIA_DIR, generate_banks
+
+            counts = generate_banks(
+                args.source, WIKIPEDIA_DIR, processes=args.processes
+            )
+            for path, count in sorted(counts.items()):
+                print(f"{path}: {count} words")
+        else:
+            from wordle.words.compiled_bank import compile_bank
+
+            compiled_path = compile_bank(word_bank_path)
+            print(f"Compiled {word_bank_path} to {compiled_path}")
+    elif args.action == "reverse":
+        if args.input is None:
+            parser.error("reverse needs --input to read the feedback grids from")
+        from wordle.reverse import reverse_solve_file
+
+        written = reverse_solve_file(
+            args.input,
+            args.output,
+            word_bank_path,
+            processes=args.processes,
+            max_guesses=args.max_guesses,
+            max_answers=args.max_answers,
+        )
+        logging.info("Solved %d games", written)
+    elif args.action == "serve":
+        import asyncio
+
+        from wordle.server import SolverServer
+
+        bank_options = {
+            "use_feedback_matrix": args.feedback_matrix,
+            "array_backed": args.array_bank,
+            "use_bitsets": args.bitsets,
+        }
+        server = SolverServer(
+            args.strategy,
+            args.probability_function,
+            word_bank,
+            processes=args.processes,
+            **{option: True for option, value in bank_options.items() if value},
         )
-        game.play()
+        try:
+            asyncio.run(server.serve(args.socket, port=args.port))
+        except KeyboardInterrupt:
+            pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+#
+# conftest.py
+#
+# word bank shared by the tests
+#
+
+import pytest
+
+WORDS = [
+    "abbey",
+    "apnea",
+    "pasty",
+    "scopa",
+    "sissy",
+    "asses",
+    "eerie",
+    "geese",
+    "tepee",
+    "crane",
+    "react",
+    "nacre",
+    "trace",
+    "caret",
+    "essay",
+    "yeast",
+]
+
+
+@pytest.fixture
+def bank_file(tmp_path):
+    path = tmp_path / "bank.txt"
+    path.write_text("".join(f"{word}\n" for word in WORDS), encoding="utf-8")
+    return path
@@ -0,0 +1,44 @@
+#
+# test_adversarial.py
+#
+#
+
+import pytest
+
+from wordle.feedback import decode_pattern, pattern_code
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.strategies import MaxLikelihoodStrategy
+from wordle.wordle import Wordle
+
+from conftest import WORDS
+
+
+@pytest.mark.parametrize("array_backed", [False, True])
+def test_adversarial_keeps_largest_bucket(bank_file, array_backed):
+    game = Wordle(
+        LetterPositionLikelihood,
+        MaxLikelihoodStrategy,
+        bank_file,
+        len(WORDS),
+        array_backed=array_backed,
+        render=False,
+        adversarial=True,
+    )
+    assert game.goal_word is None
+    for guess in ["crane", "essay"]:
+        buckets = {}
+        for word in game.word_bank:
+            game.goal_word = word
+            code = pattern_code(game.get_guess_state(guess))
+            buckets.setdefault(code, []).append(word)
+        game.goal_word = None
+        largest = max(len(bucket) for bucket in buckets.values())
+
+        code = pattern_code(game.get_adversarial_state(guess))
+        assert len(buckets[code]) == largest
+        game.word_bank.filter_bank(decode_pattern(guess, code))
+        assert list(game.word_bank) == buckets[code]
+
+    game.word_bank.reset_bank()
+    result = game.play()
+    assert result.solved and result.goal_word == result.guesses[-1]
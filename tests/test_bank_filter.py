@@ -2,3 +2,187 @@
 # test_bank_filter.py
 #
 #
+
+from itertools import product
+
+from wordle.candidates import CandidateSet
+from wordle.constants import LetterState
+from wordle.helpers import state_to_color
+from wordle.feedback import (
+    FeedbackMatrix,
+    compute_patterns,
+    Feedback,
+    decode_pattern,
+    pattern_code,
+    score,
+    to_letter_matrix,
+)
+from wordle.strategies import EntropyStrategy, MaxLikelihoodStrategy
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.wordle import Wordle
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+# words of 3 to 12 letters with repeated letters
+LONG_WORDS = [
+    "eel",
+    "ewe",
+    "lee",
+    "bananas",
+    "savanna",
+    "nasalan",
+    "assessment",
+    "statesmans",
+    "mattresses",
+    "embarrassment",
+    "assassinates",
+    "masterstrokes",
+]
+
+
+def test_get_guess_state_duplicate_letters(bank_file):
+    game = Wordle(LetterPositionLikelihood, MaxLikelihoodStrategy, bank_file, 6)
+    game.goal_word = "abbey"
+    states = [state.value for _, state in game.get_guess_state("babes")]
+    assert states == [1, 1, 2, 2, 0]
+
+    game.goal_word = "pasty"
+    states = [state.value for _, state in game.get_guess_state("apnea")]
+    assert states == [1, 1, 0, 0, 0]
+
+
+def test_pattern_code_round_trip(bank_file):
+    game = Wordle(LetterPositionLikelihood, MaxLikelihoodStrategy, bank_file, 6)
+    for guess, goal in product(WORDS, WORDS):
+        game.goal_word = goal
+        guess_state = game.get_guess_state(guess)
+        assert decode_pattern(guess, pattern_code(guess_state)) == guess_state
+
+
+def test_score_matches_compute_patterns():
+    for words in (WORDS, LONG_WORDS):
+        for guess, answer in product(words, words):
+            if len(guess) == len(answer):
+                codes = compute_patterns(
+                    to_letter_matrix([guess]), to_letter_matrix([answer])
+                )
+                assert score(guess, answer) == codes[0, 0]
+
+
+def test_feedback_converts_to_states():
+    states = [
+        ("e", LetterState.YELLOW),
+        ("e", LetterState.GREY),
+        ("r", LetterState.GREEN),
+        ("i", LetterState.GREY),
+        ("e", LetterState.YELLOW),
+    ]
+    feedback = Feedback.from_states(states)
+    assert feedback == Feedback("eerie", pattern_code(states))
+    assert feedback == states and feedback.to_states() == states
+    assert list(feedback) == states and len(feedback) == 5
+    assert feedback[2] == states[2] and feedback[-1] == states[-1]
+    assert feedback[1:3] == states[1:3]
+    assert feedback.digits() == [1, 0, 2, 0, 1]
+    assert Feedback.from_states(feedback) is feedback
+    assert hash(feedback) == hash(decode_pattern("eerie", feedback.code))
+    assert state_to_color(1) == state_to_color(LetterState.YELLOW)
+
+
+def test_feedback_matrix_matches_guess_state(bank_file):
+    game = Wordle(LetterPositionLikelihood, MaxLikelihoodStrategy, bank_file, 6)
+    matrix = FeedbackMatrix.build(WORDS)
+    for guess, goal in product(WORDS, WORDS):
+        game.goal_word = goal
+        assert matrix.pattern(guess, goal) == pattern_code(game.get_guess_state(guess))
+
+
+def test_feedback_matrix_cache(bank_file):
+    built = FeedbackMatrix.load_or_build(WORDS, bank_file)
+    loaded = FeedbackMatrix.load_or_build(WORDS, bank_file)
+    assert (built.patterns == loaded.patterns).all()
+    assert FeedbackMatrix.cache_path(WORDS, bank_file) != FeedbackMatrix.cache_path(
+        WORDS[:-1], bank_file
+    )
+
+
+def test_filter_with_feedback_matrix(bank_file):
+    python_bank = WordBank(bank_file)
+    matrix_bank = WordBank(bank_file, use_feedback_matrix=True)
+    matrix = matrix_bank.feedback_matrix
+    for guess, goal in product(WORDS, WORDS):
+        guess_state = decode_pattern(guess, matrix.pattern(guess, goal))
+        python_bank.reset_bank()
+        matrix_bank.reset_bank()
+        python_bank.filter_bank(guess_state)
+        matrix_bank.filter_bank(guess_state)
+        assert goal in python_bank
+        assert python_bank.word_bank == matrix_bank.word_bank
+        assert [WORDS[i] for i in matrix_bank.indices] == matrix_bank.word_bank
+
+
+def test_array_backed_filter_matches_python(bank_file):
+    python_bank = WordBank(bank_file)
+    array_bank = WordBank(bank_file, array_backed=True)
+    for guess in WORDS:
+        for states in product(LetterState, repeat=len(guess)):
+            guess_state = list(zip(guess, states))
+            python_bank.reset_bank()
+            array_bank.reset_bank()
+            python_bank.filter_bank(guess_state)
+            array_bank.filter_bank(guess_state)
+            assert python_bank.word_bank == array_bank.word_bank
+
+
+def test_array_backed_bank_is_list_like(bank_file):
+    bank = WordBank(bank_file, array_backed=True)
+    bank.filter_bank(list(zip("eerie", [LetterState.GREY] * 5)))
+    assert list(bank) == ["pasty", "scopa"]
+    assert len(bank) == len(bank.letters) == 2
+    assert bank[1] == "scopa"
+    bank.remove("pasty")
+    assert list(bank) == ["scopa"]
+    assert [WORDS[i] for i in bank.indices] == bank.word_bank
+
+
+def test_candidate_set():
+    candidates = CandidateSet.from_indices([0, 3, 9], 10)
+    assert len(candidates) == 3
+    assert 3 in candidates and 4 not in candidates
+    assert candidates.indices().tolist() == [0, 3, 9]
+    assert (
+        candidates & CandidateSet.from_indices([3, 4, 9], 10)
+    ).indices().tolist() == [
+        3,
+        9,
+    ]
+    assert len(CandidateSet.full(10).discard(2)) == 9
+
+
+def test_filter_with_bitsets(bank_file):
+    python_bank = WordBank(bank_file)
+    bitset_bank = WordBank(bank_file, use_bitsets=True)
+    matrix = bitset_bank.feedback_matrix
+    for guess, goal in product(WORDS, WORDS):
+        guess_state = decode_pattern(guess, matrix.pattern(guess, goal))
+        python_bank.reset_bank()
+        bitset_bank.reset_bank()
+        python_bank.filter_bank(guess_state)
+        bitset_bank.filter_bank(guess_state)
+        assert len(python_bank) == len(bitset_bank)
+        assert python_bank.word_bank == bitset_bank.word_bank
+
+
+def test_unfiltered_game_guessing_removed_words(bank_file):
+    for goal_word in WORDS:
+        result = Wordle(
+            None,
+            EntropyStrategy,
+            bank_file,
+            6,
+            filter_bank=False,
+            goal_word=goal_word,
+            render=False,
+        ).play()
+        assert result.tries <= 6
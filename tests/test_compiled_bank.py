@@ -0,0 +1,21 @@
+#
+# test_compiled_bank.py
+#
+#
+
+from wordle.words.compiled_bank import compile_bank, load_compiled_bank
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+
+def test_compiled_bank(bank_file):
+    compile_bank(bank_file)
+    word_bank = WordBank(bank_file, array_backed=True)
+    assert word_bank.original_word_bank == WORDS
+    assert word_bank.letter_matrix is word_bank._compiled_letters
+
+    # editing the text file makes the compiled bank stale
+    bank_file.write_text("".join(f"{word}\n" for word in WORDS[:8]), encoding="utf-8")
+    assert load_compiled_bank(bank_file) is None
+    assert WordBank(bank_file).original_word_bank == WORDS[:8]
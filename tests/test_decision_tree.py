@@ -0,0 +1,83 @@
+#
+# test_decision_tree.py
+#
+#
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from wordle.decision_tree import DecisionTree, build_decision_tree
+from wordle.feedback import num_patterns
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.strategies import EntropyStrategy, MaxLikelihoodStrategy
+from wordle.wordle import Wordle
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+SOLVED = num_patterns(5) - 1
+
+
+@pytest.mark.parametrize("strategy", [MaxLikelihoodStrategy, EntropyStrategy])
+def test_tree_matches_strategy_games(bank_file, strategy):
+    tree, solve_depths = build_decision_tree(
+        LetterPositionLikelihood, strategy, str(bank_file), 6, processes=2
+    )
+    assert sum(solve_depths.values()) == len(WORDS)
+
+    bank = WordBank(bank_file, use_feedback_matrix=True)
+    tries = Counter()
+    for goal_word in WORDS:
+        games = []
+        for decision_tree in (None, tree):
+            bank.reset_bank()
+            game = Wordle(
+                LetterPositionLikelihood,
+                strategy,
+                bank,
+                6,
+                goal_word=goal_word,
+                render=False,
+                decision_tree=decision_tree,
+            )
+            games.append(game.play())
+        assert games[0].guesses == games[1].guesses
+        tries[games[0].tries if games[0].solved else 0] += 1
+    assert tries == solve_depths
+
+
+@pytest.mark.parametrize("name", ["tree.npz", "tree.bin"])
+def test_save_and_load(bank_file, tmp_path, name):
+    tree, _ = build_decision_tree(
+        LetterPositionLikelihood, EntropyStrategy, str(bank_file), 6, processes=1
+    )
+    path = str(tmp_path / name)
+    tree.save(path)
+
+    loaded = DecisionTree.load(path, WORDS)
+    assert loaded.metadata == tree.metadata
+    assert len(loaded) == len(tree)
+    for name in ("node_guesses", "edge_parents", "edge_patterns", "edge_children"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(tree, name))
+    for node in range(len(tree)):
+        assert loaded.guess(node) == tree.guess(node)
+        for code in range(num_patterns(5)):
+            assert loaded.child(node, code) == tree.child(node, code)
+
+    with pytest.raises(ValueError):
+        DecisionTree.load(path, WORDS[::-1])
+
+
+def test_no_children_past_depth(bank_file):
+    tree, solve_depths = build_decision_tree(
+        LetterPositionLikelihood, MaxLikelihoodStrategy, str(bank_file), 2
+    )
+    assert tree.child(DecisionTree.ROOT, SOLVED) is None
+    second_turn = [node for node in range(len(tree)) if node != DecisionTree.ROOT]
+    assert second_turn and len(tree.edge_children) == len(second_turn)
+    for node in second_turn:
+        assert all(tree.child(node, code) is None for code in range(SOLVED + 1))
+    # answers not found by the second guess are counted as unsolved
+    assert solve_depths[0] == len(WORDS) - solve_depths[1] - solve_depths[2]
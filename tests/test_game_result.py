@@ -0,0 +1,29 @@
+#
+# test_game_result.py
+#
+#
+
+from wordle.feedback import decode_pattern
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.strategies import MaxLikelihoodStrategy
+from wordle.wordle import Wordle
+
+
+def test_quiet_game_result(bank_file, capsys):
+    game = Wordle(
+        LetterPositionLikelihood,
+        MaxLikelihoodStrategy,
+        bank_file,
+        6,
+        array_backed=True,
+        goal_word="trace",
+        render=False,
+    )
+    result = game.play()
+    assert capsys.readouterr().out == ""
+
+    assert result.solved and result.guesses[-1] == "trace"
+    assert result.tries == len(result.guesses) == game.tries
+    assert result.patterns[-1] == 3**5 - 1
+    for guess, code in zip(result.guesses, result.patterns):
+        assert decode_pattern(guess, code) == game.get_guess_state(guess)
@@ -0,0 +1,66 @@
+#
+# test_instrumentation.py
+#
+#
+
+import json
+
+from wordle.instrumentation import (
+    PHASES,
+    JsonLinesSink,
+    MemorySink,
+    NullSink,
+    phase_percentiles,
+)
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.strategies import MaxLikelihoodStrategy
+from wordle.wordle import Wordle
+
+WORDS = ["crane", "trace", "react", "caret", "nacre", "abbey", "pasty", "essay"]
+
+
+def _play(tmp_path, trace):
+    path = tmp_path / "bank.txt"
+    path.write_text("".join(f"{word}\n" for word in WORDS), encoding="utf-8")
+    game = Wordle(
+        LetterPositionLikelihood,
+        MaxLikelihoodStrategy,
+        path,
+        6,
+        array_backed=True,
+        goal_word="caret",
+        render=False,
+        trace=trace,
+    )
+    game.play()
+    return game
+
+
+def test_turn_records(tmp_path):
+    sink = MemorySink()
+    game = _play(tmp_path, sink)
+
+    assert [turn["guess"] for turn in sink.records] == [
+        guess.lower() for guess in game.guesses
+    ]
+    assert sink.records[0]["candidates_before"] == len(WORDS)
+    for turn, next_turn in zip(sink.records, sink.records[1:]):
+        assert turn["candidates_after"] == next_turn["candidates_before"]
+        assert turn["candidates_after"] < turn["candidates_before"]
+    for turn in sink.records:
+        assert all(turn[phase] >= 0 for phase in PHASES)
+
+    stats = phase_percentiles(sink.records)
+    assert set(stats) == set(PHASES)
+    assert stats["filter_time"]["p50"] <= stats["filter_time"]["max"]
+
+
+def test_sinks(tmp_path):
+    _play(tmp_path, NullSink())
+
+    trace_path = tmp_path / "trace.jsonl"
+    with JsonLinesSink(trace_path) as sink:
+        game = _play(tmp_path, sink)
+    lines = trace_path.read_text().splitlines()
+    assert len(lines) == game.tries
+    assert json.loads(lines[-1])["guess"] == "caret"
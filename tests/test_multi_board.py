@@ -0,0 +1,84 @@
+#
+# test_multi_board.py
+#
+#
+
+import pytest
+
+from wordle.feedback import decode_pattern
+from wordle.multi_board import MultiEntropyStrategy, MultiWordle
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.strategies import EntropyStrategy, MaxLikelihoodStrategy
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+
+def test_board_entropies_match_single_board(bank_file):
+    bank = WordBank(bank_file, use_feedback_matrix=True, array_backed=True)
+    boards = [bank.fork() for _ in range(3)]
+    for board, (guess, goal) in zip(
+        boards[1:], [("crane", "trace"), ("essay", "geese")]
+    ):
+        board.filter_bank(
+            decode_pattern(guess, bank.feedback_matrix.pattern(guess, goal))
+        )
+    patterns = bank.feedback_matrix.patterns
+    candidates = [board.indices for board in boards]
+
+    entropies = MultiEntropyStrategy.board_entropies(patterns, candidates, 5)
+    for k, indices in enumerate(candidates):
+        expected = EntropyStrategy.guess_entropies(patterns, indices, 5)
+        assert entropies[:, k] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("strategy", [EntropyStrategy, MaxLikelihoodStrategy])
+def test_multi_board_game(bank_file, strategy):
+    goal_words = ["abbey", "crane", "geese", "yeast"]
+    game = MultiWordle(
+        LetterPositionLikelihood,
+        strategy,
+        str(bank_file),
+        len(goal_words),
+        len(WORDS),
+        goal_words=goal_words,
+        render=False,
+    )
+    result = game.play()
+    assert result.solved
+    for goal_word, turn in zip(goal_words, result.solved_at):
+        assert result.guesses[turn - 1] == goal_word
+    matrix = game.boards[0].feedback_matrix
+    for guess, codes in zip(result.guesses, result.patterns):
+        for goal_word, code in zip(goal_words, codes):
+            assert code is None or code == matrix.pattern(guess, goal_word)
+
+
+def test_multi_board_game_list_backed(bank_file):
+    goal_words = ["abbey", "crane", "geese", "yeast"]
+    game = MultiWordle(
+        LetterPositionLikelihood,
+        EntropyStrategy,
+        str(bank_file),
+        len(goal_words),
+        len(WORDS),
+        use_feedback_matrix=False,
+        array_backed=False,
+        goal_words=goal_words,
+        render=False,
+    )
+    assert not any(board.array_backed for board in game.boards)
+    assert game.play().solved
+
+
+def test_fork_shares_tables(bank_file):
+    bank = WordBank(bank_file, use_feedback_matrix=True, array_backed=True)
+    fork = bank.fork()
+    assert fork.feedback_matrix is bank.feedback_matrix
+    assert fork.letter_matrix is bank.letter_matrix
+
+    fork.filter_bank(
+        decode_pattern("crane", bank.feedback_matrix.pattern("crane", "react"))
+    )
+    assert "react" in fork and "abbey" not in fork
+    assert list(bank) == WORDS
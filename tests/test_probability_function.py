@@ -2,3 +2,125 @@
 # test_probability_function.py
 #
 #
+
+import numpy as np
+import pytest
+
+from wordle.constants import LetterState
+from wordle.probability_functions import (
+    LetterPositionLikelihood,
+    LetterSetLikelihood,
+)
+from wordle.words import bank_statistics
+from wordle.words.bank_statistics import StatisticsCache
+from wordle.words.word_bank import WordBank
+
+WORDS = ["crane", "react", "abbey", "sissy", "pasty", "eerie", "quack", "fjord"]
+
+PROBABILITY_FUNCTIONS = [LetterSetLikelihood, LetterPositionLikelihood]
+
+
+@pytest.fixture(params=[False, True], ids=["list", "array"])
+def word_bank(request, tmp_path):
+    path = tmp_path / "bank.txt"
+    path.write_text("".join(f"{word}\n" for word in WORDS), encoding="utf-8")
+    return WordBank(path, array_backed=request.param)
+
+
+def test_letter_set_mapping():
+    mapping = LetterSetLikelihood.generate_mapping(WORDS)
+    assert mapping.shape == (26,)
+    assert mapping.sum() == pytest.approx(1.0)
+    assert mapping[ord("e") - ord("a")] == 6 / 40
+    assert mapping[ord("z") - ord("a")] == 0.0
+
+
+def test_letter_position_mapping(word_bank):
+    mapping = LetterPositionLikelihood(word_bank).generate_mapping(word_bank)
+    assert mapping.shape == (5, 26)
+    assert mapping.sum() == pytest.approx(1.0)
+    assert mapping[0, ord("r") - ord("a")] == 1 / 40
+    assert mapping[4, ord("y") - ord("a")] == 3 / 40
+
+
+@pytest.mark.parametrize("prob_func", PROBABILITY_FUNCTIONS)
+def test_batch_matches_single_word(prob_func, word_bank):
+    fcn = prob_func(word_bank)
+    for batch, single in [
+        (fcn.batch_calc_prob, fcn.calc_prob),
+        (fcn.batch_calc_prob_of_vowels, fcn.calc_prob_of_vowels),
+        (fcn.batch_calc_prob_of_consonants, fcn.calc_prob_of_consonants),
+    ]:
+        probabilities = batch(word_bank)
+        assert isinstance(probabilities, np.ndarray)
+        assert probabilities.tolist() == [single(word) for word in WORDS]
+        assert batch(WORDS).tolist() == probabilities.tolist()
+
+
+@pytest.mark.parametrize("prob_func", PROBABILITY_FUNCTIONS)
+def test_vowels_and_consonants_add_up(prob_func, word_bank):
+    fcn = prob_func(word_bank)
+    np.testing.assert_allclose(
+        fcn.batch_calc_prob_of_vowels(WORDS) + fcn.batch_calc_prob_of_consonants(WORDS),
+        fcn.batch_calc_prob(WORDS),
+    )
+
+
+@pytest.mark.parametrize("prob_func", PROBABILITY_FUNCTIONS)
+def test_incremental_mapping_follows_bank(prob_func, word_bank):
+    fcn = prob_func.for_word_bank(word_bank)
+    assert prob_func.for_word_bank(word_bank) is fcn
+
+    word_bank.filter_bank([(letter, LetterState.GREY) for letter in "quack"])
+    word_bank.remove("eerie")
+    with pytest.raises(ValueError):
+        word_bank.remove("zzzzz")
+    np.testing.assert_array_equal(
+        fcn.batch_calc_prob(word_bank), prob_func(word_bank).batch_calc_prob(word_bank)
+    )
+
+    word_bank.reset_bank()
+    np.testing.assert_array_equal(
+        fcn.batch_calc_prob(WORDS), prob_func(WORDS).batch_calc_prob(WORDS)
+    )
+
+
+@pytest.mark.parametrize("prob_func", PROBABILITY_FUNCTIONS)
+def test_statistics_cached_by_content(prob_func, word_bank, monkeypatch):
+    cache = StatisticsCache(max_entries=2)
+    monkeypatch.setattr(bank_statistics, "STATISTICS", cache)
+    monkeypatch.setattr("wordle.words.word_bank.STATISTICS", cache)
+    expected = prob_func(WORDS).batch_calc_prob(WORDS)
+
+    np.testing.assert_array_equal(prob_func(word_bank).batch_calc_prob(WORDS), expected)
+    assert (cache.hits, cache.misses) == (0, 1)
+    saved = list(word_bank.file_path.parent.glob("bank.*.npy"))
+    assert len(saved) == 1
+
+    # a new bank of the same words is a hit, and so is every reset
+    other = WordBank(word_bank.file_path, array_backed=word_bank.array_backed)
+    fcn = prob_func.for_word_bank(other)
+    other.reset_bank()
+    np.testing.assert_array_equal(fcn.batch_calc_prob(WORDS), expected)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    # other processes load what was saved instead of counting again
+    cache.clear()
+    np.testing.assert_array_equal(prob_func(other).batch_calc_prob(WORDS), expected)
+    assert cache.misses == 2 and len(cache) == 1
+
+    word_bank.filter_bank([(letter, LetterState.GREY) for letter in "quack"])
+    prob_func(word_bank)
+    prob_func(word_bank)
+    # only array backed banks are cached with words removed
+    assert cache.hits == 2 + word_bank.array_backed
+    assert len(cache) == 1 + word_bank.array_backed
+
+
+def test_bank_letter_matrix(word_bank):
+    word_bank.remove("fjord")
+    matrix = [[0] * 5 for _ in range(26)]
+    for word in word_bank:
+        for i, letter in enumerate(word):
+            matrix[ord(letter) - ord("a")][i] += 1
+    assert word_bank.bank_letter_matrix() == matrix
@@ -0,0 +1,57 @@
+#
+# test_process_banks.py
+#
+#
+
+import multiprocessing
+
+import pytest
+
+from wordle.words.compiled_bank import load_compiled_bank
+from wordle.words.process_banks import bounded_imap, generate_banks
+from wordle.words.word_bank import WordBank
+
+SOURCE = ["Crane", "abbey", "it's", "crane", "", "table", "ox", "Abbey", "naïve"]
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_generate_banks(tmp_path, processes):
+    source = tmp_path / "words.txt"
+    source.write_text("".join(f"{word}\n" for word in SOURCE), encoding="utf-8")
+
+    counts = generate_banks(source, tmp_path, processes=processes, chunk_size=8)
+    assert counts == {
+        str(tmp_path / "5_letter_words.txt"): 3,
+        str(tmp_path / "unique_5_letter_words.txt"): 2,
+        str(tmp_path / "2_letter_words.txt"): 1,
+        str(tmp_path / "unique_2_letter_words.txt"): 1,
+    }
+    assert (tmp_path / "5_letter_words.txt").read_text().split() == [
+        "crane",
+        "abbey",
+        "table",
+    ]
+    assert (tmp_path / "unique_5_letter_words.txt").read_text().split() == [
+        "crane",
+        "table",
+    ]
+
+    bank_path = tmp_path / "5_letter_words.txt"
+    assert load_compiled_bank(bank_path) is not None
+    assert WordBank(bank_path).original_word_bank == ["crane", "abbey", "table"]
+
+
+def test_bounded_imap_reads_ahead_at_most_window():
+    read = []
+
+    def items():
+        for i in range(20):
+            read.append(i)
+            yield -i
+
+    with multiprocessing.Pool(2) as pool:
+        results = []
+        for result in bounded_imap(pool, abs, items(), 3):
+            assert len(read) - len(results) <= 3
+            results.append(result)
+    assert results == list(range(20))
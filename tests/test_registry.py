@@ -0,0 +1,50 @@
+#
+# test_registry.py
+#
+#
+
+import inspect
+
+import pytest
+
+import wordle.probability_functions as p_fcns
+import wordle.strategies as strats
+from wordle import registry
+
+
+def test_manifest_lists_every_strategy():
+    strategies = {
+        name
+        for name, obj in inspect.getmembers(strats, inspect.isclass)
+        if issubclass(obj, strats.Strategy) and obj is not strats.Strategy
+    }
+    assert strategies == set(registry.STRATEGIES)
+    for name in registry.STRATEGIES:
+        assert registry.load_strategy(name) is getattr(strats, name)
+
+
+def test_manifest_lists_every_probability_function():
+    prob_funcs = {
+        name
+        for name, obj in inspect.getmembers(p_fcns, inspect.isclass)
+        if issubclass(obj, p_fcns.ProbabilityFunction)
+        and obj is not p_fcns.ProbabilityFunction
+    }
+    assert prob_funcs == set(registry.PROBABILITY_FUNCTIONS)
+    for name in registry.PROBABILITY_FUNCTIONS:
+        assert registry.load_probability_function(name) is getattr(p_fcns, name)
+
+
+def test_word_banks_exist():
+    for name in registry.WORD_BANKS:
+        assert registry.word_bank_path(name).is_file()
+    with pytest.raises(KeyError):
+        registry.word_bank_path("wordle/missing_bank")
+    with pytest.raises(KeyError):
+        registry.load_strategy("choice")
+
+
+def test_default_word_bank_matches_length():
+    path = registry.word_bank_path(registry.default_word_bank(5))
+    assert registry.word_length(path) == 5
+    assert registry.default_word_bank(7) == "wikipedia/7_letter_words"
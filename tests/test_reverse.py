@@ -0,0 +1,84 @@
+#
+# test_reverse.py
+#
+#
+
+import json
+from itertools import product
+
+import pytest
+
+import wordle.reverse as reverse
+from wordle.feedback import score
+from wordle.reverse import ReverseSolver, parse_history, reverse_solve_file
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+HISTORIES = [
+    "00000 22222",
+    "🟨⬛⬛🟨⬛ 🟩🟩🟩🟩🟩",
+    "10010,22222",
+    "21000 02100",
+    "22220",
+    "",
+    "2222",
+    "20x00",
+]
+
+
+def test_parse_history():
+    assert parse_history("20100 🟩⬛🟨⬛⬛,22222", 5) == [2 + 9, 2 + 9, 3**5 - 1]
+    with pytest.raises(ValueError):
+        parse_history("2010", 5)
+    with pytest.raises(ValueError):
+        parse_history("201x0", 5)
+
+
+@pytest.mark.parametrize("dense", [False, True])
+def test_reverse_solver_matches_brute_force(bank_file, monkeypatch, dense):
+    if not dense:
+        monkeypatch.setattr(reverse, "MAX_DENSE_PATTERNS", 0)
+    solver = ReverseSolver(WordBank(bank_file))
+    # the second solver loads the table the first one cached
+    cached = ReverseSolver(WordBank(bank_file)).table
+    assert (cached.offsets == solver.table.offsets).all()
+    assert (cached.indices == solver.table.indices).all()
+    for history in HISTORIES[:5]:
+        codes = parse_history(history, 5)
+        expected = [
+            answer
+            for answer in WORDS
+            if all(any(score(g, answer) == code for g in WORDS) for code in codes)
+        ]
+        result = solver.solve(codes, max_guesses=len(WORDS))
+        assert result["answers"] == expected and result["count"] == len(expected)
+        for answer, rows in result["guesses"].items():
+            for code, guesses in zip(codes, rows):
+                assert guesses == [g for g in WORDS if score(g, answer) == code]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_reverse_solve_file(bank_file, tmp_path, processes):
+    grids = tmp_path / "grids.txt"
+    grids.write_text("".join(f"{line}\n" for line in HISTORIES), encoding="utf-8")
+    output = tmp_path / "answers.jsonl"
+
+    written = reverse_solve_file(
+        str(grids), str(output), str(bank_file), processes, chunk_size=16
+    )
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert written == len(results) == len(HISTORIES) - 1
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 5, 7, 8]
+    assert "error" in results[-1] and "error" in results[-2]
+
+    solver = ReverseSolver(WordBank(bank_file))
+    for history, result in zip(HISTORIES, results):
+        if "error" not in result:
+            assert result == {
+                "line": result["line"],
+                **solver.solve(parse_history(history, 5)),
+            }
+    # every answer shows every pattern it can show to some guess
+    for answer, guess in product(WORDS, WORDS):
+        assert answer in solver.solve([score(guess, answer)])["answers"]
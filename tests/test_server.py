@@ -0,0 +1,68 @@
+#
+# test_server.py
+#
+#
+
+import asyncio
+import json
+
+import pytest
+
+from wordle.constants import LetterState
+from wordle.server import SolverServer, parse_pattern
+
+
+def test_parse_pattern():
+    expected = [
+        ("c", LetterState.GREEN),
+        ("r", LetterState.GREY),
+        ("a", LetterState.YELLOW),
+        ("n", LetterState.GREY),
+        ("e", LetterState.GREY),
+    ]
+    assert parse_pattern("crane", "20100") == expected
+    assert parse_pattern("crane", 2 + 1 * 9) == expected
+    with pytest.raises(ValueError):
+        parse_pattern("crane", "2010")
+    with pytest.raises(ValueError):
+        parse_pattern("crane", 3**5)
+
+
+def test_server_answers_requests(tmp_path):
+    socket_path = str(tmp_path / "solver.sock")
+
+    async def run():
+        server = SolverServer(processes=1, array_backed=True)
+        serving = asyncio.create_task(server.serve(socket_path))
+        while not (tmp_path / "solver.sock").exists():
+            await asyncio.sleep(0.01)
+
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        responses = []
+        for request in (
+            {"id": 1},
+            {"id": 2, "history": [["sores", "00000"]]},
+            {"id": 3, "history": [["sores", "00000"]]},
+            {"id": 4, "strategy": "NotAStrategy"},
+            {"id": 5, "strategy": "RandomAlternating"},
+            {"id": 6, "strategy": "RandomAlternating"},
+        ):
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        serving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await serving
+        return server, responses
+
+    server, responses = asyncio.run(run())
+    assert [response["id"] for response in responses] == [1, 2, 3, 4, 5, 6]
+    assert responses[0]["candidates"] == 12947
+    assert responses[1]["guess"] == responses[2]["guess"]
+    assert not set(responses[1]["guess"]) & set("sore")
+    assert responses[1]["candidates"] < responses[0]["candidates"]
+    assert "error" in responses[3]
+    # random guesses are asked of the strategy every time
+    assert "error" not in responses[4] and "error" not in responses[5]
+    assert server.cache.hits == 2 and len(server.cache) == 2
@@ -0,0 +1,86 @@
+#
+# test_shared_tables.py
+#
+#
+
+import numpy as np
+import pytest
+
+from wordle.feedback import decode_pattern
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.shared_tables import SharedTables
+from wordle.simulation import simulate
+from wordle.strategies import EntropyStrategy, MaxLikelihoodStrategy
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+
+def test_shared_bank(bank_file, tmp_path):
+    bank = WordBank(bank_file, use_feedback_matrix=True)
+    directory = tmp_path / "tables"
+    directory.mkdir()
+    with SharedTables(str(directory)) as tables:
+        shared = bank.share(tables)
+        # the cached feedback matrix is shared through its own file
+        assert shared.patterns.path == bank.feedback_matrix.patterns.filename
+        worker_bank = WordBank(bank_file, use_bitsets=True, shared=shared)
+        assert worker_bank.original_word_bank == WORDS
+        assert (worker_bank.letter_matrix == bank.letter_matrix).all()
+        assert (
+            worker_bank.feedback_matrix.patterns == bank.feedback_matrix.patterns
+        ).all()
+        assert not worker_bank.letter_matrix.flags.writeable
+        assert worker_bank.state_digest() == bank.state_digest()
+
+        guess_state = decode_pattern(
+            "crane", bank.feedback_matrix.pattern("crane", "react")
+        )
+        bank.filter_bank(guess_state)
+        worker_bank.filter_bank(guess_state)
+        assert worker_bank.word_bank == bank.word_bank
+    assert not any(directory.iterdir())
+    with pytest.raises(FileNotFoundError):
+        shared.letters.attach()
+
+
+def test_stale_tables_removed(tmp_path):
+    stale = tmp_path / "wordle_tables_999999999_x"
+    stale.mkdir()
+    with SharedTables(str(tmp_path)) as tables:
+        assert not stale.exists()
+        array = np.arange(10, dtype=np.uint8)
+        handle = tables.publish("letters", array)
+        assert tables.publish("letters", array.copy()) is handle
+        assert (handle.attach() == array).all()
+
+
+def test_simulate_on_shared_bank(bank_file):
+    report = simulate(
+        LetterPositionLikelihood,
+        MaxLikelihoodStrategy,
+        str(bank_file),
+        len(WORDS),
+        processes=2,
+        use_bitsets=True,
+    )
+    assert report.num_games == len(WORDS) and report.num_failures == 0
+
+
+def test_simulate_builds_feedback_matrix_once(bank_file, monkeypatch):
+    share = WordBank.share
+    shared_matrices = []
+
+    def record_share(bank, tables):
+        shared_matrices.append(bank.feedback_matrix)
+        return share(bank, tables)
+
+    monkeypatch.setattr(WordBank, "share", record_share)
+    report = simulate(
+        LetterPositionLikelihood, EntropyStrategy, str(bank_file), 6, processes=2
+    )
+    assert report.num_games == len(WORDS) and report.num_failures == 0
+    # built by the parent before the workers started
+    assert shared_matrices[0] is not None
+    assert len(list(bank_file.parent.glob("bank.feedback.*.npy"))) == 1
+    assert not list(bank_file.parent.glob("*.tmp"))
@@ -0,0 +1,148 @@
+#
+# test_strategies.py
+#
+#
+
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import wordle.feedback as feedback
+from wordle.feedback import compute_patterns, pattern_entropies, sampled_entropies
+from wordle.probability_functions import (
+    LetterPositionLikelihood,
+    LetterSetLikelihood,
+)
+from wordle.strategies import (
+    EntropyStrategy,
+    LookaheadStrategy,
+    SampledEntropyStrategy,
+    _LookaheadSearch,
+)
+from wordle.wordle import Wordle
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+
+def expected_guesses(patterns, candidates):
+    """Fewest expected guesses to find the goal word, by exhaustive search"""
+    if len(candidates) <= 2:
+        return 2 - 1 / len(candidates)
+    best = float("inf")
+    for guess in range(len(patterns)):
+        codes = patterns[guess, candidates]
+        if len(set(codes.tolist())) == 1 and codes[0] != 3**5 - 1:
+            continue
+        expected = 1
+        for code in set(codes.tolist()) - {3**5 - 1}:
+            bucket = candidates[codes == code]
+            expected += (
+                len(bucket) / len(candidates) * expected_guesses(patterns, bucket)
+            )
+        best = min(best, expected)
+    return best
+
+
+@pytest.mark.parametrize("prob_func", [None, LetterPositionLikelihood])
+def test_lookahead_matches_exhaustive_search(bank_file, monkeypatch, prob_func):
+    monkeypatch.setattr(LookaheadStrategy, "breadth", len(WORDS))
+    monkeypatch.setattr(LookaheadStrategy, "max_depth", len(WORDS))
+    monkeypatch.setattr(LookaheadStrategy, "time_budget", None)
+    monkeypatch.setattr(LookaheadStrategy, "_memo", OrderedDict())
+    bank = WordBank(bank_file, use_feedback_matrix=True)
+    patterns = np.asarray(bank.feedback_matrix.patterns)
+
+    guess = LookaheadStrategy.choose_next_word(bank, prob_func)
+    value, best = LookaheadStrategy._memo[next(reversed(LookaheadStrategy._memo))]
+    assert WORDS[best] == guess
+    assert value == pytest.approx(expected_guesses(patterns, bank.indices))
+
+    result = Wordle(prob_func, LookaheadStrategy, bank, 6, render=False).play()
+    assert result.solved
+
+
+def test_lookahead_memo_keyed_by_probability_function(bank_file, monkeypatch):
+    monkeypatch.setattr(LookaheadStrategy, "breadth", 2)
+    monkeypatch.setattr(LookaheadStrategy, "time_budget", None)
+    bank = WordBank(bank_file, use_feedback_matrix=True)
+    keys = {}
+    guesses = {}
+    for prob_func in (LetterSetLikelihood, LetterPositionLikelihood):
+        monkeypatch.setattr(LookaheadStrategy, "_memo", OrderedDict())
+        guesses[prob_func] = LookaheadStrategy.choose_next_word(bank, prob_func)
+        keys[prob_func] = set(LookaheadStrategy._memo)
+    assert not keys[LetterSetLikelihood] & keys[LetterPositionLikelihood]
+
+    # a memo filled with another function does not change the choice
+    LookaheadStrategy.choose_next_word(bank, LetterSetLikelihood)
+    guess = LookaheadStrategy.choose_next_word(bank, LetterPositionLikelihood)
+    assert guess == guesses[LetterPositionLikelihood]
+
+
+def test_lookahead_without_time(bank_file, monkeypatch):
+    monkeypatch.setattr(LookaheadStrategy, "time_budget", 0)
+    bank = WordBank(bank_file, use_feedback_matrix=True)
+    entropies = EntropyStrategy.guess_entropies(
+        bank.feedback_matrix.patterns, bank.indices, 5
+    )
+    guess = LookaheadStrategy.choose_next_word(bank, LetterPositionLikelihood)
+    assert entropies[WORDS.index(guess)] == entropies.max()
+
+
+def test_lookahead_builds_each_pool_once(bank_file, monkeypatch):
+    monkeypatch.setattr(LookaheadStrategy, "max_depth", 3)
+    monkeypatch.setattr(LookaheadStrategy, "_memo", OrderedDict())
+    built = []
+    build_pool = _LookaheadSearch._build_pool
+
+    def counting_build_pool(self, candidates):
+        built.append(candidates.tobytes())
+        return build_pool(self, candidates)
+
+    monkeypatch.setattr(_LookaheadSearch, "_build_pool", counting_build_pool)
+    bank = WordBank(bank_file, use_feedback_matrix=True)
+
+    monkeypatch.setattr(LookaheadStrategy, "time_budget", None)
+    LookaheadStrategy.choose_next_word(bank, LetterPositionLikelihood)
+    assert len(built) == len(set(built)) > 1
+
+    # the root pool is the only one built once the budget is spent
+    built.clear()
+    monkeypatch.setattr(LookaheadStrategy, "time_budget", 0)
+    LookaheadStrategy.choose_next_word(bank, LetterPositionLikelihood)
+    assert built == [bank.indices.tobytes()]
+
+
+@pytest.mark.parametrize("dense", [False, True])
+def test_sampled_entropies(monkeypatch, dense):
+    rng = np.random.default_rng(0)
+    letters = rng.integers(0, 6, size=(2000, 5), dtype=np.uint8)
+    codes = compute_patterns(letters[:300], letters)
+    if not dense:
+        monkeypatch.setattr(feedback, "MAX_DENSE_PATTERNS", 0)
+    exact = pattern_entropies(codes, 5)
+
+    estimates, margins = sampled_entropies(codes, 5, len(letters))
+    assert estimates == pytest.approx(exact) and not margins.any()
+
+    covered = []
+    for _ in range(5):
+        sample = rng.choice(len(letters), 400, replace=False)
+        estimates, margins = sampled_entropies(codes[:, sample], 5, len(letters))
+        covered.append(np.abs(estimates - exact) <= margins)
+    assert np.mean(covered) > 0.95
+
+
+def test_sampled_entropy_strategy(bank_file, monkeypatch):
+    bank = WordBank(bank_file, use_feedback_matrix=True)
+    expected = EntropyStrategy.choose_next_word(bank, None)
+    assert SampledEntropyStrategy.choose_next_word(bank, None) == expected
+
+    monkeypatch.setattr(SampledEntropyStrategy, "sample_size", 4)
+    monkeypatch.setattr(SampledEntropyStrategy, "eta", 2)
+    guess = SampledEntropyStrategy.choose_next_word(bank, None)
+    assert SampledEntropyStrategy.choose_next_word(bank, None) == guess
+    result = Wordle(None, SampledEntropyStrategy, bank, 6, render=False).play()
+    assert result.solved
@@ -0,0 +1,120 @@
+#
+# test_transposition.py
+#
+#
+
+import pytest
+
+from wordle.feedback import decode_pattern, score
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.strategies import EntropyStrategy, MaxLikelihoodStrategy, RandomAlternating
+from wordle.transposition import CachedStrategy, TranspositionTable
+from wordle.wordle import Wordle
+from wordle.words.word_bank import WordBank
+
+from conftest import WORDS
+
+
+@pytest.mark.parametrize("strategy", [MaxLikelihoodStrategy, EntropyStrategy])
+def test_cached_strategy_matches_strategy(bank_file, strategy):
+    bank = WordBank(bank_file, array_backed=True)
+    table = TranspositionTable()
+    cached = CachedStrategy(strategy, table)
+    for _ in range(2):
+        for goal_word in WORDS:
+            guesses = []
+            for game_strategy in (strategy, cached):
+                bank.reset_bank()
+                game = Wordle(
+                    LetterPositionLikelihood,
+                    game_strategy,
+                    bank,
+                    6,
+                    goal_word=goal_word,
+                    render=False,
+                )
+                guesses.append(game.play().guesses)
+            assert guesses[0] == guesses[1]
+    # the second round is answered from the table
+    assert table.hits >= table.misses > 0
+
+
+def test_random_strategy_not_cached(bank_file):
+    table = TranspositionTable()
+    cached = CachedStrategy(RandomAlternating, table)
+    cached.choose_next_word(WordBank(bank_file), LetterPositionLikelihood)
+    assert len(table) == 0 and table.misses == 0
+
+
+def test_least_recently_used_evicted():
+    table = TranspositionTable(max_entries=2)
+    table.put("a", "crane")
+    table.put("b", "react")
+    assert table.get("a") == "crane"
+    table.put("c", "trace")
+    assert len(table) == 2
+    assert table.get("b") is None
+    assert table.get("a") == "crane" and table.get("c") == "trace"
+    assert (table.hits, table.misses) == (3, 1)
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "table.json")
+    assert len(TranspositionTable.load(path)) == 0
+
+    table = TranspositionTable()
+    for key, word in [("a", "crane"), ("b", "react"), ("c", "trace")]:
+        table.put(key, word)
+    table.get("a")
+    table.get("d")
+    table.save(path)
+
+    loaded = TranspositionTable.load(path)
+    assert loaded.stats() == table.stats()
+    assert list(loaded._entries.items()) == list(table._entries.items())
+
+    # the least recently used entries are dropped when loading into less room
+    smaller = TranspositionTable.load(path, max_entries=2)
+    assert list(smaller._entries) == ["c", "a"]
+
+
+def test_update_merges_counters():
+    table = TranspositionTable()
+    table.put("a", "crane")
+    table.get("a")
+    other = TranspositionTable()
+    other.put("b", "react")
+    other.get("b")
+    other.get("c")
+
+    table.update(other)
+    assert table.get("b") == "react"
+    assert table.stats() == {
+        "entries": 2,
+        "hits": 3,
+        "misses": 1,
+        "hit_rate": 0.75,
+    }
+    table.reset_counters()
+    assert (table.hits, table.misses) == (0, 0)
+
+
+def test_state_digest_independent_of_bank_mode(bank_file):
+    banks = [
+        WordBank(bank_file),
+        WordBank(bank_file, array_backed=True),
+        WordBank(bank_file, use_bitsets=True),
+    ]
+    assert len({bank.state_digest() for bank in banks}) == 1
+    full_digest = banks[0].state_digest()
+
+    guess_state = decode_pattern("crane", score("crane", "trace"))
+    for bank in banks:
+        bank.filter_bank(guess_state)
+        bank.remove("trace")
+    assert len({bank.state_digest() for bank in banks}) == 1
+    assert banks[0].state_digest() != full_digest
+
+    for bank in banks:
+        bank.reset_bank()
+    assert {bank.state_digest() for bank in banks} == {full_digest}
@@ -0,0 +1,85 @@
+#
+# test_word_lengths.py
+#
+#
+
+from itertools import product
+
+import numpy as np
+import pytest
+
+import wordle.feedback as feedback
+from wordle.feedback import (
+    compute_patterns,
+    decode_pattern,
+    pattern_code,
+    pattern_dtype,
+    pattern_entropies,
+    to_letter_matrix,
+)
+from wordle.probability_functions import LetterPositionLikelihood
+from wordle.strategies import EntropyStrategy, MaxLikelihoodStrategy
+from wordle.wordle import Wordle
+from wordle.words.word_bank import WordBank
+
+# words of 3 to 12 letters with repeated letters
+LONG_WORDS = [
+    "eel",
+    "ewe",
+    "lee",
+    "bananas",
+    "savanna",
+    "nasalan",
+    "assessment",
+    "statesmans",
+    "mattresses",
+    "embarrassment",
+    "assassinates",
+    "masterstrokes",
+]
+
+
+def test_pattern_dtype():
+    assert pattern_dtype(3) == pattern_dtype(5) == np.uint8
+    assert pattern_dtype(6) == pattern_dtype(10) == np.uint16
+    assert pattern_dtype(11) == pattern_dtype(12) == np.uint32
+
+
+def test_long_word_patterns(tmp_path):
+    for num_letters in sorted({len(word) for word in LONG_WORDS}):
+        words = [word for word in LONG_WORDS if len(word) == num_letters]
+        letters = to_letter_matrix(words)
+        codes = compute_patterns(letters, letters)
+        assert codes.dtype == pattern_dtype(num_letters)
+
+        path = tmp_path / f"{num_letters}.txt"
+        path.write_text("".join(f"{word}\n" for word in words), encoding="utf-8")
+        game = Wordle(LetterPositionLikelihood, MaxLikelihoodStrategy, path, 6)
+        python_bank = WordBank(path)
+        array_bank = WordBank(path, array_backed=True)
+        for (i, guess), (j, goal) in product(enumerate(words), enumerate(words)):
+            game.goal_word = goal
+            guess_state = game.get_guess_state(guess)
+            assert codes[i, j] == pattern_code(guess_state)
+            python_bank.reset_bank()
+            array_bank.reset_bank()
+            python_bank.filter_bank(guess_state)
+            array_bank.filter_bank(guess_state)
+            assert python_bank.word_bank == array_bank.word_bank
+
+
+def test_patterns_computed_without_matrix(bank_file, monkeypatch):
+    matrix_bank = WordBank(bank_file, use_feedback_matrix=True)
+    expected = EntropyStrategy.choose_next_word(matrix_bank, None)
+    patterns = matrix_bank.feedback_matrix.patterns
+    dense = pattern_entropies(patterns, 5)
+
+    monkeypatch.setattr(feedback, "MAX_MATRIX_BYTES", 0)
+    monkeypatch.setattr(feedback, "MAX_DENSE_PATTERNS", 0)
+    assert pattern_entropies(patterns, 5) == pytest.approx(dense)
+
+    bank = WordBank(bank_file, use_feedback_matrix=True, use_bitsets=True)
+    assert bank.feedback_matrix is None and bank.partitions is None
+    assert EntropyStrategy.choose_next_word(bank, None) == expected
+    bank.filter_bank(decode_pattern("crane", patterns[9, 10]))
+    assert list(bank) == ["react"]
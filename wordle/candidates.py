@@ -0,0 +1,133 @@
+#
+# candidates.py
+#
+# bitset candidate sets and the (guess, pattern) partition index over a bank
+#
+
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+import numpy as np
+
+from wordle.feedback import FeedbackMatrix
+
+
+class CandidateSet:
+    """
+    Set of indices into an original word bank, packed as the bits of a Python int.
+    Bit i is set when word i of the original bank is in the set.
+    """
+
+    __slots__ = ("bits", "size")
+
+    def __init__(self, bits: int, size: int):
+        """
+        :param bits: the packed set
+        :param size: number of words in the original word bank
+        """
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def full(cls, size: int) -> "CandidateSet":
+        """Set containing every word of a bank of size words"""
+        return cls((1 << size) - 1, size)
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "CandidateSet":
+        """Set of the positions of a boolean mask over the original word bank"""
+        packed = np.packbits(mask, bitorder="little")
+        return cls(int.from_bytes(packed.tobytes(), "little"), len(mask))
+
+    @classmethod
+    def from_indices(cls, indices: Iterable[int], size: int) -> "CandidateSet":
+        """Set of the given indices into the original word bank"""
+        mask = np.zeros(size, dtype=bool)
+        mask[np.asarray(indices, dtype=np.int64)] = True
+        return cls.from_mask(mask)
+
+    def indices(self) -> np.ndarray:
+        """Sorted indices of the words in the set"""
+        packed = np.frombuffer(self.to_bytes(), np.uint8)
+        mask = np.unpackbits(packed, count=self.size, bitorder="little")
+        return np.flatnonzero(mask)
+
+    def to_bytes(self) -> bytes:
+        """The set packed as little endian bytes, one bit per word"""
+        return self.bits.to_bytes((self.size + 7) // 8, "little")
+
+    def discard(self, index: int) -> "CandidateSet":
+        """Set without the word at index"""
+        return CandidateSet(self.bits & ~(1 << index), self.size)
+
+    def __and__(self, other: "CandidateSet") -> "CandidateSet":
+        return CandidateSet(self.bits & other.bits, self.size)
+
+    def __sub__(self, other: "CandidateSet") -> "CandidateSet":
+        return CandidateSet(self.bits & ~other.bits, self.size)
+
+    def __contains__(self, index: int) -> bool:
+        return bool(self.bits >> index & 1)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, CandidateSet)
+            and self.bits == other.bits
+            and self.size == other.size
+        )
+
+    def __hash__(self):
+        return hash(self.bits)
+
+
+class PartitionIndex:
+    """
+    Maps each (guess, pattern) pair to the CandidateSet of answers that show the
+    pattern when guessed, so filtering a bank by a guess is a single AND.
+
+    Partitions come from the rows of a feedback matrix. Storing them for every
+    guess of a large bank takes gigabytes, so they are computed per guess on first
+    use and the most recently used max_guesses guesses are kept.
+    """
+
+    def __init__(self, feedback_matrix: FeedbackMatrix, max_guesses: int = 512):
+        self.feedback_matrix = feedback_matrix
+        self.max_guesses = max_guesses
+        self._partitions: Dict[int, Dict[int, CandidateSet]] = OrderedDict()
+
+    def partitions(self, guess: int) -> Dict[int, CandidateSet]:
+        """
+        :param guess: index of the guess in the original word bank
+        :return: mapping of every pattern the guess can show to its answers
+        """
+        if guess in self._partitions:
+            self._partitions.move_to_end(guess)
+            return self._partitions[guess]
+
+        row = np.asarray(self.feedback_matrix.patterns[guess])
+        partitions = {
+            int(code): CandidateSet.from_mask(row == code) for code in np.unique(row)
+        }
+        self._partitions[guess] = partitions
+        if len(self._partitions) > self.max_guesses:
+            self._partitions.popitem(last=False)
+        return partitions
+
+    def partition(self, guess: int, code: int) -> CandidateSet:
+        """
+        :param guess: index of the guess in the original word bank
+        :param code: the pattern code shown
+        :return: the answers consistent with the guess showing the pattern
+        """
+        partitions = self.partitions(guess)
+        if code in partitions:
+            return partitions[code]
+        return CandidateSet(0, len(self.feedback_matrix))
+
+    def precompute(self, guesses: Iterable[int]) -> None:
+        """Computes the partitions of the given guesses up front"""
+        for guess in guesses:
+            self.partitions(guess)
@@ -10,6 +10,10 @@ VOWELS = "aeiou"
 CONSONANTS = "bcdfghjklmnpqrstvwxyz"
 ALPHABET = "abcdefghijklmnopqrstuvwxyz"
 
+# Word lengths games can be played with
+MIN_WORD_LENGTH = 3
+MAX_WORD_LENGTH = 12
+
 
 class LetterState(Enum):
     GREY = 0
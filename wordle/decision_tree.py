@@ -0,0 +1,274 @@
+#
+# decision_tree.py
+#
+# precomputed solver decision trees (opening books) and their file format
+#
+
+import json
+import logging
+import multiprocessing
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from wordle.feedback import num_patterns, pattern_dtype, words_digest
+from wordle.probability_functions import ProbabilityFunction
+from wordle.shared_tables import SharedBank, SharedTables
+from wordle.strategies import Strategy
+from wordle.words.word_bank import WordBank
+
+# Subtree built by a worker: (guess index, {pattern code: subtree})
+Subtree = Tuple[int, Dict[int, "Subtree"]]
+
+# Per worker process state, set once by _init_worker
+_worker = {}
+
+
+class DecisionTree:
+    """
+    Every guess a deterministic strategy makes on a fixed word bank, keyed by the
+    feedback seen so far. Node 0 is the first guess, and the child of a node for a
+    pattern is the node of the next guess after seeing that pattern. Patterns that
+    solve the game or were past the tree's depth have no child.
+    """
+
+    ROOT = 0
+
+    def __init__(
+        self,
+        words: List[str],
+        node_guesses: np.ndarray,
+        edge_parents: np.ndarray,
+        edge_patterns: np.ndarray,
+        edge_children: np.ndarray,
+        metadata: Dict[str, str],
+    ):
+        self.words = words
+        self.node_guesses = node_guesses
+        self.edge_parents = edge_parents
+        self.edge_patterns = edge_patterns
+        self.edge_children = edge_children
+        self.metadata = metadata
+
+        self._width = num_patterns(len(words[0]))
+        keys = edge_parents.astype(np.int64) * self._width + edge_patterns
+        self._children = dict(zip(keys.tolist(), edge_children.tolist()))
+
+    @classmethod
+    def from_subtree(
+        cls, words: List[str], subtree: Subtree, metadata: Dict[str, str]
+    ) -> "DecisionTree":
+        """Numbers the nodes of a nested subtree breadth first"""
+        node_guesses = [subtree[0]]
+        edges = []
+        queue = deque([(cls.ROOT, subtree)])
+        while queue:
+            node, (_, children) = queue.popleft()
+            for pattern, child in sorted(children.items()):
+                child_node = len(node_guesses)
+                node_guesses.append(child[0])
+                edges.append((node, pattern, child_node))
+                queue.append((child_node, child))
+        edges = np.array(edges, dtype=np.int64).reshape(-1, 3)
+        return cls(
+            words,
+            np.array(node_guesses, dtype=np.int32),
+            edges[:, 0].astype(np.int32),
+            edges[:, 1].astype(pattern_dtype(len(words[0]))),
+            edges[:, 2].astype(np.int32),
+            metadata,
+        )
+
+    def guess(self, node: int) -> str:
+        """The word guessed at a node"""
+        return self.words[self.node_guesses[node]]
+
+    def child(self, node: int, pattern: int) -> Optional[int]:
+        """The node after seeing pattern at node, None when the tree has no branch"""
+        return self._children.get(node * self._width + pattern)
+
+    def __len__(self):
+        return len(self.node_guesses)
+
+    def save(self, path: str) -> None:
+        """Writes the tree as an uncompressed .npz file at exactly path, whatever
+        its suffix
+        """
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                node_guesses=self.node_guesses,
+                edge_parents=self.edge_parents,
+                edge_patterns=self.edge_patterns,
+                edge_children=self.edge_children,
+                metadata=np.array(json.dumps(self.metadata)),
+            )
+
+    @classmethod
+    def load(cls, path: str, words: List[str]) -> "DecisionTree":
+        """Reads a tree written by save.
+        :param path: path to the .npz file
+        :param words: the original word bank the tree was built on
+        :return: the decision tree
+        """
+        with np.load(path) as data:
+            metadata = json.loads(str(data["metadata"]))
+            if metadata["word_bank_digest"] != words_digest(words):
+                raise ValueError(f"{path} was built for a different word bank")
+            return cls(
+                words,
+                data["node_guesses"],
+                data["edge_parents"],
+                data["edge_patterns"],
+                data["edge_children"],
+                metadata,
+            )
+
+
+def _expand(
+    word_bank: WordBank,
+    prob_func: ProbabilityFunction,
+    strategy: Strategy,
+    depth: int,
+    max_depth: int,
+    solve_depths: Counter,
+) -> Subtree:
+    """Expands every feedback branch below the words left in the bank.
+    :param depth: number of the guess being made, the first guess is 1
+    :param solve_depths: counts of the number of guesses each answer took, 0 for
+    answers not solved within max_depth
+    """
+    matrix = word_bank.feedback_matrix
+    guess = matrix.index[strategy.choose_next_word(word_bank, prob_func)]
+    indices = word_bank.indices
+    codes = np.asarray(matrix.patterns[guess, indices])
+    solved = num_patterns(len(matrix.words[0])) - 1
+
+    children = {}
+    for code in np.unique(codes).tolist():
+        bucket = indices[codes == code]
+        if code == solved:
+            solve_depths[depth] += 1
+        elif depth == max_depth:
+            solve_depths[0] += len(bucket)
+        else:
+            word_bank.set_remaining(bucket)
+            children[code] = _expand(
+                word_bank, prob_func, strategy, depth + 1, max_depth, solve_depths
+            )
+    return guess, children
+
+
+def _init_worker(
+    prob_func: ProbabilityFunction,
+    strategy: Strategy,
+    shared_bank: SharedBank,
+    max_depth: int,
+) -> None:
+    """Loads the word bank once for every branch this worker expands, from the
+    tables the parent shared
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker["prob_func"] = prob_func
+    _worker["strategy"] = strategy
+    _worker["max_depth"] = max_depth
+    _worker["word_bank"] = WordBank(
+        shared_bank.file_path, use_feedback_matrix=True, shared=shared_bank
+    )
+
+
+def _expand_branch(branch: Tuple[int, np.ndarray]) -> Tuple[int, Subtree, Counter]:
+    """Expands the subtree below one pattern of the first guess in a worker"""
+    pattern, bucket = branch
+    word_bank = _worker["word_bank"]
+    word_bank.set_remaining(bucket)
+    solve_depths = Counter()
+    subtree = _expand(
+        word_bank,
+        _worker["prob_func"],
+        _worker["strategy"],
+        2,
+        _worker["max_depth"],
+        solve_depths,
+    )
+    return pattern, subtree, solve_depths
+
+
+def build_decision_tree(
+    prob_func: ProbabilityFunction,
+    strategy: Strategy,
+    word_bank_file_path: str,
+    max_depth: int,
+    processes: int = None,
+) -> Tuple[DecisionTree, Counter]:
+    """Builds the decision tree of a strategy by expanding every feedback branch.
+    The branches below the first guess are expanded in parallel. The strategy
+    must be deterministic for the tree to match the games it plays.
+    :param prob_func: the probability function to use
+    :param strategy: the strategy to use
+    :param word_bank_file_path: path to the word bank, every word is a goal word
+    :param max_depth: number of guesses to expand, usually the max tries of a game
+    :param processes: number of worker processes, defaults to the cpu count
+    :return: the tree, and the counts of the number of guesses each answer takes
+    (0 for answers not solved within max_depth)
+    """
+    word_bank = WordBank(word_bank_file_path, use_feedback_matrix=True)
+    matrix = word_bank.feedback_matrix
+    solved = num_patterns(len(word_bank[0])) - 1
+
+    first_guess = matrix.index[strategy.choose_next_word(word_bank, prob_func)]
+    codes = np.asarray(matrix.patterns[first_guess])
+    solve_depths = Counter()
+    branches = []
+    for code in np.unique(codes).tolist():
+        bucket = np.flatnonzero(codes == code)
+        if code == solved:
+            solve_depths[1] += 1
+        elif max_depth == 1:
+            solve_depths[0] += len(bucket)
+        else:
+            branches.append((code, bucket))
+    # Start the biggest branches first so the pool is not left waiting on one
+    branches.sort(key=lambda branch: -len(branch[1]))
+
+    processes = processes or multiprocessing.cpu_count()
+    logging.info(
+        "Building decision tree of %s with %s from %s: %d branches on %d processes",
+        strategy.__name__,
+        prob_func.__name__,
+        matrix.words[first_guess],
+        len(branches),
+        processes,
+    )
+
+    children = {}
+    with SharedTables() as tables, multiprocessing.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(prob_func, strategy, word_bank.share(tables), max_depth),
+    ) as pool:
+        for i, (code, subtree, depths) in enumerate(
+            pool.imap_unordered(_expand_branch, branches)
+        ):
+            children[code] = subtree
+            solve_depths.update(depths)
+            logging.info(
+                "Branch %d/%d done: max depth %d, %d answers solved, %d unsolved",
+                i + 1,
+                len(branches),
+                max(depths),
+                sum(depths.values()) - depths[0],
+                solve_depths[0],
+            )
+
+    metadata = {
+        "strategy": strategy.__name__,
+        "probability_function": prob_func.__name__,
+        "word_bank_digest": words_digest(word_bank.original_word_bank),
+        "max_depth": str(max_depth),
+    }
+    tree = DecisionTree.from_subtree(
+        word_bank.original_word_bank, (first_guess, children), metadata
+    )
+    return tree, solve_depths
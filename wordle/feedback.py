@@ -0,0 +1,517 @@
+#
+# feedback.py
+#
+# Pattern codes and the precomputed guess x answer feedback matrix
+#
+
+import hashlib
+import logging
+import os
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from wordle.constants import ALPHABET, LetterState
+
+# Number of guesses scored at once while building a feedback matrix. Bounds the
+# temporary (guesses x answers x letters) arrays to a few tens of megabytes.
+BUILD_CHUNK_SIZE = 256
+
+# Largest feedback matrix that is built, in bytes. Banks of long words need wider
+# cells, so past this their patterns are computed on the fly instead.
+MAX_MATRIX_BYTES = 1 << 30
+
+# Largest number of pattern codes whose histograms are counted densely with
+# bincount, past this the codes of each row are sorted and run lengths counted
+MAX_DENSE_PATTERNS = 3**8
+
+
+def to_letter_matrix(words: Sequence[str]) -> np.ndarray:
+    """Converts equal length words into a matrix of letter indices.
+    :param words: the words to convert, all of the same length
+    :return: a len(words) by word length uint8 matrix, where each entry is the
+    index of the letter in ALPHABET
+    """
+    if len(words) == 0:
+        return np.zeros((0, 0), dtype=np.uint8)
+    joined = "".join(words).encode("ascii")
+    letters = np.frombuffer(joined, dtype=np.uint8) - ord(ALPHABET[0])
+    return letters.reshape(len(words), -1)
+
+
+def from_letter_matrix(letters: np.ndarray) -> List[str]:
+    """Inverse of to_letter_matrix.
+    :param letters: N by L matrix of letter indices
+    :return: the N words of the matrix
+    """
+    if len(letters) == 0:
+        return []
+    chars = np.ascontiguousarray(letters + np.uint8(ord(ALPHABET[0])))
+    words = chars.view(f"S{letters.shape[1]}").ravel().tolist()
+    return [word.decode("ascii") for word in words]
+
+
+def words_digest(words: Sequence[str]) -> str:
+    """Calculates a content hash of a list of words. Used to tell whether cached
+    data computed from a word bank is still valid.
+    :param words: the words to hash
+    :return: the hex digest of the words
+    """
+    return hashlib.sha1("\n".join(words).encode("utf-8")).hexdigest()
+
+
+def num_patterns(num_letters: int) -> int:
+    """Number of distinct pattern codes for words of num_letters letters"""
+    return 3**num_letters
+
+
+def pattern_dtype(num_letters: int) -> np.dtype:
+    """Smallest unsigned integer type holding every pattern code of words of
+    num_letters letters: uint8 up to 5 letters, uint16 up to 10 and uint32 up to 20
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if num_patterns(num_letters) - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise ValueError(f"{num_letters} letter patterns do not fit in a uint32")
+
+
+def pattern_counts(codes: np.ndarray, num_letters: int) -> np.ndarray:
+    """Counts how often each pattern occurs in each row of a block of pattern codes,
+    using a single bincount over the whole block.
+    :param codes: G by N pattern codes, e.g. guesses by remaining answers
+    :param num_letters: number of letters in the words
+    :return: G by num_patterns(num_letters) matrix of counts
+    """
+    width = num_patterns(num_letters)
+    offsets = np.arange(len(codes), dtype=np.int64)[:, None] * width
+    counts = np.bincount((codes + offsets).ravel(), minlength=len(codes) * width)
+    return counts.reshape(len(codes), width)
+
+
+def bucket_sizes(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sizes of the buckets of equal pattern codes in each row of a block, counted
+    by sorting each row, so the number of patterns does not matter
+    :param codes: G by N pattern codes
+    :return: the row of every non empty bucket and its size, ordered by row
+    """
+    ordered = np.sort(codes, axis=1)
+    # every row starts a new run, so runs never span two rows
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    starts = np.flatnonzero(starts)
+    sizes = np.diff(np.append(starts, ordered.size))
+    return starts // codes.shape[1], sizes
+
+
+def pattern_entropies(codes: np.ndarray, num_letters: int) -> np.ndarray:
+    """Calculates the entropy of the patterns in each row of a block of pattern
+    codes, in bits, when every column is equally likely. Counts the patterns with
+    pattern_counts when there are enough columns to fill the histograms, and by
+    sorting each row when there are few columns, or so many patterns, as for long
+    words, that the histograms would be too large.
+    :param codes: G by N pattern codes, e.g. guesses by remaining answers
+    :param num_letters: number of letters in the words
+    :return: the entropy of each row
+    """
+    num_rows, num_columns = codes.shape
+    width = num_patterns(num_letters)
+    if width <= MAX_DENSE_PATTERNS and 2 * num_columns >= width:
+        counts = pattern_counts(codes, num_letters)
+        # H = log2(n) - sum(c * log2(c)) / n over the non empty buckets
+        weighted = (counts * np.log2(np.maximum(counts, 1))).sum(axis=1)
+    else:
+        rows, sizes = bucket_sizes(codes)
+        weighted = np.bincount(rows, weights=sizes * np.log2(sizes), minlength=num_rows)
+    return np.log2(num_columns) - weighted / num_columns
+
+
+def sampled_entropies(
+    codes: np.ndarray, num_letters: int, population: int, z: float = 2.576
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Estimates the entropy of the patterns in each row over a population of
+    answers, from the patterns of a uniform sample of them drawn without
+    replacement. The estimate is the mean surprisal -log2(p) of the sampled
+    patterns, with p their frequency in the sample, plus the Miller-Madow
+    correction of its bias, (K - 1) / (2 m ln 2) for K patterns seen in m samples.
+    The correction is only approximate when many patterns are rare, so it is added
+    to the margin of the confidence interval as well as to the estimate. Patterns
+    are counted like in pattern_entropies.
+    :param codes: G by m pattern codes against the sampled answers
+    :param num_letters: number of letters in the words
+    :param population: number of answers the sample was drawn from
+    :param z: z score of the confidence intervals, 2.576 for 99%
+    :return: the estimated entropy of each row, in bits, and the margin of its
+    confidence interval. Estimates are exact, with no margin, when the sample is
+    the whole population
+    """
+    num_rows, num_samples = codes.shape
+    width = num_patterns(num_letters)
+    # sum over the buckets of c * s and c * s**2 for the surprisal s of size c
+    sizes = np.arange(num_samples + 1)
+    surprisal = np.log2(num_samples / np.maximum(sizes, 1))
+    if width <= MAX_DENSE_PATTERNS and 2 * num_samples >= width:
+        counts = pattern_counts(codes, num_letters)
+        mean = (sizes * surprisal)[counts].sum(axis=1)
+        square = (sizes * surprisal**2)[counts].sum(axis=1)
+        buckets = np.count_nonzero(counts, axis=1)
+    else:
+        rows, counts = bucket_sizes(codes)
+        mean = np.bincount(
+            rows, weights=(sizes * surprisal)[counts], minlength=num_rows
+        )
+        square = np.bincount(
+            rows, weights=(sizes * surprisal**2)[counts], minlength=num_rows
+        )
+        buckets = np.bincount(rows, minlength=num_rows)
+    mean /= num_samples
+    if num_samples >= population:
+        return mean, np.zeros(num_rows)
+
+    variance = np.maximum(square / num_samples - mean**2, 0)
+    # finite population correction
+    variance *= (population - num_samples) / (population - 1)
+    correction = (buckets - 1) / (2 * num_samples * np.log(2))
+    margins = z * np.sqrt(variance / num_samples) + correction
+    return mean + correction, margins
+
+
+def pattern_code(guess_state: Union["Feedback", List[Tuple[str, LetterState]]]) -> int:
+    """Encodes a guess state as a base 3 integer, where the digit of each position
+    is the value of its LetterState. The first letter is the least significant digit.
+    :param guess_state: a Feedback, or list of (letter, state) tuples
+    :return: the pattern code of the guess state
+    """
+    if isinstance(guess_state, Feedback):
+        return guess_state.code
+    code = 0
+    for _, state in reversed(guess_state):
+        code = code * 3 + state.value
+    return code
+
+
+def decode_pattern(guess: str, code: int) -> "Feedback":
+    """Inverse of pattern_code.
+    :param guess: the guessed word
+    :param code: the pattern code of the guess
+    :return: the Feedback of the guess, which iterates as (letter, state) tuples
+    """
+    return Feedback(guess, code)
+
+
+def score(guess: str, answer: str) -> int:
+    """Pattern code shown when guessing guess and the goal word is answer, with
+    the rules of compute_patterns. Pure Python for scoring single pairs, it only
+    compares letters of the two strings and allocates nothing per letter.
+    :param guess: the guessed word
+    :param answer: the goal word
+    :return: the pattern code
+    """
+    length = len(guess)
+    code = 0
+    place = 1
+    for i in range(length):
+        letter = guess[i]
+        if letter == answer[i]:
+            code += 2 * place
+        elif letter in answer:
+            # copies of the letter in the answer that are not matched by a green,
+            # less those taken by yellows to the left
+            spare = 0
+            for j in range(length):
+                if answer[j] == letter and guess[j] != letter:
+                    spare += 1
+            for j in range(i):
+                if guess[j] == letter and answer[j] != letter:
+                    spare -= 1
+            if spare > 0:
+                code += place
+        place *= 3
+    return code
+
+
+class Feedback:
+    """
+    The colors a guess was given, held as the guess and its pattern code. Iterates
+    as the (letter, LetterState) tuples of the older guess state lists, and compares
+    equal to them, so it can be used wherever they were and converted back with
+    to_states for display.
+    """
+
+    __slots__ = ("guess", "code", "_rules")
+
+    def __init__(self, guess: str, code: int):
+        """
+        :param guess: the guessed word
+        :param code: the pattern code of its colors, see pattern_code
+        """
+        self.guess = guess
+        self.code = code
+        self._rules = None
+
+    @classmethod
+    def from_states(
+        cls, guess_state: Union["Feedback", List[Tuple[str, LetterState]]]
+    ) -> "Feedback":
+        """The Feedback of a list of (letter, state) tuples, or the Feedback itself"""
+        if isinstance(guess_state, Feedback):
+            return guess_state
+        guess = "".join(letter for letter, _ in guess_state)
+        return cls(guess, pattern_code(guess_state))
+
+    def to_states(self) -> List[Tuple[str, LetterState]]:
+        """The feedback as a list of (letter, state) tuples"""
+        return list(self)
+
+    def digits(self) -> List[int]:
+        """The LetterState value of every letter"""
+        code = self.code
+        digits = []
+        for _ in self.guess:
+            code, digit = divmod(code, 3)
+            digits.append(digit)
+        return digits
+
+    def matches(self, word: str) -> bool:
+        """Whether word could be the goal word given this feedback. Applies the
+        rules of WordBank.is_possible_word, where greens must match, and yellow and
+        grey letters must not be in their own position, with the copies of each
+        letter outside green positions counted once per guess instead of consumed
+        per word: at least one per yellow, and exactly one per yellow when the
+        letter was also grey.
+        :param word: the word to check
+        """
+        if self._rules is None:
+            self._rules = self._build_rules()
+        greens, misses, counts = self._rules
+        for i, letter in greens:
+            if word[i] != letter:
+                return False
+        for i, letter in misses:
+            if word[i] == letter:
+                return False
+        for letter, green, yellow, exact in counts:
+            spare = word.count(letter) - green
+            if spare < yellow or (exact and spare > yellow):
+                return False
+        return True
+
+    def _build_rules(self) -> Tuple[tuple, tuple, tuple]:
+        """Positions of the green letters, positions of the other letters, and
+        (letter, greens, yellows, also grey) of every yellow or grey letter
+        """
+        greens, misses = [], []
+        green_counts: Dict[str, int] = {}
+        yellow_counts: Dict[str, int] = {}
+        grey = set()
+        for i, (letter, digit) in enumerate(zip(self.guess, self.digits())):
+            if digit == LetterState.GREEN.value:
+                greens.append((i, letter))
+                green_counts[letter] = green_counts.get(letter, 0) + 1
+            else:
+                misses.append((i, letter))
+                if digit == LetterState.YELLOW.value:
+                    yellow_counts[letter] = yellow_counts.get(letter, 0) + 1
+                else:
+                    grey.add(letter)
+        counts = tuple(
+            (
+                letter,
+                green_counts.get(letter, 0),
+                yellow_counts.get(letter, 0),
+                letter in grey,
+            )
+            for letter in sorted(grey | set(yellow_counts))
+        )
+        return tuple(greens), tuple(misses), counts
+
+    def __iter__(self):
+        for letter, digit in zip(self.guess, self.digits()):
+            yield letter, LetterState(digit)
+
+    def __len__(self):
+        return len(self.guess)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_states()[index]
+        letter = self.guess[index]
+        return letter, LetterState(self.code // 3 ** (index % len(self.guess)) % 3)
+
+    def __eq__(self, other):
+        if isinstance(other, Feedback):
+            return self.guess == other.guess and self.code == other.code
+        if isinstance(other, (list, tuple)):
+            return self.to_states() == list(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.guess, self.code))
+
+    def __repr__(self):
+        return f"Feedback({self.guess!r}, {self.code})"
+
+
+# A guess state: a Feedback, or the (letter, LetterState) tuples of every letter
+GuessState = Union[Feedback, List[Tuple[str, LetterState]]]
+
+
+def compute_patterns(guesses: np.ndarray, answers: np.ndarray) -> np.ndarray:
+    """Calculates the pattern code of every (guess, answer) pair. Follows the same
+    rules as Wordle.get_guess_state: greens are matched first, then repeated letters
+    are marked yellow from left to right while unmatched copies remain in the answer.
+    :param guesses: G by L letter matrix of guesses
+    :param answers: N by L letter matrix of answers
+    :return: G by N matrix of pattern codes, of pattern_dtype
+    """
+    num_letters = guesses.shape[1]
+    green = guesses[:, None, :] == answers[None, :, :]
+
+    # number of times each letter occurs in each answer
+    letter_counts = np.zeros((len(answers), len(ALPHABET)), dtype=np.int8)
+    for k in range(num_letters):
+        np.add.at(letter_counts, (np.arange(len(answers)), answers[:, k]), 1)
+
+    dtype = pattern_dtype(num_letters)
+    codes = np.zeros((len(guesses), len(answers)), dtype=dtype)
+    for i in range(num_letters):
+        # copies of the letter left in the answer once greens are matched
+        available = letter_counts[:, guesses[:, i]].T
+        # copies of the letter earlier in the guess that were not green
+        # consume the available copies first
+        earlier = np.zeros_like(available)
+        for j in range(num_letters):
+            same = (guesses[:, j] == guesses[:, i])[:, None]
+            available = available - (green[:, :, j] & same)
+            if j < i:
+                earlier = earlier + (~green[:, :, j] & same)
+        yellow = ~green[:, :, i] & (earlier < available)
+        codes += (2 * green[:, :, i] + yellow).astype(dtype) * dtype.type(3**i)
+
+    return codes
+
+
+class ComputedPatterns:
+    """
+    Stands in for the patterns of a FeedbackMatrix that is too large to store, as
+    for banks of long words. Blocks of patterns are computed from the letter
+    matrix when they are read, so memory is bounded by the block.
+    """
+
+    def __init__(self, letter_matrix: np.ndarray):
+        self.letter_matrix = letter_matrix
+        self.shape = (len(letter_matrix), len(letter_matrix))
+
+    def take(
+        self, guesses: Union[slice, np.ndarray], answers: np.ndarray
+    ) -> np.ndarray:
+        """
+        :param guesses: the rows, i.e. guesses, of the block, as a slice or indices
+        :param answers: indices of the columns, i.e. answers, of the block
+        :return: the block of pattern codes
+        """
+        return compute_patterns(
+            self.letter_matrix[guesses], self.letter_matrix[answers]
+        )
+
+    def __len__(self):
+        return len(self.letter_matrix)
+
+
+class FeedbackMatrix:
+    """
+    Pattern code of every (guess, answer) pair in a word bank. Row i, column j holds
+    the pattern the player sees after guessing word i when word j is the goal word.
+    Cells are the pattern_dtype of the word length.
+    """
+
+    def __init__(self, words: Sequence[str], patterns: np.ndarray):
+        self.words = words
+        self.patterns = patterns
+        self.index: Dict[str, int] = {word: i for i, word in enumerate(words)}
+
+    @staticmethod
+    def cache_path(words: Sequence[str], bank_path: str) -> str:
+        """Path of the cached matrix of a word bank. The file lives next to the
+        bank and is keyed by a hash of its words so edits to the bank are noticed.
+        :param words: the words of the bank
+        :param bank_path: path to the word bank file
+        :return: path to the .npy file
+        """
+        stem = os.path.splitext(str(bank_path))[0]
+        return f"{stem}.feedback.{words_digest(words)[:12]}.npy"
+
+    @staticmethod
+    def fits(num_words: int, num_letters: int) -> bool:
+        """Whether the matrix of a bank is within MAX_MATRIX_BYTES
+        :param num_words: number of words in the bank
+        :param num_letters: number of letters in the words
+        """
+        itemsize = pattern_dtype(num_letters).itemsize
+        return num_words * num_words * itemsize <= MAX_MATRIX_BYTES
+
+    @classmethod
+    def build(cls, words: Sequence[str], path: str = None) -> "FeedbackMatrix":
+        """Computes the feedback matrix of a list of words.
+        :param words: the words of the bank
+        :param path: if given, the matrix is written to this .npy file
+        :return: the feedback matrix
+        """
+        letters = to_letter_matrix(words)
+        if not cls.fits(len(words), letters.shape[1]):
+            raise ValueError(
+                f"the feedback matrix of {len(words)} {letters.shape[1]} letter "
+                f"words is over {MAX_MATRIX_BYTES} bytes"
+            )
+
+        shape = (len(words), len(words))
+        dtype = pattern_dtype(letters.shape[1])
+        if path is None:
+            patterns = np.empty(shape, dtype=dtype)
+        else:
+            # Write to a temporary file first so an interrupted build does not
+            # leave a truncated matrix behind, one per process so processes
+            # building the same matrix do not write over each other
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            patterns = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=dtype, shape=shape
+            )
+
+        for start in range(0, len(words), BUILD_CHUNK_SIZE):
+            stop = start + BUILD_CHUNK_SIZE
+            patterns[start:stop] = compute_patterns(letters[start:stop], letters)
+
+        if path is not None:
+            patterns.flush()
+            del patterns
+            os.replace(tmp_path, path)
+            patterns = np.load(path, mmap_mode="r")
+
+        return cls(words, patterns)
+
+    @classmethod
+    def load_or_build(cls, words: Sequence[str], bank_path: str) -> "FeedbackMatrix":
+        """Memory maps the cached matrix of a word bank, building it first if the
+        cache does not exist yet.
+        :param words: the words of the bank
+        :param bank_path: path to the word bank file
+        :return: the feedback matrix
+        """
+        path = cls.cache_path(words, bank_path)
+        if os.path.exists(path):
+            patterns = np.load(path, mmap_mode="r")
+            if patterns.shape == (len(words), len(words)):
+                logging.debug("Loaded feedback matrix from %s", path)
+                return cls(words, patterns)
+
+        logging.info("Building feedback matrix for %d words", len(words))
+        return cls.build(words, path)
+
+    def pattern(self, guess: str, answer: str) -> int:
+        """Pattern code shown when guessing guess and the goal word is answer"""
+        return int(self.patterns[self.index[guess], self.index[answer]])
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.index
+
+    def __len__(self):
+        return len(self.words)
@@ -2,8 +2,8 @@
 # helpers.py
 #
 
-from colorama import Fore
-from typing import Dict
+from colorama import Fore, init
+from typing import Dict, Union
 import pathlib
 
 from .constants import LetterState
@@ -23,12 +23,25 @@ def find_available_word_banks() -> Dict[str, str]:
     return available_word_banks
 
 
-def state_to_color(letter_state: LetterState):
-    """Converts letter state to its respective color"""
-    match letter_state:
-        case LetterState.GREEN:
-            return Fore.GREEN
-        case LetterState.YELLOW:
-            return Fore.YELLOW
-        case _:
-            return Fore.WHITE
+_terminal_initialized = False
+
+
+def init_terminal() -> None:
+    """Initializes colorama, once, before the first colored output"""
+    global _terminal_initialized
+    if not _terminal_initialized:
+        init()
+        _terminal_initialized = True
+
+
+# Color of each LetterState, by value
+_STATE_COLORS = (Fore.WHITE, Fore.YELLOW, Fore.GREEN)
+
+
+def state_to_color(letter_state: Union[LetterState, int]):
+    """Converts letter state, or its value as in the digits of a Feedback, to its
+    respective color
+    """
+    if isinstance(letter_state, LetterState):
+        letter_state = letter_state.value
+    return _STATE_COLORS[letter_state]
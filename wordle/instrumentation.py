@@ -0,0 +1,92 @@
+#
+# instrumentation.py
+#
+# per turn timing records of games and the sinks they are written to
+#
+
+import json
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+# Timed phases of a turn, the keys of a turn record holding seconds
+PHASES = ("strategy_time", "mapping_time", "filter_time")
+
+# A turn record: goal_word, turn, guess, candidates_before, candidates_after and
+# the seconds spent in each of PHASES
+TurnRecord = Dict[str, object]
+
+
+class TraceSink:
+    """
+    Receives a record of every turn of the games it is attached to. Sinks that are
+    not enabled are never timed against, so attaching one costs nothing.
+    """
+
+    enabled = True
+
+    def record(self, turn: TurnRecord) -> None:
+        """Handles the record of one turn"""
+
+    def close(self) -> None:
+        """Flushes anything the sink holds"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NullSink(TraceSink):
+    """Sink that turns instrumentation off"""
+
+    enabled = False
+
+
+class MemorySink(TraceSink):
+    """Sink that keeps every record in a list"""
+
+    def __init__(self):
+        self.records: List[TurnRecord] = []
+
+    def record(self, turn: TurnRecord) -> None:
+        self.records.append(turn)
+
+
+class JsonLinesSink(TraceSink):
+    """Sink that writes every record as a line of JSON"""
+
+    def __init__(self, path: str, mode: str = "w"):
+        """
+        :param path: file to write to
+        :param mode: "w" to overwrite the file, "a" to append to it
+        """
+        self._file = open(path, mode, encoding="utf-8")
+
+    def record(self, turn: TurnRecord) -> None:
+        self._file.write(json.dumps(turn) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def phase_percentiles(
+    records: Iterable[TurnRecord], percentiles: Sequence[float] = (50, 90, 99)
+) -> Dict[str, Dict[str, float]]:
+    """Latency percentiles of each phase over many turns.
+    :param records: turn records, e.g. from a MemorySink
+    :param percentiles: which percentiles to calculate
+    :return: maps each of PHASES to {"p50": seconds, ..., "max": seconds}, empty
+    when there are no records
+    """
+    records = list(records)
+    if not records:
+        return {}
+    stats = {}
+    for phase in PHASES:
+        times = np.array([turn[phase] for turn in records], dtype=np.float64)
+        values = np.percentile(times, percentiles)
+        stats[phase] = {f"p{p:g}": float(v) for p, v in zip(percentiles, values)}
+        stats[phase]["max"] = float(times.max())
+    return stats
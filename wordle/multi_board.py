@@ -0,0 +1,341 @@
+#
+# multi_board.py
+#
+# multi board games (Quordle, Octordle) where every guess is played on K boards
+#
+
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from wordle.feedback import (
+    MAX_DENSE_PATTERNS,
+    ComputedPatterns,
+    compute_patterns,
+    decode_pattern,
+    num_patterns,
+    pattern_entropies,
+    to_letter_matrix,
+)
+from wordle.probability_functions import ProbabilityFunction
+from wordle.simulation import SimulationReport
+from wordle.strategies import EntropyStrategy, Strategy, best_guess
+from wordle.wordle import _no_log
+from wordle.words.word_bank import WordBank
+
+
+class MultiBoardStrategy(ABC):
+    """base class of strategies that choose one guess for several boards"""
+
+    deterministic = True
+
+    @abstractmethod
+    def choose_next_word(
+        self, boards: List[WordBank], prob_func: ProbabilityFunction
+    ) -> str:
+        """
+        Given the boards that are not solved yet choose the next word to use
+        :param boards: word bank of every unsolved board
+        :param prob_func: the probability function to use
+        :return: the next word to use
+        """
+
+    def __str__(self):
+        return self.__class__.__name__
+
+
+class FewestCandidatesStrategy(MultiBoardStrategy):
+    """
+    Plays a single board strategy on the board with the fewest words left, so any
+    strategy can be run on multi board games
+    """
+
+    def __init__(self, strategy: Strategy):
+        self.strategy = strategy
+        self.deterministic = strategy.deterministic
+
+    def choose_next_word(
+        self, boards: List[WordBank], prob_func: ProbabilityFunction
+    ) -> str:
+        board = min(boards, key=len)
+        return self.strategy.choose_next_word(board, prob_func)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({self.strategy.__name__})"
+
+
+class MultiEntropyStrategy(MultiBoardStrategy):
+    """
+    Strategy that chooses the guess with the most expected information summed over
+    the boards. The pattern histograms of a chunk of guesses against every board
+    are counted with one bincount over the shared feedback matrix, and boards with
+    the same words left are only counted once.
+    """
+
+    # Upper bound on the number of pattern codes gathered per chunk of guesses
+    chunk_cells = 1 << 22
+
+    def choose_next_word(
+        self, boards: List[WordBank], prob_func: ProbabilityFunction
+    ) -> str:
+        """
+        Guesses the last word of any board that is down to one, and otherwise the
+        word that maximizes the summed entropy. Ties go to words that could still
+        be the goal word of a board. The probability function is not used.
+        :param boards: word bank of every unsolved board
+        :param prob_func: the probability function to use
+        :return: the next word to use
+        """
+        for board in boards:
+            if len(board) == 1:
+                return board[0]
+
+        groups: Dict[bytes, List] = {}
+        for board in boards:
+            # boards are grouped and scored by the indices of their words
+            board.load_letter_matrix()
+            key = board.indices.tobytes()
+            groups.setdefault(key, [board.indices, 0])[1] += 1
+        candidates = [indices for indices, _ in groups.values()]
+        weights = np.array([count for _, count in groups.values()], dtype=np.float64)
+
+        base = boards[0]
+        entropies = self.board_entropies(
+            base.pattern_source(), candidates, base.letter_matrix.shape[1]
+        )
+        scores = entropies @ weights
+        index = best_guess(scores, np.concatenate(candidates))
+        return base.original_word_bank[index]
+
+    @classmethod
+    def board_entropies(
+        cls,
+        patterns: Union[np.ndarray, ComputedPatterns],
+        candidates: Sequence[np.ndarray],
+        num_letters: int,
+    ) -> np.ndarray:
+        """
+        Calculates the entropy of the feedback pattern of every guess on every
+        board, in bits, when each board's goal word is uniformly chosen from its
+        candidates
+        :param patterns: guess by answer matrix of pattern codes, or the
+        ComputedPatterns of banks without one
+        :param candidates: indices of the answers that could be the goal word of
+        each board
+        :param num_letters: number of letters in the words
+        :return: guess by board matrix of entropies
+        """
+        width = num_patterns(num_letters)
+        sizes = np.array([len(indices) for indices in candidates])
+        answers = np.concatenate(candidates)
+        bins = len(candidates) * width
+        dense = width <= MAX_DENSE_PATTERNS
+        # bounds both the gathered codes and the histograms of a chunk
+        chunk_size = max(1, cls.chunk_cells // max(len(answers), bins if dense else 1))
+        if dense:
+            # bin of each pattern code: every row of the chunk gets its own bins,
+            # and within a row each board gets width of them
+            offsets = np.repeat(np.arange(len(candidates)) * width, sizes)[None, :]
+            offsets = offsets + np.arange(chunk_size)[:, None] * bins
+            offsets = offsets.astype(np.int32)
+            # c * log2(c) of every bucket size c
+            counts_range = np.arange(sizes.max() + 1)
+            c_log_c = counts_range * np.log2(np.maximum(counts_range, 1))
+        bounds = np.cumsum(sizes)[:-1]
+
+        entropies = np.empty((len(patterns), len(candidates)))
+        for start in range(0, len(patterns), chunk_size):
+            if isinstance(patterns, ComputedPatterns):
+                codes = patterns.take(slice(start, start + chunk_size), answers)
+            else:
+                codes = np.take(patterns[start : start + chunk_size], answers, axis=1)
+            chunk = entropies[start : start + len(codes)]
+            if dense:
+                codes = codes + offsets[: len(codes)]
+                counts = np.bincount(codes.ravel(), minlength=len(codes) * bins)
+                counts = counts.reshape(len(codes), len(candidates), width)
+                # H = log2(n) - sum(c * log2(c)) / n over the non empty buckets
+                weighted = c_log_c[counts].sum(axis=2)
+                chunk[:] = np.log2(sizes) - weighted / sizes
+            else:
+                for k, board_codes in enumerate(np.split(codes, bounds, axis=1)):
+                    chunk[:, k] = pattern_entropies(board_codes, num_letters)
+        return entropies
+
+
+def for_boards(strategy: Union[Strategy, MultiBoardStrategy]) -> MultiBoardStrategy:
+    """The multi board version of a strategy"""
+    if isinstance(strategy, MultiBoardStrategy):
+        return strategy
+    if strategy is EntropyStrategy or isinstance(strategy, EntropyStrategy):
+        return MultiEntropyStrategy()
+    return FewestCandidatesStrategy(strategy)
+
+
+class MultiGameResult:
+    """Outcome of a multi board game"""
+
+    def __init__(
+        self,
+        goal_words: List[str],
+        guesses: List[str],
+        patterns: List[List[Optional[int]]],
+        solved_at: List[Optional[int]],
+    ):
+        """
+        :param goal_words: the goal word of each board
+        :param guesses: the words guessed, in order
+        :param patterns: for every guess, the pattern code shown on each board, or
+        None for boards that were already solved
+        :param solved_at: the guess number each board was solved on, or None
+        """
+        self.goal_words = goal_words
+        self.guesses = guesses
+        self.patterns = patterns
+        self.solved_at = solved_at
+
+    @property
+    def solved(self) -> bool:
+        return all(turn is not None for turn in self.solved_at)
+
+    @property
+    def tries(self) -> int:
+        return len(self.guesses)
+
+    def __repr__(self):
+        return (
+            f"MultiGameResult(goal_words={self.goal_words}, guesses={self.guesses}, "
+            f"solved_at={self.solved_at}, solved={self.solved}, tries={self.tries})"
+        )
+
+
+class MultiWordle:
+    """
+    Game loop of multi board Wordle, where every guess is played on num_boards
+    boards with different goal words, and the game is won once every board is.
+
+    Each board follows its goal word with a fork of one WordBank, so the boards
+    share the word list, letter matrix, feedback matrix and partitions.
+    """
+
+    def __init__(
+        self,
+        prob_func: ProbabilityFunction,
+        strategy: Union[Strategy, MultiBoardStrategy],
+        word_bank_file_path: Union[str, WordBank],
+        num_boards: int,
+        max_tries: int,
+        use_feedback_matrix=True,
+        array_backed=True,
+        use_bitsets=False,
+        goal_words: Sequence[str] = None,
+        render=True,
+    ):
+        self.prob_func = prob_func
+        self.strategy = for_boards(strategy)
+        if isinstance(word_bank_file_path, WordBank):
+            base = word_bank_file_path
+        else:
+            base = WordBank(
+                word_bank_file_path, use_feedback_matrix, array_backed, use_bitsets
+            )
+        self.boards = [base] + [base.fork() for _ in range(num_boards - 1)]
+        self.max_tries = max_tries
+        self.render = render
+        self.goal_words = list(
+            goal_words or random.sample(base.original_word_bank, num_boards)
+        )
+        if len(self.goal_words) != num_boards:
+            raise ValueError(f"{num_boards} boards need {num_boards} goal words")
+
+    def play(self) -> MultiGameResult:
+        """Run the game loop
+        :return: the outcome of the game
+        """
+        log = logging.info if self.render else _no_log
+        log("Starting %d board game", len(self.boards))
+
+        goal_letters = to_letter_matrix(self.goal_words)
+        solved_code = num_patterns(goal_letters.shape[1]) - 1
+        solved_at: List[Optional[int]] = [None] * len(self.boards)
+        guesses = []
+        patterns = []
+        while len(guesses) < self.max_tries and None in solved_at:
+            unsolved = [k for k, turn in enumerate(solved_at) if turn is None]
+            guess = self.strategy.choose_next_word(
+                [self.boards[k] for k in unsolved], self.prob_func
+            )
+            guesses.append(guess)
+            # patterns of the guess on every board in one pass
+            codes = compute_patterns(to_letter_matrix([guess]), goal_letters)[0]
+            turn_patterns: List[Optional[int]] = [None] * len(self.boards)
+            for k in unsolved:
+                code = int(codes[k])
+                turn_patterns[k] = code
+                if code == solved_code:
+                    solved_at[k] = len(guesses)
+                else:
+                    self.boards[k].filter_bank(decode_pattern(guess, code))
+            patterns.append(turn_patterns)
+            log(
+                "Guess %d: %s, boards left: %d",
+                len(guesses),
+                guess,
+                solved_at.count(None),
+            )
+
+        return MultiGameResult(self.goal_words, guesses, patterns, solved_at)
+
+
+def simulate_boards(
+    prob_func: ProbabilityFunction,
+    strategy: Union[Strategy, MultiBoardStrategy],
+    word_bank_file_path: str,
+    num_boards: int,
+    max_tries: int,
+    games: int = 100,
+    seed: int = None,
+    **bank_options,
+) -> SimulationReport:
+    """Plays seeded random multi board games, all on forks of one word bank so its
+    tables are loaded once.
+    :param prob_func: the probability function to use
+    :param strategy: the strategy to use
+    :param word_bank_file_path: path to the word bank, goal words are drawn from it
+    :param num_boards: number of boards of every game
+    :param max_tries: how many guesses each game has
+    :param games: number of games to play
+    :param seed: seed for choosing the goal words
+    :param bank_options: keyword arguments for the WordBank
+    :return: report of the games played, with the goal words of each game joined
+    by commas
+    """
+    word_bank = WordBank(word_bank_file_path, **bank_options)
+    rng = random.Random(seed)
+    logging.info(
+        "Simulating %d games of %d boards with %s",
+        games,
+        num_boards,
+        for_boards(strategy),
+    )
+
+    results = []
+    start = time.perf_counter()
+    for _ in range(games):
+        word_bank.reset_bank()
+        game = MultiWordle(
+            prob_func,
+            strategy,
+            word_bank,
+            num_boards,
+            max_tries,
+            goal_words=rng.sample(word_bank.original_word_bank, num_boards),
+            render=False,
+        )
+        result = game.play()
+        results.append((",".join(result.goal_words), result.solved, result.tries))
+    return SimulationReport(results, time.perf_counter() - start)
@@ -1,11 +1,20 @@
 from abc import abstractmethod, ABC
-from typing import List, Dict
+from typing import List, Sequence, Union
 
 from .constants import ALPHABET, CONSONANTS, VOWELS
+from .feedback import to_letter_matrix
+from .words.bank_statistics import letter_counts, position_counts
 from .words.word_bank import WordBank
 
 import numpy as np
 
+# Position of each letter in ALPHABET
+LETTER_INDEX = {letter: i for i, letter in enumerate(ALPHABET)}
+
+# Masks over ALPHABET of the vowels and the consonants
+VOWEL_MASK = np.array([letter in VOWELS for letter in ALPHABET])
+CONSONANT_MASK = np.array([letter in CONSONANTS for letter in ALPHABET])
+
 
 class ProbabilityFunction(ABC):
     """base class of probability function"""
@@ -13,6 +22,35 @@ class ProbabilityFunction(ABC):
     def __init__(self, word_bank: WordBank):
         self._word_bank = word_bank
 
+    @classmethod
+    def for_word_bank(cls, word_bank: WordBank) -> "ProbabilityFunction":
+        """Returns the instance of this probability function that follows the word
+        bank, creating and subscribing one on first use. The instance updates its
+        mapping as words are removed from the bank, so it can be reused every turn
+        instead of being rebuilt from the whole bank.
+        :param word_bank: the word bank to follow
+        :return: the probability function of the word bank
+        """
+        if not isinstance(word_bank, WordBank):
+            return cls(word_bank)
+        for listener in word_bank.listeners:
+            if type(listener) is cls:
+                return listener
+        fcn = cls(word_bank)
+        word_bank.subscribe(fcn)
+        return fcn
+
+    def words_removed(self, letters: np.ndarray) -> None:
+        """called by the followed word bank after words were removed from it
+        :param letters: letter matrix of the removed words
+        """
+        self._mapping = self.generate_mapping(self._word_bank)
+
+    def bank_reset(self) -> None:
+        """called by the followed word bank after it was reset or its words were
+        replaced with set_remaining"""
+        self._mapping = self.generate_mapping(self._word_bank)
+
     @abstractmethod
     def calc_prob(self, word: str) -> float:
         """calculate the probability of choosing the word
@@ -37,44 +75,63 @@ class ProbabilityFunction(ABC):
         :return: the probability we choose this word
         """
 
+    @abstractmethod
+    def letter_probabilities(self, letters: np.ndarray) -> np.ndarray:
+        """calculate the probability of every letter of a batch of words, such that
+        calc_prob of a word is the sum of its row
+        :param letters: N by L letter matrix of the words
+        :return: N by L matrix of letter probabilities
+        """
+
     #######
     # Batch Methods
     #######
-    def batch_calc_prob(self, words: List[str]) -> List[float]:
+    @staticmethod
+    def letter_matrix(words: Union[WordBank, Sequence[str], np.ndarray]) -> np.ndarray:
+        """Letter matrix of a list of words or of the words left in a word bank"""
+        if isinstance(words, np.ndarray):
+            return words
+        if isinstance(words, WordBank):
+            if words.array_backed:
+                return words.letters
+            words = words.word_bank
+        return to_letter_matrix(words)
+
+    def batch_calc_prob(self, words: Union[WordBank, List[str]]) -> np.ndarray:
         """Given a list of words, calculate the probability of choosing
         each word according to calc_prob. The probabilities are calculated
         independently for each word.
         :param words: the list of words we should calculate the probability
-        :return: the list of probabilities we choose each word
+        :return: the array of probabilities we choose each word
         """
-        probabilities = [0.0] * len(words)
-        for i, word in enumerate(words):
-            probabilities[i] = self.calc_prob(word)
-        return probabilities
+        letters = self.letter_matrix(words)
+        return self.letter_probabilities(letters).sum(axis=1)
 
-    def batch_calc_prob_of_vowels(self, words: List[str]) -> List[float]:
+    def batch_calc_prob_of_vowels(
+        self, words: Union[WordBank, List[str]]
+    ) -> np.ndarray:
         """Given a list of words, calculate the probability of choosing
         each word according to calc_prob_of_vowels. The probabilities are calculated
         independently for each word.
         :param words: the list of words we should calculate the probability
-        :return: the list of probabilities we choose each word
+        :return: the array of probabilities we choose each word
         """
-        probabilities = [0.0] * len(words)
-        for i, word in enumerate(words):
-            probabilities[i] = self.calc_prob_of_vowels(word)
-        return probabilities
+        letters = self.letter_matrix(words)
+        probabilities = self.letter_probabilities(letters)
+        return np.where(VOWEL_MASK[letters], probabilities, 0.0).sum(axis=1)
 
-    def batch_calc_prob_of_consonants(self, words: List[str]) -> List[float]:
+    def batch_calc_prob_of_consonants(
+        self, words: Union[WordBank, List[str]]
+    ) -> np.ndarray:
         """Given a list of words, calculate the probability of choosing
         each word according to calc_prob_of_consonants. The probabilities are calculated
         independently for each word.
         :param words: the list of words we should calculate the probability
-        :return: the list of probabilities we choose each word
+        :return: the array of probabilities we choose each word
         """
-        probabilities = [0.0] * len(words)
-        for i, word in enumerate(words):
-            probabilities[i] = self.calc_prob_of_consonants(word)
-        return probabilities
+        letters = self.letter_matrix(words)
+        probabilities = self.letter_probabilities(letters)
+        return np.where(CONSONANT_MASK[letters], probabilities, 0.0).sum(axis=1)
 
 
 class LetterSetLikelihood(ProbabilityFunction):
@@ -86,47 +143,63 @@ class LetterSetLikelihood(ProbabilityFunction):
 
     def __init__(self, word_bank: WordBank):
         super().__init__(word_bank)
-        self._mapping = self.generate_mapping(word_bank)
+        self._counts = self.generate_counts(word_bank)
+        self._mapping = self._counts / max(self._counts.sum(), 1)
 
     def set_word_bank(self, word_bank: WordBank):
         """setter for word bank"""
         self._word_bank = word_bank
-        self._mapping = self.generate_mapping(word_bank)
+        self._counts = self.generate_counts(word_bank)
+        self._mapping = self._counts / max(self._counts.sum(), 1)
 
     def get_word_bank(self):
         """getter for word bank"""
         return self._word_bank
 
+    def words_removed(self, letters: np.ndarray) -> None:
+        self._counts = self._counts - self.generate_counts(letters)
+        self._mapping = self._counts / max(self._counts.sum(), 1)
+
+    def bank_reset(self) -> None:
+        self.set_word_bank(self._word_bank)
+
     @staticmethod
-    def generate_mapping(word_bank) -> Dict[str, float]:
+    def generate_counts(word_bank) -> np.ndarray:
+        """Counts how often each letter in ALPHABET appears in the word bank, cached
+        by the words left when given a WordBank"""
+        if isinstance(word_bank, WordBank):
+            return word_bank.statistic("letter_counts", letter_counts)
+        return letter_counts(ProbabilityFunction.letter_matrix(word_bank))
+
+    @staticmethod
+    def generate_mapping(word_bank) -> np.ndarray:
         """Calculates the probability of a letter appearing in the letter set based
         off the word bank.
-        :return: A dictionary mapping each letter to its probability of appearing in
+        :return: An array of the probability of each letter in ALPHABET appearing in
         the set. [0, 1]
         """
-        long_str = list("".join(word_bank))  # list of letters in bank
-        letters, counts = np.unique(long_str, return_counts=True)
-
-        total_letters = sum(counts)
-        probabilities = [count / total_letters for count in counts]
+        counts = LetterSetLikelihood.generate_counts(word_bank)
+        return counts / max(counts.sum(), 1)
 
-        letter_to_prob = dict(zip(letters, probabilities))
-
-        # Add the probability of a letter not appearing in the word bank
-        for letter in ALPHABET:
-            if letter not in letter_to_prob:
-                letter_to_prob[letter] = 0.0
-
-        return letter_to_prob
+    def letter_probabilities(self, letters: np.ndarray) -> np.ndarray:
+        return self._mapping[letters]
 
     def calc_prob(self, word: str) -> float:
-        return sum(self._mapping[letter] for letter in word)
+        return sum(self._mapping[LETTER_INDEX[letter]] for letter in word)
 
     def calc_prob_of_consonants(self, word: str) -> float:
-        return sum(self._mapping[letter] for letter in word if letter in CONSONANTS)
+        return sum(
+            self._mapping[LETTER_INDEX[letter]]
+            for letter in word
+            if CONSONANT_MASK[LETTER_INDEX[letter]]
+        )
 
     def calc_prob_of_vowels(self, word: str) -> float:
-        return sum(self._mapping[letter] for letter in word if letter in VOWELS)
+        return sum(
+            self._mapping[LETTER_INDEX[letter]]
+            for letter in word
+            if VOWEL_MASK[LETTER_INDEX[letter]]
+        )
 
 
 class LetterPositionLikelihood(ProbabilityFunction):
@@ -135,65 +208,65 @@ class LetterPositionLikelihood(ProbabilityFunction):
 
     def __init__(self, word_bank: WordBank):
         super().__init__(word_bank)
-        self._mapping = self.generate_mapping(word_bank)
+        self._counts = self.generate_counts(word_bank)
+        self._mapping = self._counts / max(self._counts.sum(), 1)
 
     def set_word_bank(self, word_bank: WordBank):
         """setter for word bank"""
         self._word_bank = word_bank
-        self._mapping = self.generate_mapping(word_bank)
+        self._counts = self.generate_counts(word_bank)
+        self._mapping = self._counts / max(self._counts.sum(), 1)
 
     def get_word_bank(self):
         """getter for word bank"""
         return self._word_bank
 
-    def generate_mapping(self, word_bank: WordBank) -> Dict[int, Dict[str, float]]:
+    def words_removed(self, letters: np.ndarray) -> None:
+        self._counts = self._counts - self.generate_counts(letters)
+        self._mapping = self._counts / max(self._counts.sum(), 1)
+
+    def bank_reset(self) -> None:
+        self.set_word_bank(self._word_bank)
+
+    def generate_counts(self, word_bank: WordBank) -> np.ndarray:
+        """Counts how often each letter in ALPHABET appears at each position of
+        the words in the word bank, cached by the words left when given a WordBank
+        :return: A word length by 26 array of counts
+        """
+        if isinstance(word_bank, WordBank):
+            return word_bank.statistic("position_counts", position_counts)
+        return position_counts(self.letter_matrix(word_bank))
+
+    def generate_mapping(self, word_bank: WordBank) -> np.ndarray:
         """
         Generates a mapping of letter position to letter probability. The map
-        is first indexed by position, then by letter.
-        :return: A mapping of position and letter to its probability.
+        is first indexed by position, then by the letter's index in ALPHABET.
+        :return: A word length by 26 array of the probability of each position
+        and letter.
         """
-        count = 0
-        pos_to_letter_to_prob = {}
-        for word in word_bank:
-            count += 1
-            for pos, letter in enumerate(word):
-                if pos not in pos_to_letter_to_prob:
-                    pos_to_letter_to_prob[pos] = {letter: 0}
-                if letter not in pos_to_letter_to_prob[pos]:
-                    pos_to_letter_to_prob[pos][letter] = 0
-                pos_to_letter_to_prob[pos][letter] += 1
-
-        total_num_letters = sum(
-            pos_to_letter_to_prob[pos][letter]
-            for pos in pos_to_letter_to_prob
-            for letter in pos_to_letter_to_prob[pos]
-        )
-
-        for pos in pos_to_letter_to_prob:
-            # Convert counts to probabilities
-            for letter in pos_to_letter_to_prob[pos]:
-                pos_to_letter_to_prob[pos][letter] /= total_num_letters
+        counts = self.generate_counts(word_bank)
+        # every word adds one letter per position, so this is words * length
+        total_num_letters = max(counts.sum(), 1)
+        return counts / total_num_letters
 
-            # Add missing letters
-            for letter in ALPHABET:
-                if letter not in pos_to_letter_to_prob[pos]:
-                    pos_to_letter_to_prob[pos][letter] = 0
-
-        return pos_to_letter_to_prob
+    def letter_probabilities(self, letters: np.ndarray) -> np.ndarray:
+        return self._mapping[np.arange(letters.shape[1]), letters]
 
     def calc_prob(self, word: str) -> float:
-        return sum(self._mapping[pos][letter] for pos, letter in enumerate(word))
+        return sum(
+            self._mapping[pos, LETTER_INDEX[letter]] for pos, letter in enumerate(word)
+        )
 
     def calc_prob_of_vowels(self, word: str) -> float:
         return sum(
-            self._mapping[pos][letter]
+            self._mapping[pos, LETTER_INDEX[letter]]
             for pos, letter in enumerate(word)
-            if letter in VOWELS
+            if VOWEL_MASK[LETTER_INDEX[letter]]
         )
 
     def calc_prob_of_consonants(self, word: str) -> float:
         return sum(
-            self._mapping[pos][letter]
+            self._mapping[pos, LETTER_INDEX[letter]]
             for pos, letter in enumerate(word)
-            if letter in CONSONANTS
+            if CONSONANT_MASK[LETTER_INDEX[letter]]
         )
@@ -0,0 +1,92 @@
+#
+# registry.py
+#
+# static manifest of the strategies, probability functions and word banks, resolved
+# to objects only when they are used so the CLI does not import numpy to parse args
+#
+
+import importlib
+import pathlib
+from typing import Dict
+
+WORDS_DIR = pathlib.Path(__file__).parent.joinpath("words")
+
+# name -> "module:attribute"
+STRATEGIES: Dict[str, str] = {
+    "RandomAlternating": "wordle.strategies:RandomAlternating",
+    "MinLikelihoodStrategy": "wordle.strategies:MinLikelihoodStrategy",
+    "MaxLikelihoodStrategy": "wordle.strategies:MaxLikelihoodStrategy",
+    "EntropyStrategy": "wordle.strategies:EntropyStrategy",
+    "SampledEntropyStrategy": "wordle.strategies:SampledEntropyStrategy",
+    "LookaheadStrategy": "wordle.strategies:LookaheadStrategy",
+}
+
+PROBABILITY_FUNCTIONS: Dict[str, str] = {
+    "LetterSetLikelihood": "wordle.probability_functions:LetterSetLikelihood",
+    "LetterPositionLikelihood": (
+        "wordle.probability_functions:LetterPositionLikelihood"
+    ),
+}
+
+# name -> path of the text word bank relative to WORDS_DIR
+WORD_BANKS: Dict[str, str] = {
+    "wordle/wordle_bank": "wordle/wordle_bank.txt",
+    "wikipedia/5_letter_words": "wikipedia/5_letter_words.txt",
+    "wikipedia/unique_5_letter_words": "wikipedia/unique_5_letter_words.txt",
+}
+
+
+def default_word_bank(num_letters: int) -> str:
+    """Name of the word bank of num_letters letter words used when none is given.
+    Other lengths than 5 use the banks process_banks generates from a word list.
+    """
+    if num_letters == 5:
+        return "wordle/wordle_bank"
+    return f"wikipedia/{num_letters}_letter_words"
+
+
+def _resolve(manifest: Dict[str, str], name: str, kind: str):
+    """Imports the object a manifest entry points to"""
+    if name not in manifest:
+        raise KeyError(
+            f"{name} is not an available {kind}, choose from: {', '.join(manifest)}"
+        )
+    module_name, attribute = manifest[name].split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def load_strategy(name: str):
+    """
+    :param name: name of a strategy in STRATEGIES
+    :return: the strategy class
+    """
+    return _resolve(STRATEGIES, name, "strategy")
+
+
+def load_probability_function(name: str):
+    """
+    :param name: name of a probability function in PROBABILITY_FUNCTIONS
+    :return: the probability function class
+    """
+    return _resolve(PROBABILITY_FUNCTIONS, name, "probability function")
+
+
+def word_bank_path(name: str) -> pathlib.Path:
+    """Path of a word bank by name. Banks not in WORD_BANKS, such as ones generated
+    by process_banks, are found by name under the words directory.
+    :param name: e.g. wordle/wordle_bank
+    :return: path to the text word bank
+    """
+    path = WORDS_DIR.joinpath(WORD_BANKS.get(name, f"{name}.txt"))
+    if not path.is_file():
+        raise KeyError(
+            f"{name} is not an available word bank, choose from: "
+            f"{', '.join(WORD_BANKS)}"
+        )
+    return path
+
+
+def word_length(path: pathlib.Path) -> int:
+    """Length of the words of a text word bank, read from its first word"""
+    with open(path, "r", encoding="utf-8") as f:
+        return len(f.readline().strip())
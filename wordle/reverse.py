@@ -0,0 +1,401 @@
+#
+# reverse.py
+#
+# reverse solving of shared feedback grids: which goal words, and which guesses,
+# are consistent with rows of colors
+#
+
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from wordle.candidates import CandidateSet
+from wordle.constants import LetterState
+from wordle.feedback import (
+    BUILD_CHUNK_SIZE,
+    MAX_DENSE_PATTERNS,
+    compute_patterns,
+    num_patterns,
+    pattern_dtype,
+    words_digest,
+)
+from wordle.shared_tables import SharedArray, SharedBank, SharedTables
+from wordle.words.process_banks import bounded_imap, read_chunks
+from wordle.words.word_bank import WordBank
+
+# LetterState value of every character a row of colors may be written with: digits,
+# or the squares of shared grids, including the high contrast ones
+ROW_CHARACTERS = {
+    "0": LetterState.GREY.value,
+    "1": LetterState.YELLOW.value,
+    "2": LetterState.GREEN.value,
+    "⬛": LetterState.GREY.value,
+    "⬜": LetterState.GREY.value,
+    "🟨": LetterState.YELLOW.value,
+    "🟦": LetterState.YELLOW.value,
+    "🟩": LetterState.GREEN.value,
+    "🟧": LetterState.GREEN.value,
+}
+
+# Plausible guesses are only listed for histories with at most this many answers
+GUESS_ANSWER_LIMIT = 16
+
+# Number of distinct histories whose answers each solver remembers
+MAX_CACHED_HISTORIES = 4096
+
+# Per worker process state, set once by _init_worker
+_worker = {}
+
+
+def parse_row(row: str) -> int:
+    """Converts a row of colors into its pattern code
+    :param row: one character per letter, see ROW_CHARACTERS, e.g. "20100" or
+    "🟩⬛🟨⬛⬛"
+    :return: the pattern code of the row
+    """
+    code = 0
+    for character in reversed(row):
+        if character not in ROW_CHARACTERS:
+            raise ValueError(f"unknown color {character!r} in row {row!r}")
+        code = code * 3 + ROW_CHARACTERS[character]
+    return code
+
+
+def parse_history(line: str, num_letters: int) -> List[int]:
+    """Converts a line of a grid log into the pattern codes of its rows
+    :param line: rows of colors separated by whitespace or commas
+    :param num_letters: number of letters in the words
+    :return: the pattern code of every row, in order
+    """
+    rows = line.replace(",", " ").split()
+    for row in rows:
+        if len(row) != num_letters:
+            raise ValueError(f"row {row!r} does not have {num_letters} colors")
+    return [parse_row(row) for row in rows]
+
+
+class AchievablePatterns:
+    """
+    Which patterns each answer of a word bank can show to some guess of the bank,
+    stored sparsely since an answer only shows a few of the 3^L patterns: the
+    answers that show pattern p to at least one guess are
+    indices[offsets[p]:offsets[p + 1]], in increasing order. The answers
+    consistent with a history of patterns are the intersection of its rows.
+    """
+
+    def __init__(self, offsets: np.ndarray, indices: np.ndarray, num_words: int):
+        """
+        :param offsets: 3^L + 1 offsets into indices of the row of every pattern
+        :param indices: indices of the answers of every row, one row after another
+        :param num_words: number of words in the bank
+        """
+        self.offsets = offsets
+        self.indices = indices
+        self.num_words = num_words
+
+    @staticmethod
+    def cache_paths(words: Sequence[str], bank_path: str) -> Tuple[str, str]:
+        """Paths of the cached offsets and indices of a word bank, next to the bank
+        and keyed by a hash of its words, like FeedbackMatrix.cache_path
+        """
+        stem = os.path.splitext(str(bank_path))[0]
+        prefix = f"{stem}.achievable.{words_digest(words)[:12]}"
+        return f"{prefix}.offsets.npy", f"{prefix}.indices.npy"
+
+    @classmethod
+    def build(
+        cls, word_bank: WordBank, paths: Tuple[str, str] = None
+    ) -> "AchievablePatterns":
+        """Scores every guess against a chunk of answers at a time, from the bank's
+        feedback matrix when it has one, otherwise computing the patterns, and
+        keeps the distinct patterns of each answer.
+        :param word_bank: the word bank
+        :param paths: if given, the offsets and indices are written to these .npy
+        files, see cache_paths
+        :return: the table
+        """
+        letters = word_bank.load_letter_matrix()
+        num_words, num_letters = letters.shape
+        width = num_patterns(num_letters)
+        answer_dtype = np.min_scalar_type(max(num_words - 1, 0))
+        matrix = word_bank.feedback_matrix
+
+        found_codes = []
+        found_answers = []
+        for start in range(0, num_words, BUILD_CHUNK_SIZE):
+            stop = min(start + BUILD_CHUNK_SIZE, num_words)
+            if matrix is not None:
+                codes = np.asarray(matrix.patterns[:, start:stop])
+            else:
+                codes = compute_patterns(letters, letters[start:stop])
+            columns = np.arange(stop - start)
+            if width <= MAX_DENSE_PATTERNS:
+                shown = np.zeros((width, stop - start), dtype=bool)
+                shown[codes, columns] = True
+                code, answer = np.nonzero(shown)
+            else:
+                keys = np.unique(codes.astype(np.int64) * (stop - start) + columns)
+                code, answer = np.divmod(keys, stop - start)
+            found_codes.append(code.astype(pattern_dtype(num_letters)))
+            found_answers.append((answer + start).astype(answer_dtype))
+
+        codes = np.concatenate(found_codes)
+        # stable, so the answers of every pattern stay in increasing order
+        indices = np.concatenate(found_answers)[np.argsort(codes, kind="stable")]
+        offsets = np.zeros(width + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=width), out=offsets[1:])
+
+        if paths is not None:
+            for array, array_path in zip((offsets, indices), paths):
+                tmp_path = f"{array_path}.{os.getpid()}.tmp.npy"
+                np.save(tmp_path, array)
+                os.replace(tmp_path, array_path)
+            return cls.load(paths, num_words, num_letters)
+        return cls(offsets, indices, num_words)
+
+    @classmethod
+    def load(
+        cls, paths: Tuple[str, str], num_words: int, num_letters: int
+    ) -> Optional["AchievablePatterns"]:
+        """Memory maps a cached table, see cache_paths
+        :return: the table, or None if it is missing or does not match the bank
+        """
+        if not all(os.path.exists(path) for path in paths):
+            return None
+        offsets, indices = (np.load(path, mmap_mode="r") for path in paths)
+        if offsets.shape != (num_patterns(num_letters) + 1,):
+            return None
+        if offsets[-1] != len(indices):
+            return None
+        return cls(offsets, indices, num_words)
+
+    @classmethod
+    def load_or_build(cls, word_bank: WordBank) -> "AchievablePatterns":
+        """Memory maps the cached table of a word bank, building it first if the
+        cache does not exist yet
+        """
+        words = word_bank.original_word_bank
+        paths = cls.cache_paths(words, word_bank.file_path)
+        table = cls.load(paths, len(words), len(words[0]))
+        if table is not None:
+            return table
+        logging.info("Building achievable patterns for %d words", len(words))
+        return cls.build(word_bank, paths)
+
+    def share(self, tables: SharedTables) -> Tuple[SharedArray, SharedArray]:
+        """Publishes the table for worker processes
+        :return: handles of the offsets and indices
+        """
+        return (
+            tables.publish("achievable_offsets", self.offsets),
+            tables.publish("achievable_indices", self.indices),
+        )
+
+    def answers(self, code: int) -> CandidateSet:
+        """The answers that show the pattern to at least one guess"""
+        start, stop = self.offsets[code], self.offsets[code + 1]
+        return CandidateSet.from_indices(self.indices[start:stop], self.num_words)
+
+
+class ReverseSolver:
+    """
+    Finds the goal words of a word bank that are consistent with a history of
+    patterns, whose guesses are unknown, and optionally the guesses that could
+    have shown each pattern.
+    """
+
+    def __init__(self, word_bank: WordBank, table: AchievablePatterns = None):
+        """
+        :param word_bank: bank of the goal words and guesses
+        :param table: the bank's AchievablePatterns, loaded or built if not given
+        """
+        self.words = word_bank.original_word_bank
+        self.letters = word_bank.load_letter_matrix()
+        self.table = table or AchievablePatterns.load_or_build(word_bank)
+        self._answer_sets: Dict[int, CandidateSet] = {}
+        self._histories: Dict[Tuple[int, ...], np.ndarray] = OrderedDict()
+
+    def answers(self, codes: Iterable[int]) -> np.ndarray:
+        """Indices of the goal words consistent with every pattern. Histories with
+        the same patterns, in any order, are only solved once.
+        :param codes: pattern codes of the rows
+        """
+        key = tuple(sorted(set(codes)))
+        if key in self._histories:
+            self._histories.move_to_end(key)
+            return self._histories[key]
+
+        remaining = CandidateSet.full(len(self.words))
+        for code in key:
+            if code not in self._answer_sets:
+                self._answer_sets[code] = self.table.answers(code)
+            remaining = remaining & self._answer_sets[code]
+        indices = remaining.indices()
+        self._histories[key] = indices
+        if len(self._histories) > MAX_CACHED_HISTORIES:
+            self._histories.popitem(last=False)
+        return indices
+
+    def guesses(self, answer: int, codes: Sequence[int]) -> List[np.ndarray]:
+        """The guesses that show each pattern when answer is the goal word
+        :param answer: index of the goal word
+        :param codes: pattern codes of the rows
+        :return: indices of the guesses of every row
+        """
+        shown = compute_patterns(self.letters, self.letters[answer : answer + 1])[:, 0]
+        return [np.flatnonzero(shown == code) for code in codes]
+
+    def solve(
+        self, codes: Sequence[int], max_guesses: int = 0, max_answers: int = None
+    ) -> Dict[str, object]:
+        """Solves one history
+        :param codes: pattern codes of the rows
+        :param max_guesses: list up to this many plausible guesses for every row,
+        for each answer of histories with at most GUESS_ANSWER_LIMIT answers
+        :param max_answers: list at most this many answers
+        :return: the number of answers, the answers, and the guesses of each row
+        by answer when max_guesses is set
+        """
+        answers = self.answers(codes)
+        result = {
+            "count": len(answers),
+            "answers": [self.words[i] for i in answers[:max_answers].tolist()],
+        }
+        if max_guesses and len(answers) <= GUESS_ANSWER_LIMIT:
+            result["guesses"] = {
+                self.words[answer]: [
+                    [self.words[i] for i in row[:max_guesses].tolist()]
+                    for row in self.guesses(answer, codes)
+                ]
+                for answer in answers.tolist()
+            }
+        return result
+
+    def solve_lines(
+        self,
+        lines: Sequence[str],
+        first_line: int = 1,
+        max_guesses: int = 0,
+        max_answers: int = None,
+    ) -> List[str]:
+        """Solves a chunk of a grid log
+        :param lines: lines of the log, one history per line
+        :param first_line: line number of the first line
+        :return: a JSON line per non blank line, with its line number and either its
+        solution or the error parsing it
+        """
+        num_letters = self.letters.shape[1]
+        output = []
+        for number, line in enumerate(lines, first_line):
+            if not line.strip():
+                continue
+            try:
+                codes = parse_history(line, num_letters)
+                result = {"line": number, **self.solve(codes, max_guesses, max_answers)}
+            except ValueError as e:
+                result = {"line": number, "error": str(e)}
+            output.append(json.dumps(result) + "\n")
+        return output
+
+
+def _init_worker(
+    shared_bank: SharedBank,
+    shared_table: Tuple[SharedArray, SharedArray],
+    max_guesses: int,
+    max_answers: Optional[int],
+) -> None:
+    """Loads the word bank and its table of achievable patterns from the tables
+    the parent shared
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    bank = WordBank(shared_bank.file_path, array_backed=True, shared=shared_bank)
+    offsets, indices = (shared.attach() for shared in shared_table)
+    table = AchievablePatterns(offsets, indices, len(bank.original_word_bank))
+    _worker["solver"] = ReverseSolver(bank, table)
+    _worker["options"] = (max_guesses, max_answers)
+
+
+def _solve_chunk(chunk: Tuple[int, List[str]]) -> List[str]:
+    """Solves a chunk of lines in a worker"""
+    first_line, lines = chunk
+    return _worker["solver"].solve_lines(lines, first_line, *_worker["options"])
+
+
+def _numbered_chunks(
+    input_path: str, chunk_size: int
+) -> Iterator[Tuple[int, List[str]]]:
+    """Streams chunks of lines along with the line number of their first line"""
+    first_line = 1
+    for lines in read_chunks(input_path, chunk_size):
+        yield first_line, lines
+        first_line += len(lines)
+
+
+def reverse_solve_file(
+    input_path: str,
+    output_path: str,
+    word_bank_file_path: str,
+    processes: int = None,
+    max_guesses: int = 0,
+    max_answers: int = None,
+    chunk_size: int = 1 << 16,
+) -> int:
+    """Solves every history of a grid log, streaming it in chunks through a pool
+    of workers that share the bank's tables. Output lines are in input order.
+    :param input_path: log with one history per line, see parse_history
+    :param output_path: JSON lines file of the solutions, see
+    ReverseSolver.solve_lines, or "-" for stdout
+    :param word_bank_file_path: path to the word bank of the goal words and guesses
+    :param processes: number of worker processes, defaults to the cpu count, and 1
+    solves in this process
+    :param max_guesses: list up to this many plausible guesses for every row, see
+    ReverseSolver.solve
+    :param max_answers: list at most this many answers of each history
+    :param chunk_size: size hint in bytes of each chunk of lines read
+    :return: number of histories written
+    """
+    word_bank = WordBank(word_bank_file_path, use_feedback_matrix=True)
+    table = AchievablePatterns.load_or_build(word_bank)
+    processes = processes or multiprocessing.cpu_count()
+    chunks = _numbered_chunks(input_path, chunk_size)
+    logging.info("Reverse solving %s on %d processes", input_path, processes)
+
+    written = 0
+    output = (
+        sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    )
+    try:
+        if processes == 1:
+            solver = ReverseSolver(word_bank, table)
+            solved = (
+                solver.solve_lines(lines, first_line, max_guesses, max_answers)
+                for first_line, lines in chunks
+            )
+            for lines in solved:
+                output.writelines(lines)
+                written += len(lines)
+            return written
+
+        with SharedTables() as tables, multiprocessing.Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(
+                word_bank.share(tables),
+                table.share(tables),
+                max_guesses,
+                max_answers,
+            ),
+        ) as pool:
+            for lines in bounded_imap(pool, _solve_chunk, chunks, 4 * processes):
+                output.writelines(lines)
+                written += len(lines)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return written
@@ -0,0 +1,291 @@
+#
+# server.py
+#
+# long lived solver daemon answering next guess requests over a local socket
+#
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Sequence, Tuple, Union
+
+from wordle import registry
+from wordle.feedback import Feedback
+from wordle.shared_tables import SharedBank, SharedTables
+from wordle.transposition import CachedStrategy, TranspositionTable
+
+DEFAULT_PORT = 8765
+
+# Per worker process state, set once by _init_worker
+_worker = {}
+
+# A guess and the feedback it got, either as a pattern code or as a string of
+# LetterState values, one digit per letter, e.g. "20100"
+HistoryEntry = Tuple[str, Union[int, str]]
+
+
+def parse_pattern(guess: str, pattern: Union[int, str]) -> Feedback:
+    """Converts the feedback of a request into a guess state
+    :param guess: the guessed word
+    :param pattern: a pattern code, or a string of one LetterState value per letter
+    :return: the Feedback of the guess
+    """
+    if isinstance(pattern, int):
+        if not 0 <= pattern < 3 ** len(guess):
+            raise ValueError(f"pattern {pattern} is out of range for {guess}")
+        return Feedback(guess, pattern)
+    if len(pattern) != len(guess) or set(pattern) - set("012"):
+        raise ValueError(f"pattern {pattern!r} does not match {guess}")
+    # the first letter is the least significant digit of the code
+    return Feedback(guess, int(pattern[::-1], 3))
+
+
+def _init_worker(bank_options: Dict[str, bool], max_entries: int) -> None:
+    """Sets up the word banks and decision cache a worker keeps warm"""
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker["bank_options"] = bank_options
+    _worker["banks"] = {}
+    _worker["table"] = TranspositionTable(max_entries)
+
+
+def _solve(
+    strategy: str,
+    probability_function: str,
+    word_bank: str,
+    history: Sequence[HistoryEntry],
+    shared: SharedBank,
+) -> Dict[str, object]:
+    """Chooses the next guess in a worker by replaying the history on its bank
+    :param shared: the tables of the word bank the server shared, which the bank
+    is loaded from the first time the worker uses it
+    :return: the guess and the number of candidates left
+    """
+    from wordle.words.word_bank import WordBank
+
+    if word_bank not in _worker["banks"]:
+        _worker["banks"][word_bank] = WordBank(
+            shared.file_path, shared=shared, **_worker["bank_options"]
+        )
+    bank = _worker["banks"][word_bank]
+    bank.replay_guesses([parse_pattern(guess, pattern) for guess, pattern in history])
+    if len(bank) == 0:
+        raise ValueError("no words are consistent with the history")
+
+    cached = CachedStrategy(registry.load_strategy(strategy), _worker["table"])
+    guess = cached.choose_next_word(
+        bank, registry.load_probability_function(probability_function)
+    )
+    return {"guess": guess, "candidates": len(bank)}
+
+
+class SolverServer:
+    """
+    Answers "next guess given this history" requests. Each request is a line of
+    JSON such as
+
+        {"id": 1, "history": [["soare", "02100"]], "strategy": "EntropyStrategy"}
+
+    where strategy, probability_function and word_bank default to the server's, and
+    each response is a line of JSON with the same id and either the guess and
+    number of candidates left, or an error.
+
+    Choosing a guess runs in a process pool whose workers keep their word banks,
+    probability mappings and feedback matrices warm, and memoize decisions by
+    candidate set. The tables of every word bank are loaded once by the server,
+    the default one up front and others when they are first asked for, and shared
+    with the workers. Answers are also cached by request so repeats skip the pool.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "MaxLikelihoodStrategy",
+        probability_function: str = "LetterPositionLikelihood",
+        word_bank: str = "wordle/wordle_bank",
+        processes: int = None,
+        max_entries: int = 100_000,
+        **bank_options,
+    ):
+        """
+        :param strategy: strategy used by requests that do not name one
+        :param probability_function: probability function used by requests that
+        do not name one
+        :param word_bank: word bank used by requests that do not name one
+        :param processes: number of worker processes, defaults to the cpu count
+        :param max_entries: size of the answer and decision caches
+        :param bank_options: keyword arguments for the workers' WordBanks,
+        defaults to using bitsets
+        """
+        self.defaults = {
+            "strategy": strategy,
+            "probability_function": probability_function,
+            "word_bank": word_bank,
+        }
+        self.bank_options = bank_options or {"use_bitsets": True}
+        self.cache = TranspositionTable(max_entries)
+        self.processes = processes or os.cpu_count()
+        self.tables = SharedTables()
+        # the server's own banks, their shared tables by name and whether the
+        # strategy reads patterns, the tables being loaded, and a lock so banks are
+        # loaded one at a time
+        self.banks = {}
+        self.shared: Dict[Tuple[str, bool], SharedBank] = {}
+        self._pending: Dict[Tuple[str, bool], asyncio.Future] = {}
+        self._loading = threading.Lock()
+        key = (word_bank, registry.load_strategy(strategy).reads_patterns)
+        self.shared[key] = self._share(*key)
+        self.pool = ProcessPoolExecutor(
+            self.processes,
+            initializer=_init_worker,
+            initargs=(self.bank_options, max_entries),
+        )
+
+    def _share(self, word_bank: str, reads_patterns: bool) -> SharedBank:
+        """Loads a word bank, along with its feedback matrix if the strategy reads
+        patterns, and shares its tables, so workers do not each build them
+        :param word_bank: name of the word bank in the registry
+        :param reads_patterns: whether the strategy reads the feedback patterns
+        :return: handle of the tables of the bank
+        """
+        from wordle.words.word_bank import WordBank
+
+        with self._loading:
+            bank = self.banks.get(word_bank)
+            if bank is None:
+                bank = WordBank(
+                    str(registry.word_bank_path(word_bank)), **self.bank_options
+                )
+                self.banks[word_bank] = bank
+            if reads_patterns and bank.feedback_matrix_fits():
+                bank.load_feedback_matrix()
+            return bank.share(self.tables)
+
+    async def shared_bank(self, word_bank: str, strategy: str) -> SharedBank:
+        """The shared tables of a word bank for a strategy, loaded in a thread the
+        first time they are asked for so other requests are not held up
+        """
+        key = (word_bank, registry.load_strategy(strategy).reads_patterns)
+        if key not in self.shared:
+            if key not in self._pending:
+                loop = asyncio.get_running_loop()
+                self._pending[key] = loop.run_in_executor(None, self._share, *key)
+            try:
+                self.shared[key] = await self._pending[key]
+            finally:
+                self._pending.pop(key, None)
+        return self.shared[key]
+
+    async def solve(self, request: Dict[str, object]) -> Dict[str, object]:
+        """Answers one request, from the cache if it was asked before and the
+        strategy always answers it the same way
+        """
+        args = [request.get(name, default) for name, default in self.defaults.items()]
+        history = [(guess, pattern) for guess, pattern in request.get("history", [])]
+        key = json.dumps([args, history])
+        deterministic = registry.load_strategy(args[0]).deterministic
+
+        response = self.cache.get(key) if deterministic else None
+        if response is None:
+            shared = await self.shared_bank(args[2], args[0])
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self.pool, _solve, *args, history, shared
+            )
+            if deterministic:
+                self.cache.put(key, response)
+        return response
+
+    async def warm(self) -> None:
+        """Loads the default word bank into the workers and caches the opening"""
+        loop = asyncio.get_running_loop()
+        args = list(self.defaults.values())
+        shared = await self.shared_bank(args[2], args[0])
+        responses = await asyncio.gather(
+            *(
+                loop.run_in_executor(self.pool, _solve, *args, [], shared)
+                for _ in range(self.processes)
+            )
+        )
+        if registry.load_strategy(args[0]).deterministic:
+            self.cache.put(json.dumps([args, []]), responses[0])
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves the requests of one connection, one per line"""
+        try:
+            while line := await reader.readline():
+                request = {}
+                try:
+                    request = json.loads(line)
+                    response = dict(await self.solve(request))
+                except Exception as e:  # reported to the client, not fatal
+                    response = {"error": f"{type(e).__name__}: {e}"}
+                response["id"] = request.get("id")
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path: str = None, host: str = "127.0.0.1", port: int = None):
+        """Listens on a unix socket at path, or on host and port over TCP, until
+        cancelled
+        """
+        await self.warm()
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port or DEFAULT_PORT)
+        logging.info(
+            "Solver listening on %s",
+            ", ".join(str(sock.getsockname()) for sock in server.sockets),
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown()
+            self.tables.close()
+
+
+class SolverClient:
+    """Blocking client of a SolverServer, for scripts and tests"""
+
+    def __init__(self, path: str = None, host: str = "127.0.0.1", port: int = None):
+        if path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(path)
+        else:
+            self._socket = socket.create_connection((host, port or DEFAULT_PORT))
+        self._file = self._socket.makefile("rwb")
+        self._next_id = 0
+
+    def next_guess(self, history: Sequence[HistoryEntry] = (), **options):
+        """Asks the server for the next guess
+        :param history: the guesses so far and their feedback
+        :param options: strategy, probability_function or word_bank to use
+        :return: the response, with the guess and number of candidates left
+        """
+        self._next_id += 1
+        request = {"id": self._next_id, "history": list(history), **options}
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
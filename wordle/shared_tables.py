@@ -0,0 +1,195 @@
+#
+# shared_tables.py
+#
+# read only arrays published once by a parent process and mapped by its workers
+#
+
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Prefix of the directories SharedTables publish into, followed by the owner's pid
+DIRECTORY_PREFIX = "wordle_tables_"
+
+
+class SharedArray:
+    """
+    Picklable handle of a read only array published by SharedTables. The array is
+    a file that every process memory maps, so the pages are held once by the page
+    cache (or tmpfs) however many workers attach to it.
+    """
+
+    def __init__(
+        self, path: str, shape: Tuple[int, ...], dtype: str, offset: int, digest: str
+    ):
+        """
+        :param path: file holding the array
+        :param shape: shape of the array
+        :param dtype: numpy dtype of the array, as a string
+        :param offset: byte offset of the array in the file
+        :param digest: content hash of what the array was built from
+        """
+        self.path = path
+        self.shape = shape
+        self.dtype = dtype
+        self.offset = offset
+        self.digest = digest
+
+    def attach(self) -> np.ndarray:
+        """Maps the array into this process without copying it
+        :return: read only view of the array
+        """
+        return np.memmap(self.path, self.dtype, "r", self.offset, self.shape)
+
+    def __repr__(self):
+        return f"SharedArray({self.path!r}, shape={self.shape}, dtype={self.dtype})"
+
+
+class SharedBank:
+    """Handles of the read only tables of a word bank, see WordBank.share"""
+
+    def __init__(
+        self,
+        file_path: str,
+        digest: str,
+        letters: SharedArray,
+        patterns: Optional[SharedArray] = None,
+    ):
+        """
+        :param file_path: path to the word bank file
+        :param digest: content hash of the words of the bank
+        :param letters: the letter matrix of the bank
+        :param patterns: the feedback matrix of the bank, if it was loaded
+        """
+        self.file_path = file_path
+        self.digest = digest
+        self.letters = letters
+        self.patterns = patterns
+
+
+class SharedTables:
+    """
+    Publishes read only arrays for worker processes to map by handle, so a pool of
+    workers holds one copy of each table instead of one per worker.
+
+    Arrays that are already memory mapped from a whole file, like cached feedback
+    matrices and compiled banks, are shared through that file. Other arrays are
+    written once, named by their key and content hash, to a directory on tmpfs
+    when there is one. The directory is removed by close, when the tables are
+    garbage collected or at exit, and directories left behind by owners that
+    crashed are removed by the next SharedTables.
+    """
+
+    def __init__(self, directory: str = None):
+        """
+        :param directory: where to create the table directory, defaults to
+        /dev/shm when it exists, otherwise the temporary directory
+        """
+        if directory is None:
+            directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+            directory = directory or tempfile.gettempdir()
+        remove_stale(directory)
+        self.directory = tempfile.mkdtemp(
+            prefix=f"{DIRECTORY_PREFIX}{os.getpid()}_", dir=directory
+        )
+        self._published: Dict[str, SharedArray] = {}
+        self._finalizer = weakref.finalize(
+            self, _remove_directory, self.directory, os.getpid()
+        )
+
+    def publish(self, key: str, array: np.ndarray, digest: str = None) -> SharedArray:
+        """Makes an array available to other processes
+        :param key: name of the table, such as "letters"
+        :param array: the array to share, which must not change afterwards
+        :param digest: content hash of what the array was built from, defaults to a
+        hash of its bytes
+        :return: handle that workers attach to
+        """
+        if _maps_whole_file(array):
+            if digest is None:
+                digest = _file_digest(array.filename)
+            return SharedArray(
+                array.filename, array.shape, array.dtype.str, array.offset, digest
+            )
+
+        array = np.ascontiguousarray(array)
+        if digest is None:
+            digest = hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest()
+        name = f"{key}.{digest[:16]}"
+        if name not in self._published:
+            path = os.path.join(self.directory, f"{name}.bin")
+            array.tofile(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+            self._published[name] = SharedArray(
+                path, array.shape, array.dtype.str, 0, digest
+            )
+        return self._published[name]
+
+    def close(self) -> None:
+        """Removes the published tables. Workers that mapped them keep their
+        mappings, but new attaches fail.
+        """
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def remove_stale(directory: str) -> None:
+    """Removes the table directories of owners that are no longer running
+    :param directory: directory the tables were created in
+    """
+    for name in os.listdir(directory):
+        if not name.startswith(DIRECTORY_PREFIX):
+            continue
+        pid = name[len(DIRECTORY_PREFIX) :].split("_")[0]
+        if pid.isdigit() and not _is_running(int(pid)):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def _remove_directory(directory: str, owner: int) -> None:
+    """Removes a table directory, only from the process that created it, since
+    forked workers inherit the owner's finalizers
+    """
+    if os.getpid() == owner:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _maps_whole_file(array: np.ndarray) -> bool:
+    """Whether the array is a read only memory map of all the data of a file, as
+    returned by np.load with mmap_mode="r"
+    """
+    return (
+        isinstance(array, np.memmap)
+        and isinstance(array.base, mmap.mmap)
+        and array.filename is not None
+        and array.flags.c_contiguous
+        and not array.flags.writeable
+        and array.offset + array.nbytes == os.path.getsize(array.filename)
+    )
+
+
+def _file_digest(path: str) -> str:
+    """Hash of a file's identity, cheaper than hashing a large table's bytes"""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,301 @@
+#
+# simulation.py
+#
+# headless batch runs of a strategy against many goal words
+#
+
+import logging
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from multiprocessing.util import Finalize
+from typing import Dict, List, Tuple
+
+from wordle.decision_tree import DecisionTree
+from wordle.instrumentation import (
+    PHASES,
+    JsonLinesSink,
+    MemorySink,
+    TurnRecord,
+    phase_percentiles,
+)
+from wordle.probability_functions import ProbabilityFunction
+from wordle.shared_tables import SharedBank, SharedTables
+from wordle.strategies import Strategy
+from wordle.transposition import CachedStrategy, TranspositionTable
+from wordle.wordle import Wordle
+from wordle.words.word_bank import WordBank
+
+# Per worker process state, set once by _init_worker so each game only has to
+# send its goal word to the worker
+_worker = {}
+
+
+class SimulationReport:
+    """Outcome of a batch of games"""
+
+    def __init__(
+        self,
+        results: List[Tuple[str, bool, int]],
+        wall_time: float,
+        table_stats: Dict[str, float] = None,
+        turn_stats: Dict[str, Dict[str, float]] = None,
+    ):
+        """
+        :param results: (goal word, solved, tries) of every game played
+        :param wall_time: seconds taken to play all the games
+        :param table_stats: counters of the transposition table, if one was used
+        :param turn_stats: latency percentiles of each phase of a turn, if the games
+        were traced
+        """
+        self.results = results
+        self.wall_time = wall_time
+        self.table_stats = table_stats
+        self.turn_stats = turn_stats
+
+    @property
+    def num_games(self) -> int:
+        return len(self.results)
+
+    @property
+    def num_failures(self) -> int:
+        return sum(not solved for _, solved, _ in self.results)
+
+    @property
+    def failure_rate(self) -> float:
+        return self.num_failures / self.num_games if self.num_games else 0.0
+
+    @property
+    def guess_distribution(self) -> Dict[int, int]:
+        """Maps number of guesses to the number of solved games that took that many"""
+        counts = Counter(tries for _, solved, tries in self.results if solved)
+        return dict(sorted(counts.items()))
+
+    @property
+    def mean_guesses(self) -> float:
+        """Average number of guesses of the solved games"""
+        distribution = self.guess_distribution
+        solved = sum(distribution.values())
+        if not solved:
+            return 0.0
+        return sum(tries * n for tries, n in distribution.items()) / solved
+
+    def __str__(self):
+        lines = [f"Games: {self.num_games}"]
+        for tries, count in self.guess_distribution.items():
+            lines.append(f"  {tries} guesses: {count}")
+        lines.append(f"Mean guesses (solved): {self.mean_guesses:.3f}")
+        lines.append(
+            f"Failures: {self.num_failures} ({self.failure_rate:.2%} failure rate)"
+        )
+        lines.append(
+            f"Wall time: {self.wall_time:.2f}s "
+            f"({self.num_games / max(self.wall_time, 1e-9):.1f} games/s)"
+        )
+        if self.table_stats is not None:
+            lines.append(
+                f"Transposition table: {self.table_stats['hits']} hits, "
+                f"{self.table_stats['misses']} misses "
+                f"({self.table_stats['hit_rate']:.2%} hit rate)"
+            )
+        if self.turn_stats:
+            lines.append("Turn latency (ms):")
+            for phase in PHASES:
+                stats = ", ".join(
+                    f"{name} {seconds * 1000:.3f}"
+                    for name, seconds in self.turn_stats[phase].items()
+                )
+                lines.append(f"  {phase}: {stats}")
+        return "\n".join(lines)
+
+
+def _init_worker(
+    prob_func: ProbabilityFunction,
+    strategy: Strategy,
+    shared_bank: SharedBank,
+    max_tries: int,
+    decision_tree_path: str,
+    table_options: Dict[str, str],
+    trace: bool,
+    adversarial: bool,
+    bank_options: Dict[str, bool],
+) -> None:
+    """Loads the word bank once for every game this worker plays, from the
+    tables the parent shared
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker["trace"] = trace
+    _worker["adversarial"] = adversarial
+    _worker["prob_func"] = prob_func
+    _worker["strategy"] = strategy
+    _worker["max_tries"] = max_tries
+    _worker["word_bank"] = WordBank(
+        shared_bank.file_path, shared=shared_bank, **bank_options
+    )
+    _worker["decision_tree"] = None
+    if decision_tree_path is not None:
+        _worker["decision_tree"] = DecisionTree.load(
+            decision_tree_path, _worker["word_bank"].original_word_bank
+        )
+
+    if table_options is not None:
+        table = TranspositionTable()
+        if table_options["path"] is not None:
+            table = TranspositionTable.load(table_options["path"])
+            table.reset_counters()
+        _worker["strategy"] = CachedStrategy(strategy, table)
+        # Runs when the worker exits after pool.close(), so the parent can merge
+        # the tables of every worker
+        shard_path = os.path.join(table_options["shard_dir"], f"{os.getpid()}.json")
+        Finalize(None, table.save, args=(shard_path,), exitpriority=10)
+
+
+def _play_goal(goal_word: str) -> Tuple[Tuple[str, bool, int], List[TurnRecord]]:
+    """Plays a single headless game in a worker
+    :return: (goal word, solved, tries), and the turn records if tracing
+    """
+    word_bank = _worker["word_bank"]
+    word_bank.reset_bank()
+    sink = MemorySink() if _worker["trace"] else None
+    game = Wordle(
+        _worker["prob_func"],
+        _worker["strategy"],
+        word_bank,
+        _worker["max_tries"],
+        goal_word=goal_word,
+        render=False,
+        decision_tree=_worker["decision_tree"],
+        trace=sink,
+        adversarial=_worker["adversarial"],
+    )
+    result = game.play()
+    records = sink.records if sink is not None else []
+    return (result.goal_word, result.solved, result.tries), records
+
+
+def simulate(
+    prob_func: ProbabilityFunction,
+    strategy: Strategy,
+    word_bank_file_path: str,
+    max_tries: int,
+    sample: int = None,
+    seed: int = None,
+    processes: int = None,
+    decision_tree_path: str = None,
+    use_transposition_table: bool = False,
+    transposition_table_path: str = None,
+    trace: bool = False,
+    trace_path: str = None,
+    adversarial: bool = False,
+    **bank_options,
+) -> SimulationReport:
+    """Plays the strategy against every word in the word bank, or a seeded random
+    sample of them, spread across a process pool. The bank's tables are loaded,
+    or built, once and shared with the workers.
+    :param prob_func: the probability function to use
+    :param strategy: the strategy to use
+    :param word_bank_file_path: path to the word bank, every word is a goal word
+    :param max_tries: how many guesses each game has
+    :param sample: if given, only play this many randomly chosen goal words
+    :param seed: seed for choosing the sample
+    :param processes: number of worker processes, defaults to the cpu count
+    :param decision_tree_path: if given, guesses are looked up in this decision
+    tree before falling back to the strategy
+    :param use_transposition_table: memoize the strategy's decisions in each worker
+    :param transposition_table_path: if given, the transposition tables start from
+    this file and are merged back into it afterwards. Implies
+    use_transposition_table
+    :param trace: record the timings of every turn and report their percentiles
+    :param trace_path: if given, also write every turn record to this JSON lines
+    file. Implies trace
+    :param adversarial: play adversarial games, where the goal word is the one
+    that holds out longest against the strategy. A deterministic strategy plays
+    the same adversarial game every time, so by default it is played once
+    :param bank_options: keyword arguments for each worker's WordBank
+    :return: report of the games played
+    """
+    word_bank = WordBank(word_bank_file_path, **bank_options)
+    if strategy.reads_patterns and word_bank.feedback_matrix_fits():
+        # built here once, rather than by every worker at the same time
+        word_bank.load_feedback_matrix()
+    goal_words = word_bank.original_word_bank
+    if adversarial and sample is None and strategy.deterministic:
+        sample = 1
+    if sample is not None and sample < len(goal_words):
+        goal_words = random.Random(seed).sample(goal_words, sample)
+
+    processes = processes or multiprocessing.cpu_count()
+    chunksize = max(1, len(goal_words) // (processes * 16))
+    logging.info(
+        "Simulating %d games of %s with %s on %d processes",
+        len(goal_words),
+        strategy.__name__,
+        prob_func.__name__,
+        processes,
+    )
+
+    table_options = None
+    if use_transposition_table or transposition_table_path is not None:
+        table_options = {
+            "path": transposition_table_path,
+            "shard_dir": tempfile.mkdtemp(prefix="wordle_tables_"),
+        }
+
+    start = time.perf_counter()
+    with SharedTables() as tables, multiprocessing.Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(
+            prob_func,
+            strategy,
+            word_bank.share(tables),
+            max_tries,
+            decision_tree_path,
+            table_options,
+            trace or trace_path is not None,
+            adversarial,
+            bank_options,
+        ),
+    ) as pool:
+        games = list(pool.imap_unordered(_play_goal, goal_words, chunksize))
+        # let the workers exit on their own so they write their tables
+        pool.close()
+        pool.join()
+    wall_time = time.perf_counter() - start
+    results = [result for result, _ in games]
+    records = [record for _, game_records in games for record in game_records]
+
+    turn_stats = None
+    if trace or trace_path is not None:
+        turn_stats = phase_percentiles(records)
+        if trace_path is not None:
+            with JsonLinesSink(trace_path) as sink:
+                for record in records:
+                    sink.record(record)
+
+    table_stats = None
+    if table_options is not None:
+        table = _merge_tables(table_options)
+        table_stats = table.stats()
+        if transposition_table_path is not None:
+            table.save(transposition_table_path)
+
+    return SimulationReport(results, wall_time, table_stats, turn_stats)
+
+
+def _merge_tables(table_options: Dict[str, str]) -> TranspositionTable:
+    """Merges the tables written by the workers and removes their files"""
+    table = TranspositionTable()
+    if table_options["path"] is not None:
+        table = TranspositionTable.load(table_options["path"])
+        table.reset_counters()
+    shard_dir = table_options["shard_dir"]
+    for name in os.listdir(shard_dir):
+        shard_path = os.path.join(shard_dir, name)
+        table.update(TranspositionTable.load(shard_path))
+        os.remove(shard_path)
+    os.rmdir(shard_dir)
+    return table
@@ -1,15 +1,55 @@
 """
 strategies.py
 """
+import hashlib
+import math
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from random import choice, randint
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from .feedback import (
+    ComputedPatterns,
+    num_patterns,
+    pattern_entropies,
+    sampled_entropies,
+)
 from .probability_functions import ProbabilityFunction
 from .words.word_bank import WordBank
 
 
+def best_guess(
+    scores: np.ndarray, candidates: np.ndarray, guesses: np.ndarray = None
+) -> int:
+    """
+    The guess with the highest score, where ties go to guesses that could still be
+    the goal word, then to the first one
+    :param scores: score of every guess
+    :param candidates: indices of the words that could still be the goal word
+    :param guesses: index of the guess of every score, defaults to the position of
+    the score
+    :return: index of the best guess in the original word bank
+    """
+    best = np.flatnonzero(scores >= scores.max() - 1e-9)
+    if guesses is not None:
+        best = guesses[best]
+    possible = best[np.isin(best, candidates)]
+    return int(possible[0] if len(possible) else best[0])
+
+
 class Strategy(ABC):
     """base class of strategy"""
 
+    # Whether the strategy always chooses the same word for the same word bank,
+    # which is what lets its choices be cached or precomputed
+    deterministic = True
+    # Whether the strategy reads the feedback patterns of the bank, so the feedback
+    # matrix should be loaded before the bank is shared with worker processes
+    reads_patterns = False
+
     @staticmethod
     @abstractmethod
     def choose_next_word(word_bank: WordBank, prob_func: ProbabilityFunction) -> str:
@@ -28,6 +68,8 @@ class RandomAlternating(Strategy):
     Strategy that chooses the word with randomly
     """
 
+    deterministic = False
+
     @staticmethod
     def choose_next_word(word_bank: WordBank, prob_func: ProbabilityFunction) -> str:
         """
@@ -58,8 +100,8 @@ class MinLikelihoodStrategy(Strategy):
         :param prob_func: the probability function to use
         :return: the next word to use
         """
-        fcn = prob_func(word_bank)
-        return min(word_bank, key=fcn.calc_prob)
+        fcn = prob_func.for_word_bank(word_bank)
+        return word_bank[int(np.argmin(fcn.batch_calc_prob(word_bank)))]
 
 
 class MaxLikelihoodStrategy(Strategy):
@@ -75,5 +117,431 @@ class MaxLikelihoodStrategy(Strategy):
         :param prob_func: the probability function to use
         :return: the next word to use
         """
-        fcn = prob_func(word_bank)
-        return max(word_bank, key=fcn.calc_prob)
+        fcn = prob_func.for_word_bank(word_bank)
+        return word_bank[int(np.argmax(fcn.batch_calc_prob(word_bank)))]
+
+
+class EntropyStrategy(Strategy):
+    """
+    Strategy that chooses the guess with the most expected information, which is the
+    entropy of the feedback patterns the guess splits the remaining words into
+    """
+
+    reads_patterns = True
+    # Number of guesses whose pattern histograms are counted at once
+    chunk_size = 512
+
+    @staticmethod
+    def choose_next_word(word_bank: WordBank, prob_func: ProbabilityFunction) -> str:
+        """
+        Given a word bank chooses the word from the original word bank that
+        maximizes the expected information about the goal word. Ties go to words
+        that could still be the goal word. The probability function is not used.
+        :param word_bank: the word bank to choose from
+        :param prob_func: the probability function to use
+        :return: the next word to use
+        """
+        if len(word_bank) <= 2:
+            return word_bank[0]
+
+        patterns = word_bank.pattern_source()
+        entropies = EntropyStrategy.guess_entropies(
+            patterns, word_bank.indices, len(word_bank[0])
+        )
+
+        index = best_guess(entropies, word_bank.indices)
+        return word_bank.original_word_bank[index]
+
+    @staticmethod
+    def guess_entropies(
+        patterns: Union[np.ndarray, ComputedPatterns],
+        candidates: np.ndarray,
+        num_letters: int,
+    ) -> np.ndarray:
+        """
+        Calculates the entropy of the feedback pattern of every guess, in bits,
+        when the goal word is uniformly chosen from the candidates
+        :param patterns: guess by answer matrix of pattern codes, or the
+        ComputedPatterns of banks without one
+        :param candidates: indices of the answers that could be the goal word
+        :param num_letters: number of letters in the words
+        :return: the entropy of each guess (row of patterns)
+        """
+        whole_bank = len(candidates) == patterns.shape[1]
+        entropies = np.empty(len(patterns))
+        for start in range(0, len(patterns), EntropyStrategy.chunk_size):
+            rows = slice(start, start + EntropyStrategy.chunk_size)
+            if isinstance(patterns, ComputedPatterns):
+                codes = patterns.take(rows, candidates)
+            elif whole_bank:
+                codes = patterns[rows]
+            else:
+                codes = patterns[rows][:, candidates]
+            entropies[rows] = pattern_entropies(codes, num_letters)
+        return entropies
+
+
+class SampledEntropyStrategy(Strategy):
+    """
+    Strategy that approximates EntropyStrategy on banks too large to score every
+    guess against every word left. Each guess's entropy is estimated from a random
+    sample of the words left, with a confidence interval, and successive halving
+    then re-scores only the contenders on larger samples: every round keeps the
+    guesses whose interval reaches the best lower bound, at most 1 / eta of them,
+    and samples eta times as many words, until one guess is left or the sample is
+    every word left, where the scores are exact.
+
+    The sample is seeded by the words left, so the same bank always gets the same
+    guess.
+    """
+
+    reads_patterns = True
+    # Words left sampled in the first round
+    sample_size = 512
+    # Each round keeps at most 1 / eta of the guesses and samples eta times more
+    eta = 4
+    # z score of the confidence intervals, 2.576 for 99%
+    z = 2.576
+    # Upper bound on the number of pattern codes gathered at once
+    chunk_cells = 1 << 22
+
+    @classmethod
+    def choose_next_word(
+        cls, word_bank: WordBank, prob_func: ProbabilityFunction
+    ) -> str:
+        """
+        Given a word bank chooses the word from the original word bank with the
+        most estimated entropy. Ties go to words that could still be the goal
+        word. The probability function is not used.
+        :param word_bank: the word bank to choose from
+        :param prob_func: the probability function to use
+        :return: the next word to use
+        """
+        if len(word_bank) <= 2:
+            return word_bank[0]
+
+        patterns = word_bank.pattern_source()
+        seed = int(word_bank.state_digest().split(":")[1][:16], 16)
+        guesses, estimates = cls.successive_halving(
+            patterns, word_bank.indices, len(word_bank[0]), np.random.default_rng(seed)
+        )
+
+        index = best_guess(estimates, word_bank.indices, guesses)
+        return word_bank.original_word_bank[index]
+
+    @classmethod
+    def successive_halving(
+        cls,
+        patterns: Union[np.ndarray, ComputedPatterns],
+        candidates: np.ndarray,
+        num_letters: int,
+        rng: np.random.Generator,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Narrows every guess down to the ones with the most entropy
+        :param patterns: guess by answer matrix of pattern codes, or the
+        ComputedPatterns of banks without one
+        :param candidates: indices of the answers that could be the goal word
+        :param num_letters: number of letters in the words
+        :param rng: random generator the samples are drawn with
+        :return: indices of the guesses left and their estimated entropies
+        """
+        guesses = np.arange(len(patterns))
+        if len(candidates) <= cls.sample_size:
+            entropies = EntropyStrategy.guess_entropies(
+                patterns, candidates, num_letters
+            )
+            return guesses, entropies
+
+        # every round's sample extends the last one
+        order = rng.permutation(candidates)
+        num_samples = cls.sample_size
+        while True:
+            sample = np.sort(order[:num_samples])
+            estimates, margins = cls.entropy_intervals(
+                patterns, guesses, sample, num_letters, len(candidates)
+            )
+            if len(sample) == len(candidates):
+                return guesses, estimates
+
+            lower = estimates - margins
+            upper = estimates + margins
+            contenders = np.flatnonzero(upper >= lower.max())
+            limit = max(1, len(guesses) // cls.eta)
+            if len(contenders) > limit:
+                ranked = np.argsort(-estimates[contenders], kind="stable")
+                contenders = np.sort(contenders[ranked[:limit]])
+            guesses = guesses[contenders]
+            if len(guesses) == 1:
+                return guesses, estimates[contenders]
+            num_samples *= cls.eta
+
+    @classmethod
+    def entropy_intervals(
+        cls,
+        patterns: Union[np.ndarray, ComputedPatterns],
+        guesses: np.ndarray,
+        sample: np.ndarray,
+        num_letters: int,
+        population: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimates the entropy of guesses from the patterns they show on a sample
+        of the answers, chunk_cells patterns at a time
+        :param patterns: guess by answer matrix of pattern codes, or the
+        ComputedPatterns of banks without one
+        :param guesses: indices of the guesses
+        :param sample: indices of the sampled answers
+        :param num_letters: number of letters in the words
+        :param population: number of answers the sample was drawn from
+        :return: the estimated entropy of each guess and the margin of its
+        confidence interval
+        """
+        estimates = np.empty(len(guesses))
+        margins = np.empty(len(guesses))
+        chunk_size = max(1, cls.chunk_cells // len(sample))
+        for start in range(0, len(guesses), chunk_size):
+            rows = guesses[start : start + chunk_size]
+            if isinstance(patterns, ComputedPatterns):
+                codes = patterns.take(rows, sample)
+            else:
+                codes = patterns[np.ix_(rows, sample)]
+            chunk = slice(start, start + len(rows))
+            estimates[chunk], margins[chunk] = sampled_entropies(
+                codes, num_letters, population, cls.z
+            )
+        return estimates, margins
+
+
+class LookaheadStrategy(Strategy):
+    """
+    Strategy that searches a few guesses ahead for the guess with the fewest
+    expected guesses left, an expectimax over the feedback patterns, or with the
+    "worst" criterion the fewest guesses left in the worst case, a minimax. Words
+    left past the search horizon are scored with an estimate from their count.
+
+    At every node only the breadth guesses with the most entropy and the breadth
+    words left that the probability function finds most likely are searched, a
+    guess is cut off once it cannot beat the best one found, and the values of
+    candidate sets are memoized across moves. The search deepens one guess at a
+    time up to max_depth, and plays the best guess of the deepest search that
+    finished within the time budget.
+    """
+
+    # How many guesses ahead to search
+    max_depth = 2
+    # Seconds a move may search for, or None to always search max_depth ahead
+    time_budget = 1.0
+    # Guesses searched at every node, by entropy and by likelihood each
+    breadth = 8
+    # "expected" or "worst" number of guesses left to minimize
+    criterion = "expected"
+    # Bits of information each guess past the search horizon is assumed to give
+    leaf_bits = 4.0
+    # Number of candidate set values memoized, least recently used evicted first
+    max_memo_entries = 100_000
+
+    reads_patterns = True
+    # choices depend on how far the search gets within the time budget
+    deterministic = False
+
+    _memo: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+    @classmethod
+    def choose_next_word(
+        cls, word_bank: WordBank, prob_func: ProbabilityFunction
+    ) -> str:
+        """
+        Given a word bank searches the original word bank for the guess with the
+        fewest guesses left until the goal word is found
+        :param word_bank: the word bank to choose from
+        :param prob_func: the probability function that ranks the words left
+        :return: the next word to use
+        """
+        if len(word_bank) <= 2:
+            return word_bank[0]
+
+        patterns = word_bank.pattern_source()
+        search = _LookaheadSearch(
+            cls,
+            patterns,
+            word_bank.letter_matrix,
+            prob_func,
+            word_bank.state_digest().split(":")[0],
+        )
+        candidates = word_bank.indices
+        # played if not even the first depth finishes, and its pool is reused
+        guess = search.pool(candidates)[0]
+        try:
+            for depth in range(1, cls.max_depth + 1):
+                _, guess = search.value(candidates, depth)
+        except _SearchTimeout:
+            pass
+        return word_bank.original_word_bank[guess]
+
+    @classmethod
+    def estimate(cls, num_candidates: int) -> float:
+        """Guesses left to find the goal word among num_candidates words past the
+        search horizon, exact for one or two words
+        """
+        worst = cls.criterion == "worst"
+        if num_candidates <= 2:
+            return num_candidates if worst else 2 - 1 / num_candidates
+        horizon = math.log2(num_candidates / 2) / cls.leaf_bits
+        return 2 + horizon if worst else 2 - 1 / num_candidates + horizon
+
+
+class _SearchTimeout(Exception):
+    """Raised inside a lookahead search once its time budget is spent"""
+
+
+class _LookaheadSearch:
+    """The search of one LookaheadStrategy move"""
+
+    def __init__(
+        self,
+        strategy: type,
+        patterns: Union[np.ndarray, ComputedPatterns],
+        letter_matrix: np.ndarray,
+        prob_func: ProbabilityFunction,
+        bank_digest: str,
+    ):
+        self.strategy = strategy
+        # plain arrays index faster than memory maps
+        if not isinstance(patterns, ComputedPatterns):
+            patterns = np.asarray(patterns)
+        self.patterns = patterns
+        self.letter_matrix = letter_matrix
+        # a class, or the class of an instance, built for every candidate set
+        if prob_func is not None and not isinstance(prob_func, type):
+            prob_func = type(prob_func)
+        self.prob_func = prob_func
+        self.num_letters = letter_matrix.shape[1]
+        self.solved = num_patterns(self.num_letters) - 1
+        # the probability function picks half of every pool, so it is part of
+        # the key along with the settings that change the values
+        prob_name = "none" if prob_func is None else prob_func.__qualname__
+        self.key_prefix = (
+            f"{bank_digest}:{prob_name}:{strategy.criterion}:{strategy.breadth}:"
+            f"{strategy.leaf_bits}"
+        )
+        self.deadline = math.inf
+        if strategy.time_budget is not None:
+            self.deadline = time.perf_counter() + strategy.time_budget
+        # pools of the candidate sets seen this move, reused by deeper searches
+        self._pools: Dict[bytes, np.ndarray] = {}
+
+    def check_deadline(self) -> None:
+        """Raises _SearchTimeout once the time budget is spent"""
+        if time.perf_counter() > self.deadline:
+            raise _SearchTimeout
+
+    def pool(self, candidates: np.ndarray) -> np.ndarray:
+        """Indices of the guesses searched for a candidate set, most promising
+        first
+        """
+        key = candidates.tobytes()
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = self._build_pool(candidates)
+        return pool
+
+    def _build_pool(self, candidates: np.ndarray) -> np.ndarray:
+        """The guesses with the most entropy and the words most likely to be the
+        goal word, without repeats
+        """
+        breadth = self.strategy.breadth
+        entropies = EntropyStrategy.guess_entropies(
+            self.patterns, candidates, self.num_letters
+        )
+        pool = np.argsort(-entropies, kind="stable")[:breadth]
+        if self.prob_func is not None:
+            letters = self.letter_matrix[candidates]
+            likelihoods = self.prob_func(letters).batch_calc_prob(letters)
+            likely = candidates[np.argsort(-likelihoods, kind="stable")[:breadth]]
+            pool = np.concatenate([pool, likely])
+        _, first = np.unique(pool, return_index=True)
+        return pool[np.sort(first)]
+
+    def value(self, candidates: np.ndarray, depth: int) -> Tuple[float, int]:
+        """
+        Searches depth guesses ahead when the goal word is uniformly one of the
+        candidates
+        :param candidates: sorted indices of the words that could be the goal word
+        :param depth: number of guesses to search ahead
+        :return: the guesses left, and the index of the guess that gets them, or -1
+        past the search horizon
+        """
+        if len(candidates) <= 2 or depth == 0:
+            guess = candidates[0] if len(candidates) <= 2 else -1
+            return self.strategy.estimate(len(candidates)), guess
+
+        memo = self.strategy._memo
+        digest = hashlib.blake2b(candidates.tobytes(), digest_size=16).hexdigest()
+        key = f"{self.key_prefix}:{depth}:{digest}"
+        if key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+
+        # a pool is a full pass over the guesses, so the deadline is checked
+        # around it as well as between guesses
+        self.check_deadline()
+        pool = self.pool(candidates)
+        best = (math.inf, -1)
+        for guess in pool:
+            self.check_deadline()
+            value = self.guess_value(int(guess), candidates, depth, best[0])
+            if value < best[0]:
+                best = (value, int(guess))
+
+        memo[key] = best
+        if len(memo) > self.strategy.max_memo_entries:
+            memo.popitem(last=False)
+        return best
+
+    def guess_value(
+        self, guess: int, candidates: np.ndarray, depth: int, cutoff: float
+    ) -> float:
+        """
+        Guesses left after guessing guess, including it
+        :param guess: index of the guess
+        :param candidates: sorted indices of the words that could be the goal word
+        :param depth: number of guesses to search ahead, including this one
+        :param cutoff: value of the best guess found so far. Once the guess is
+        known not to beat it, a lower bound of its value is returned instead
+        :return: the guesses left, or a lower bound of at least cutoff
+        """
+        if isinstance(self.patterns, ComputedPatterns):
+            codes = self.patterns.take(slice(guess, guess + 1), candidates)[0]
+        else:
+            codes = np.asarray(self.patterns[guess])[candidates]
+        order = np.argsort(codes, kind="stable")
+        ordered = codes[order]
+        starts = np.flatnonzero(ordered[1:] != ordered[:-1]) + 1
+        # stable sorting keeps the indices of every bucket sorted
+        buckets = np.split(candidates[order], starts)
+        bucket_codes = ordered[np.concatenate([[0], starts])]
+        children = [
+            bucket for bucket, code in zip(buckets, bucket_codes) if code != self.solved
+        ]
+        if len(children) == 1 and len(children[0]) == len(candidates):
+            # tells nothing about the goal word
+            return math.inf
+        children.sort(key=len, reverse=True)
+
+        if self.strategy.criterion == "worst":
+            worst = 2 if children else 1
+            for child in children:
+                if worst >= cutoff:
+                    break
+                worst = max(worst, 1 + self.value(child, depth - 1)[0])
+            return worst
+
+        # every word of a child needs at least one more guess
+        expected = 1 + sum(len(child) for child in children) / len(candidates)
+        for child in children:
+            if expected >= cutoff:
+                break
+            child_value = self.value(child, depth - 1)[0]
+            expected += len(child) / len(candidates) * (child_value - 1)
+        return expected
@@ -0,0 +1,144 @@
+#
+# transposition.py
+#
+# memoization of strategy decisions keyed by the candidate set they were made on
+#
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from wordle.probability_functions import ProbabilityFunction
+from wordle.strategies import Strategy
+from wordle.words.word_bank import WordBank
+
+
+def _identity(obj) -> str:
+    """Name of a strategy or probability function, whether a class or an instance"""
+    return obj.__qualname__ if isinstance(obj, type) else str(obj)
+
+
+class TranspositionTable:
+    """
+    Bounded LRU cache of the word a strategy chose for a candidate set. Keys combine
+    the strategy, the probability function and WordBank.state_digest, so games that
+    reach the same remaining words reuse the decision.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, str] = OrderedDict()
+
+    @staticmethod
+    def key(
+        word_bank: WordBank, strategy: Strategy, prob_func: ProbabilityFunction
+    ) -> str:
+        """Key of a decision made by strategy with prob_func on the word bank"""
+        return (
+            f"{_identity(strategy)}|{_identity(prob_func)}|{word_bank.state_digest()}"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached word of key, or None, counting the hit or miss"""
+        word = self._entries.get(key)
+        if word is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return word
+
+    def put(self, key: str, word: str) -> None:
+        """Caches a decision, evicting the least recently used one when full"""
+        self._entries[key] = word
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def update(self, other: "TranspositionTable") -> None:
+        """Adds the entries and counters of another table"""
+        for key, word in other._entries.items():
+            self.put(key, word)
+        self.hits += other.hits
+        self.misses += other.misses
+
+    def reset_counters(self) -> None:
+        """Zeroes the hit and miss counters"""
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counters of the table"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def save(self, path: str) -> None:
+        """Writes the table to a JSON file, least recently used entries first"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "entries": list(self._entries.items()),
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = 100_000) -> "TranspositionTable":
+        """Reads a table written by save, or returns an empty table if the file
+        does not exist yet
+        """
+        table = cls(max_entries)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, word in data["entries"]:
+                table.put(key, word)
+            table.hits, table.misses = data["hits"], data["misses"]
+            logging.debug("Loaded %d strategy decisions from %s", len(table), path)
+        return table
+
+
+class CachedStrategy:
+    """
+    Wraps a strategy so choose_next_word is looked up in a transposition table
+    before running the strategy. Strategies that are not deterministic are always
+    run.
+    """
+
+    def __init__(self, strategy: Strategy, table: TranspositionTable):
+        self.strategy = strategy
+        self.table = table
+        self.deterministic = strategy.deterministic
+        self.__name__ = _identity(strategy)
+
+    def choose_next_word(
+        self, word_bank: WordBank, prob_func: ProbabilityFunction
+    ) -> str:
+        if not self.deterministic:
+            return self.strategy.choose_next_word(word_bank, prob_func)
+
+        key = self.table.key(word_bank, self.strategy, prob_func)
+        word = self.table.get(key)
+        if word is None:
+            word = self.strategy.choose_next_word(word_bank, prob_func)
+            self.table.put(key, word)
+        return word
+
+    def __str__(self):
+        return self.__name__
@@ -7,35 +7,73 @@
 
 import logging
 import random
-from typing import List, Tuple
-from colorama import init, Fore
+import time
+from typing import TYPE_CHECKING, List, Union
 
+import numpy as np
 
-from wordle.constants import LetterState
+from wordle.feedback import Feedback, decode_pattern, num_patterns, score
+from wordle.instrumentation import TraceSink
 from wordle.probability_functions import ProbabilityFunction
 from wordle.strategies import Strategy
 from wordle.words.word_bank import WordBank
-from wordle.helpers import state_to_color
 
-init()
+if TYPE_CHECKING:
+    # only needed for annotations, and pulls in multiprocessing
+    from wordle.decision_tree import DecisionTree
 
 
 class Wordle:
-    """main game loop"""
+    """main game loop
+
+    word_bank_file_path may also be an already loaded WordBank, which the game
+    filters in place. goal_word picks the goal instead of a random word, and
+    render=False plays quietly, printing and logging nothing, so the only output
+    is the GameResult play returns. With a decision_tree, guesses are looked up in
+    the tree until the game leaves it, after which the strategy is used.
+
+    With an enabled trace sink, every turn is timed and recorded to the sink: the
+    seconds spent choosing the guess, updating the probability mappings that follow
+    the bank, and filtering the bank, along with the number of candidates before and
+    after the turn. A first turn's strategy time includes building the mapping.
+
+    Adversarial games, like Absurdle, have no goal word up front. After each guess
+    the game shows the pattern shared by the most words left in the bank, so the
+    strategy faces its worst case, and the bank is filtered to those words. The
+    game is solved once only the guessed word is left. If the game is lost, the
+    goal word is set to a word that is consistent with all the feedback.
+    """
 
     def __init__(
         self,
         prob_func: ProbabilityFunction,
         strategy: Strategy,
-        word_bank_file_path: str,
+        word_bank_file_path: Union[str, WordBank],
         max_tries: int,
         filter_bank=True,
+        use_feedback_matrix=False,
+        array_backed=False,
+        use_bitsets=False,
+        goal_word: str = None,
+        render=True,
+        decision_tree: "DecisionTree" = None,
+        trace: TraceSink = None,
+        adversarial=False,
     ):
         self.prob_func = prob_func
         self.strategy = strategy
-        self.word_bank = WordBank(word_bank_file_path)
+        if isinstance(word_bank_file_path, WordBank):
+            self.word_bank = word_bank_file_path
+        else:
+            self.word_bank = WordBank(
+                word_bank_file_path, use_feedback_matrix, array_backed, use_bitsets
+            )
         self.max_tries = max_tries
         self.filter_bank = filter_bank
+        self.render = render
+        self.decision_tree = decision_tree
+        self.trace = trace
+        self.adversarial = adversarial
 
         logging.debug(
             "Wordle initialized with \n"
@@ -48,83 +86,188 @@ class Wordle:
         )
 
         self.game_finished = False
+        self.solved = False
         self.guesses = []
         self.guess_states = []
 
-        self.goal_word = random.choice(self.word_bank)
+        self.goal_word = None
+        if not adversarial:
+            self.goal_word = goal_word or random.choice(self.word_bank)
         logging.debug("Goal word: %s", self.goal_word)
 
         self.tries = 0
 
-    def get_guess_state(self, guess: str) -> List[Tuple[str, LetterState]]:
+    def get_guess_state(self, guess: str) -> Feedback:
         """Given a letter guess, return the Wordle colors of each letter after the
         guess was submitted. In other words the colors of the tiles after they flipped.
         :param: guess a str containing the guess
-        :return: a list of tuples containing the letter and its color state.
+        :return: the Feedback of the guess, which iterates as (letter, state) tuples
 
-        for example this might return
+        for example this might iterate as
         [("f", LetterState.Green), ("o", LetterState.Yellow), ("o", LetterState.Grey)]
         """
-        _goal_word = list(self.goal_word)
-        guess_state = [0] * len(self.goal_word)
-        for i, letter in enumerate(guess):
-            if letter == _goal_word[i]:
-                guess_state[i] = (letter, LetterState.GREEN)
-                _goal_word[i] = ""
-
-        for i, letter in enumerate(guess):
-            if letter in _goal_word:
-                guess_state[i] = (letter, LetterState.YELLOW)
-                _goal_word[i] = ""
+        matrix = self.word_bank.feedback_matrix
+        if matrix is not None and guess in matrix and self.goal_word in matrix:
+            return Feedback(guess, matrix.pattern(guess, self.goal_word))
+        return Feedback(guess, score(guess, self.goal_word))
 
-        for i, letter in enumerate(guess):
-            if guess_state[i] == 0:
-                guess_state[i] = (letter, LetterState.GREY)
-
-        return guess_state
+    def get_adversarial_state(self, guess: str) -> Feedback:
+        """The guess state of an adversarial game: the pattern of the guess shared
+        by the most words left in the bank. Bucket sizes of every pattern are
+        counted in one pass over the bank, and ties go to the lowest pattern code.
+        :param guess: the guessed word
+        :return: the Feedback of the guess
+        """
+        codes = self.word_bank.guess_patterns(guess)
+        sizes = np.bincount(codes, minlength=num_patterns(len(guess)))
+        code = int(np.argmax(sizes))
+        if code == num_patterns(len(guess)) - 1:
+            self.goal_word = guess
+        return decode_pattern(guess, code)
 
     def print_state(self):
         """prints all the guesses in their guess state format"""
         for guess_state in self.guess_states:
-            for letter, state in guess_state:
-                print(state_to_color(state) + letter, end="")
-            print(Fore.WHITE)
+            print_guess_state(guess_state)
 
     def player_guess(self):
         """get guess from input"""
         guess = input("Guess: ")
         return self.get_guess_state(guess)
 
-    def play(self):
-        """Run the game loop"""
-        logging.info("Starting Game")
+    def play(self) -> "GameResult":
+        """Run the game loop
+        :return: the outcome of the game
+        """
+        # quiet games skip the log calls too, so they do no terminal I/O at all
+        log = logging.info if self.render else _no_log
+        log("Starting Game")
 
         self.guesses = []
+        self.patterns = []
+        node = self.decision_tree.ROOT if self.decision_tree is not None else None
+        tracing = self.trace is not None and self.trace.enabled
         while not self.game_finished:
             self.tries += 1
             if self.tries > self.max_tries:
-                logging.info(
-                    "Game over, failed to get goal word: %s", self.goal_word.upper()
-                )
-                logging.info("Guesses: %s", self.guesses)
+                if self.adversarial:
+                    self.goal_word = self.word_bank[0]
+                log("Game over, failed to get goal word: %s", self.goal_word.upper())
+                log("Guesses: %s", self.guesses)
                 self.game_finished = True
             else:
-                guess = self.strategy.choose_next_word(self.word_bank, self.prob_func)
+                if tracing:
+                    candidates_before = len(self.word_bank)
+                    listener_time = self.word_bank.listener_time
+                    turn_start = time.perf_counter()
+                if node is not None:
+                    guess = self.decision_tree.guess(node)
+                else:
+                    guess = self.strategy.choose_next_word(
+                        self.word_bank, self.prob_func
+                    )
+                if tracing:
+                    strategy_time = time.perf_counter() - turn_start
                 self.guesses.append(guess.upper())
 
-                logging.info("Guess %d: %s", self.tries, guess)
+                log("Guess %d: %s", self.tries, guess)
 
-                guess_state = self.get_guess_state(guess)
+                if self.adversarial:
+                    guess_state = self.get_adversarial_state(guess)
+                else:
+                    guess_state = self.get_guess_state(guess)
                 self.guess_states.append(guess_state)
+                code = guess_state.code
+                self.patterns.append(code)
+
+                if node is not None:
+                    node = self.decision_tree.child(node, code)
 
-                # Print the guesses wordle style
-                self.print_state()
+                # Print the new guess wordle style, below the earlier ones
+                if self.render:
+                    print_guess_state(guess_state)
 
-                if self.filter_bank:
+                if tracing:
+                    filter_start = time.perf_counter()
+                if self.filter_bank or self.adversarial:
                     self.word_bank.filter_bank(guess_state)
-                else:
+                elif guess in self.word_bank:
+                    # strategies like EntropyStrategy may guess words that were
+                    # already removed
                     self.word_bank.remove(guess)
+                if tracing:
+                    filter_time = time.perf_counter() - filter_start
+                    mapping_time = self.word_bank.listener_time - listener_time
+                    self.trace.record(
+                        {
+                            "goal_word": self.goal_word,
+                            "turn": self.tries,
+                            "guess": guess,
+                            "candidates_before": candidates_before,
+                            "candidates_after": len(self.word_bank),
+                            "strategy_time": strategy_time,
+                            "mapping_time": mapping_time,
+                            "filter_time": filter_time - mapping_time,
+                        }
+                    )
 
             if guess == self.goal_word:
-                logging.info("Got the goal word after %d tries", self.tries)
+                log("Got the goal word after %d tries", self.tries)
                 self.game_finished = True
+                self.solved = True
+
+        return GameResult(
+            self.goal_word,
+            [guess.lower() for guess in self.guesses],
+            self.patterns,
+            self.solved,
+        )
+
+
+class GameResult:
+    """Outcome of a game, with no terminal output needed to get it"""
+
+    def __init__(
+        self, goal_word: str, guesses: List[str], patterns: List[int], solved: bool
+    ):
+        """
+        :param goal_word: the word being guessed
+        :param guesses: the words guessed, in order
+        :param patterns: the pattern code shown for each guess
+        :param solved: whether the last guess was the goal word
+        """
+        self.goal_word = goal_word
+        self.guesses = guesses
+        self.patterns = patterns
+        self.solved = solved
+
+    @property
+    def tries(self) -> int:
+        """Number of guesses made"""
+        return len(self.guesses)
+
+    def __repr__(self):
+        return (
+            f"GameResult(goal_word={self.goal_word!r}, guesses={self.guesses}, "
+            f"solved={self.solved}, tries={self.tries})"
+        )
+
+
+def _no_log(*args) -> None:
+    """Stands in for logging.info in quiet games"""
+
+
+def print_guess_state(guess_state: Feedback) -> None:
+    """Prints one guess wordle style, initializing colorama the first time"""
+    from colorama import Fore
+
+    from wordle.helpers import init_terminal, state_to_color
+
+    init_terminal()
+    print(
+        "".join(
+            state_to_color(digit) + letter
+            for letter, digit in zip(guess_state.guess, guess_state.digits())
+        )
+        + Fore.WHITE
+    )
@@ -1 +1 @@
-__all__ = ["word_bank"]
+__all__ = ["compiled_bank", "word_bank"]
@@ -0,0 +1,117 @@
+#
+# bank_statistics.py
+#
+# letter statistics of word banks, cached by a content hash of the words counted
+#
+
+import logging
+import os
+from collections import OrderedDict
+from typing import Callable, Dict
+
+import numpy as np
+
+from wordle.constants import ALPHABET
+
+
+def letter_counts(letters: np.ndarray) -> np.ndarray:
+    """Counts how often each letter in ALPHABET appears in a letter matrix
+    :param letters: N by L letter matrix of the words
+    :return: array of the count of each letter in ALPHABET
+    """
+    return np.bincount(letters.ravel(), minlength=len(ALPHABET))
+
+
+def position_counts(letters: np.ndarray) -> np.ndarray:
+    """Counts how often each letter in ALPHABET appears at each position
+    :param letters: N by L letter matrix of the words
+    :return: L by 26 array of counts
+    """
+    num_letters = letters.shape[1]
+    positions = np.arange(num_letters) * len(ALPHABET)
+    counts = np.bincount(
+        (letters + positions).ravel(), minlength=num_letters * len(ALPHABET)
+    )
+    return counts.reshape(num_letters, len(ALPHABET))
+
+
+class StatisticsCache:
+    """
+    Bounded LRU cache of statistics computed from word banks, keyed by the name of
+    the statistic and a content hash of the words it was computed from, so new
+    banks and new games on the same words reuse them. Statistics given a path are
+    also saved as .npy files there, so other processes load them instead of
+    computing them again.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, np.ndarray] = OrderedDict()
+
+    def get(
+        self, key: str, compute: Callable[[], np.ndarray], path: str = None
+    ) -> np.ndarray:
+        """The cached statistic of key, loading it from path or computing it on a
+        miss. Cached arrays are read only since they are shared by every caller.
+        :param key: name of the statistic and hash of the words it is computed from
+        :param compute: computes the statistic
+        :param path: .npy file the statistic is saved to, if any
+        :return: the statistic
+        """
+        statistic = self._entries.get(key)
+        if statistic is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return statistic
+
+        self.misses += 1
+        statistic = _load(path) if path is not None else None
+        if statistic is None:
+            statistic = np.asarray(compute())
+            if path is not None:
+                _save(path, statistic)
+        statistic.setflags(write=False)
+        self._entries[key] = statistic
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return statistic
+
+    def clear(self) -> None:
+        """Drops every entry from memory, leaving the saved files"""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Cache shared by every word bank of the process
+STATISTICS = StatisticsCache()
+
+
+def _load(path: str):
+    """The statistic saved at path, or None if there is none or it is unreadable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return np.load(path)
+    except (OSError, ValueError) as e:
+        logging.debug("Ignoring unreadable statistic %s: %s", path, e)
+        return None
+
+
+def _save(path: str, statistic: np.ndarray) -> None:
+    """Saves a statistic, leaving nothing behind if the file can not be written.
+    Worker processes may save the same statistic at once, so each writes its own
+    temporary file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.save(f, statistic)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logging.debug("Could not save statistic %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,83 @@
+#
+# compiled_bank.py
+#
+# Binary word bank format: a memory mappable letter matrix next to the text bank
+#
+
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from wordle.feedback import to_letter_matrix, words_digest
+
+
+def compiled_paths(file_path: str) -> Tuple[str, str]:
+    """Paths of the compiled letter matrix and its metadata for a text word bank
+    :param file_path: path to the newline separated word bank
+    :return: (path to the .npy letter matrix, path to the .json metadata)
+    """
+    stem = os.path.splitext(str(file_path))[0]
+    return f"{stem}.bank.npy", f"{stem}.bank.json"
+
+
+def compile_bank(file_path: str, words: List[str] = None) -> str:
+    """Writes the compiled form of a text word bank. The letter matrix is a
+    fixed width uint8 .npy file, and the metadata holds the word count, word length,
+    content hash of the words and the size and modification time of the text file
+    it was compiled from.
+    :param file_path: path to the newline separated word bank
+    :param words: the words of the bank, read from file_path if not given
+    :return: path to the compiled letter matrix
+    """
+    if words is None:
+        with open(file_path, "r", encoding="utf-8") as f:
+            words = f.read().split()
+    matrix_path, metadata_path = compiled_paths(file_path)
+    letters = to_letter_matrix(words)
+    source = os.stat(file_path)
+
+    np.save(f"{matrix_path}.tmp.npy", letters)
+    os.replace(f"{matrix_path}.tmp.npy", matrix_path)
+    with open(f"{metadata_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "num_words": letters.shape[0],
+                "num_letters": letters.shape[1],
+                "digest": words_digest(words),
+                "source_size": source.st_size,
+                "source_mtime_ns": source.st_mtime_ns,
+            },
+            f,
+            indent=2,
+        )
+    os.replace(f"{metadata_path}.tmp", metadata_path)
+    return matrix_path
+
+
+def load_compiled_bank(file_path: str) -> Optional[Tuple[np.ndarray, str]]:
+    """Memory maps the compiled form of a text word bank if it is up to date, that
+    is if the text file has not changed size or been modified since compiling.
+    :param file_path: path to the newline separated word bank
+    :return: (read only letter matrix, content hash of the words), or None when
+    there is no up to date compiled bank
+    """
+    matrix_path, metadata_path = compiled_paths(file_path)
+    try:
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        source = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    if (
+        metadata["source_size"] != source.st_size
+        or metadata["source_mtime_ns"] != source.st_mtime_ns
+        or not os.path.exists(matrix_path)
+    ):
+        return None
+
+    letters = np.load(matrix_path, mmap_mode="r")
+    if letters.shape != (metadata["num_words"], metadata["num_letters"]):
+        return None
+    return letters, metadata["digest"]
@@ -3,40 +3,168 @@
 #
 # Used to generate new word banks for different wordle strategies/games
 #
-# TODO:
-#  - Add Cmd line arguments
-#
 
+import argparse
+import logging
+import multiprocessing
 import os
-from typing import List
+from collections import deque
+from multiprocessing.pool import Pool
+from typing import Callable, Dict, Iterable, Iterator, List, TextIO, Tuple
 
-import numpy as np
+from wordle.words.compiled_bank import compile_bank
 
 # Path to the directory this file is in
 PACKAGE_DIR = os.path.dirname(__file__)
 
 # Wordle bank directories
-WIKIPEDIA_DIR = os.path.join(PACKAGE_DIR, "words/wikipedia/")
-WORDLE_BANK_DIR = os.path.join(PACKAGE_DIR, "words/wordle")
+WIKIPEDIA_DIR = os.path.join(PACKAGE_DIR, "wikipedia")
+WORDLE_BANK_DIR = os.path.join(PACKAGE_DIR, "wordle")
 
 # WIKIPEDIA FILES
 WIKIPEDIA_WORD_FILE = os.path.join(WIKIPEDIA_DIR, "words_alpha.txt")
-SUBSET_FILE_TEMPLATE = os.path.join(WIKIPEDIA_DIR, "{}_letter_words.txt")
+SUBSET_FILE_TEMPLATE = "{}_letter_words.txt"
+UNIQUE_SUBSET_FILE_TEMPLATE = "unique_{}_letter_words.txt"
+
+# Size hint in bytes of each chunk of lines read from the source file
+CHUNK_SIZE = 1 << 20
+
+# Words of each length in a chunk, as (word, whether all its letters are unique)
+ChunkWords = Dict[int, List[Tuple[str, bool]]]
+
+
+def read_chunks(words_file: str, chunk_size: int = CHUNK_SIZE) -> Iterator[List[str]]:
+    """Streams the lines of a file in chunks of about chunk_size bytes"""
+    with open(words_file, "r", encoding="utf-8") as f:
+        while True:
+            lines = f.readlines(chunk_size)
+            if not lines:
+                return
+            yield lines
+
+
+def bounded_imap(
+    pool: Pool,
+    func: Callable,
+    items: Iterable,
+    window: int,
+) -> Iterator:
+    """Ordered pool.imap that reads at most window items ahead of the results, so
+    streaming a large file does not queue all of it in memory
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def normalize_chunk(lines: List[str]) -> ChunkWords:
+    """Lowercases the words of a chunk and groups them by length, dropping blank
+    lines and words with characters other than the letters a to z.
+    :param lines: lines of the source file, one word per line
+    :return: words of each length in the order they appear in the chunk
+    """
+    words: ChunkWords = {}
+    for line in lines:
+        word = line.strip().lower()
+        if word and word.isascii() and word.isalpha():
+            words.setdefault(len(word), []).append((word, len(set(word)) == len(word)))
+    return words
+
+
+def _open_banks(output_dir: str, num_letters: int) -> List[TextIO]:
+    """Opens the bank and unique letter bank of a word length for writing"""
+    return [
+        open(
+            os.path.join(output_dir, template.format(num_letters)),
+            "w",
+            encoding="utf-8",
+        )
+        for template in (SUBSET_FILE_TEMPLATE, UNIQUE_SUBSET_FILE_TEMPLATE)
+    ]
+
+
+def generate_banks(
+    words_file: str,
+    output_dir: str,
+    lengths: Iterable[int] = None,
+    processes: int = None,
+    chunk_size: int = CHUNK_SIZE,
+    compile_banks: bool = True,
+) -> Dict[str, int]:
+    """Writes the word bank of every word length found in words_file, along with
+    its unique letter variant, in a single pass over the file. Words are lowercased
+    and deduplicated, keeping the first occurrence, and each bank is compiled once
+    it is written.
+    :param words_file: path to the source file of newline separated words
+    :param output_dir: directory the banks are written to
+    :param lengths: only write banks of these word lengths, defaults to every length
+    :param processes: normalize chunks in a pool of this many worker processes,
+    defaults to normalizing in this process
+    :param chunk_size: size hint in bytes of each chunk read from words_file
+    :param compile_banks: whether to also write the compiled form of each bank
+    :return: number of words written to each bank file
+    """
+    lengths = None if lengths is None else set(lengths)
+    os.makedirs(output_dir, exist_ok=True)
+    files = {}
+    seen: Dict[int, set] = {}
+    banks: Dict[str, List[str]] = {}
+
+    pool = multiprocessing.Pool(processes) if processes else None
+    try:
+        chunks = read_chunks(words_file, chunk_size)
+        normalized = (
+            bounded_imap(pool, normalize_chunk, chunks, 4 * processes)
+            if pool
+            else map(normalize_chunk, chunks)
+        )
+        for chunk in normalized:
+            for num_letters, words in chunk.items():
+                if lengths is not None and num_letters not in lengths:
+                    continue
+                if num_letters not in files:
+                    files[num_letters] = _open_banks(output_dir, num_letters)
+                    seen[num_letters] = set()
+                subset_f, unique_f = files[num_letters]
+                new_words = []
+                for word, unique in words:
+                    if word not in seen[num_letters]:
+                        seen[num_letters].add(word)
+                        new_words.append((word, unique))
+                subset = [word for word, _ in new_words]
+                unique_subset = [word for word, unique in new_words if unique]
+                subset_f.write("".join(f"{word}\n" for word in subset))
+                unique_f.write("".join(f"{word}\n" for word in unique_subset))
+                banks.setdefault(subset_f.name, []).extend(subset)
+                banks.setdefault(unique_f.name, []).extend(unique_subset)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for bank_files in files.values():
+            for f in bank_files:
+                f.close()
+
+    for path, words in banks.items():
+        if compile_banks and words:
+            compile_bank(path, words)
+        logging.info("Wrote %d words to %s", len(words), path)
+    return {path: len(words) for path, words in banks.items()}
 
 
 def generate_wikipedia_words_subset(num_letters: int, words_file: str) -> None:
     """Generate a new file that only has words found in words_file of length
-    num_letters.
+    num_letters, along with its unique letter variant.
     :param num_letters: number of letters words should have in new file
     :param words_file: path to the a text file containing the words to sift
     through, it is expected that the words in words_file will be newline
     seperated
     """
-    with open(SUBSET_FILE_TEMPLATE.format(num_letters), "w+", encoding="utf-8") as f:
-        for word in open(words_file, "r"):
-            word = word.replace("\n", "")  # Remove new lines
-            if len(word) == num_letters:
-                f.write(f"{word}\n")
+    generate_banks(words_file, WIKIPEDIA_DIR, lengths=[num_letters])
 
 
 def generate_words_with_unique_letters(words_file) -> None:
@@ -59,12 +187,43 @@ def generate_words_with_unique_letters(words_file) -> None:
         with open(unique_file_name, "w+", encoding="utf-8") as unique_f:
             for word in f:
                 word = word.replace("\n", "")
-                if len(np.unique(list(word))) == len(word):
+                if len(set(word)) == len(word):
                     unique_f.write(word + "\n")
 
 
 def main():
-    pass
+    parser = argparse.ArgumentParser(
+        description="Generate word banks of every word length from a dictionary"
+    )
+    parser.add_argument(
+        "words_file",
+        nargs="?",
+        help="Newline separated source words",
+        default=WIKIPEDIA_WORD_FILE,
+    )
+    parser.add_argument(
+        "-o", "--output_dir", help="Directory to write to", default=WIKIPEDIA_DIR
+    )
+    parser.add_argument(
+        "-l",
+        "--lengths",
+        type=int,
+        nargs="+",
+        help="Word lengths to write banks for, defaults to every length",
+        default=None,
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Number of worker processes normalizing chunks",
+        default=None,
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    generate_banks(
+        args.words_file, args.output_dir, args.lengths, processes=args.processes
+    )
 
 
 if __name__ == "__main__":
@@ -1,24 +1,373 @@
 """
 word_bank.py
 """
-from typing import List, Tuple
+import copy
+import hashlib
+import logging
+import os
+import time
+from typing import Callable, List, Union
 
+import numpy as np
+
+from wordle.candidates import CandidateSet, PartitionIndex
 from wordle.constants import ALPHABET, LetterState
+from wordle.feedback import (
+    ComputedPatterns,
+    Feedback,
+    FeedbackMatrix,
+    GuessState,
+    compute_patterns,
+    from_letter_matrix,
+    to_letter_matrix,
+    words_digest,
+)
+from wordle.shared_tables import SharedBank, SharedTables
+from wordle.words.bank_statistics import STATISTICS, position_counts
+from wordle.words.compiled_bank import load_compiled_bank
 
 
 class WordBank:
     """
     WordBank that contains a list of words. Treat as a list with some extra goodies
     like filtering and loading from file.
+
+    When array backed, the original word bank is also held as an N by L letter
+    matrix and the remaining words as their indices into it, so filtering is done
+    with boolean masks over the whole bank instead of per word.
+
+    With bitsets, the remaining words are also held as a CandidateSet, and filtering
+    by a guess from the bank is an AND with a precomputed partition of the bank. The
+    word list and indices are only rebuilt from the set when they are read.
+
+    Banks compiled with compile_bank are loaded from their memory mapped letter
+    matrix when the compiled file is up to date with the text file, and banks of
+    worker processes are loaded from the tables their parent shared.
     """
 
-    def __init__(self, file_path):
-        self.original_word_bank = self.load_words(file_path)
+    def __init__(
+        self,
+        file_path,
+        use_feedback_matrix=False,
+        array_backed=False,
+        use_bitsets=False,
+        shared: SharedBank = None,
+    ):
+        self.file_path = file_path
+        # memory mapped letter matrix of the compiled bank, if there is one
+        self._compiled_letters = None
+        self._original_digest = None
+        if shared is not None:
+            compiled = shared.letters.attach(), shared.digest
+        else:
+            compiled = load_compiled_bank(file_path)
+        if compiled is not None:
+            self._compiled_letters, self._original_digest = compiled
+            self.original_word_bank = from_letter_matrix(self._compiled_letters)
+        else:
+            self.original_word_bank = self.load_words(file_path)
         self.word_bank = self.original_word_bank.copy()
 
+        # letter matrix of the original word bank and indices of the words left in
+        # the bank, only set when the bank is array backed
+        self.letter_matrix = None
+        self._indices = None
+        self.feedback_matrix = None
+        self.candidates = None
+        self.partitions = None
+        if array_backed or use_feedback_matrix or use_bitsets:
+            self._init_arrays()
+        if shared is not None and shared.patterns is not None:
+            if use_feedback_matrix or use_bitsets:
+                self.feedback_matrix = FeedbackMatrix(
+                    self.original_word_bank, shared.patterns.attach()
+                )
+        if (use_feedback_matrix or use_bitsets) and not self.feedback_matrix_fits():
+            # banks of long words filter with the letter matrix instead
+            logging.warning(
+                "The feedback matrix of %s is too large, patterns are computed "
+                "on the fly",
+                file_path,
+            )
+        else:
+            if use_feedback_matrix:
+                self.load_feedback_matrix()
+            if use_bitsets:
+                self.load_partitions()
+
+        # objects told about every change to the words left in the bank, and the
+        # total seconds spent telling them about removed words
+        self.listeners = []
+        self.listener_time = 0.0
+        self._positions = None
+
+    def fork(self) -> "WordBank":
+        """A bank of the same original words that shares this bank's letter
+        matrix, feedback matrix and partitions, but has its own words left, reset
+        to all of them, and no listeners. Used to follow several goal words at once
+        without loading the precomputed data of the bank again.
+        """
+        bank = copy.copy(self)
+        bank.listeners = []
+        bank.listener_time = 0.0
+        bank.reset_bank()
+        return bank
+
+    def share(self, tables: SharedTables) -> SharedBank:
+        """Publishes the letter matrix of the bank, and its feedback matrix if it is
+        loaded, for worker processes to load their banks from with
+        WordBank(shared.file_path, shared=shared) instead of each building its own.
+        :param tables: the tables to publish to, which must stay open while workers
+        start
+        :return: picklable handle of the tables
+        """
+        self._init_arrays()
+        digest = self.original_digest()
+        patterns = None
+        if self.feedback_matrix is not None:
+            patterns = tables.publish("feedback", self.feedback_matrix.patterns, digest)
+        return SharedBank(
+            self.file_path,
+            digest,
+            tables.publish("letters", self.letter_matrix, digest),
+            patterns,
+        )
+
+    def subscribe(self, listener) -> None:
+        """Registers a listener that follows the words left in the bank. After
+        filter_bank or remove, listener.words_removed(letters) is called with the
+        letter matrix of the words that were removed, and after reset_bank,
+        listener.bank_reset() is called.
+        """
+        self.listeners.append(listener)
+
+    def state_digest(self) -> str:
+        """Hash identifying the original word bank and which of its words are left.
+        Banks with the same words left have the same digest whether or not they are
+        array backed.
+        """
+        if self.candidates is not None:
+            remaining = self.candidates
+        elif self.array_backed:
+            remaining = CandidateSet.from_indices(
+                self.indices, len(self.original_word_bank)
+            )
+        else:
+            if self._positions is None:
+                self._positions = {
+                    word: i for i, word in enumerate(self.original_word_bank)
+                }
+            remaining = CandidateSet.from_indices(
+                [self._positions[word] for word in self.word_bank],
+                len(self.original_word_bank),
+            )
+        remaining_digest = hashlib.blake2b(remaining.to_bytes(), digest_size=16)
+        return f"{self.original_digest()[:16]}:{remaining_digest.hexdigest()}"
+
+    def original_digest(self) -> str:
+        """Content hash of the original word bank, see words_digest"""
+        if self._original_digest is None:
+            self._original_digest = words_digest(self.original_word_bank)
+        return self._original_digest
+
+    def statistic(
+        self, name: str, compute: Callable[[np.ndarray], np.ndarray]
+    ) -> np.ndarray:
+        """A statistic of the words left in the bank, from the process wide
+        STATISTICS cache when it was computed from the same words before. The
+        statistics of the whole bank are keyed by its content hash and saved next
+        to the word bank file, those of array backed banks with words removed are
+        keyed by state_digest, and those of other banks with words removed are
+        computed every time since hashing their words costs more than counting
+        them.
+        :param name: name of the statistic, unique per compute function
+        :param compute: computes the statistic from the letter matrix of the words
+        :return: the statistic, which is read only
+        """
+        if len(self) == len(self.original_word_bank):
+            digest = self.original_digest()
+            stem = os.path.splitext(str(self.file_path))[0]
+            path = f"{stem}.{name}.{digest[:12]}.npy"
+        elif self.array_backed:
+            digest = self.state_digest()
+            path = None
+        else:
+            return compute(self._letters_left())
+
+        return STATISTICS.get(
+            f"{name}:{digest}", lambda: compute(self._letters_left()), path
+        )
+
+    def _letters_left(self) -> np.ndarray:
+        """Letter matrix of the words left, whether or not the bank is array backed"""
+        if self.array_backed:
+            return self.letters
+        return to_letter_matrix(self.word_bank)
+
+    def _notify_removed(self, letters: np.ndarray) -> None:
+        if len(letters) == 0 or not self.listeners:
+            return
+        start = time.perf_counter()
+        for listener in self.listeners:
+            listener.words_removed(letters)
+        self.listener_time += time.perf_counter() - start
+
+    def load_feedback_matrix(self) -> FeedbackMatrix:
+        """Memory maps the feedback matrix of the original word bank, building and
+        caching it next to the word bank file on first use. Once loaded, filtering
+        by guesses from the bank is a lookup in the matrix.
+        """
+        if self.feedback_matrix is None:
+            self.feedback_matrix = FeedbackMatrix.load_or_build(
+                self.original_word_bank, self.file_path
+            )
+            self._init_arrays()
+        return self.feedback_matrix
+
+    def feedback_matrix_fits(self) -> bool:
+        """Whether the feedback matrix is loaded, or small enough to be built"""
+        self._init_arrays()
+        return self.feedback_matrix is not None or FeedbackMatrix.fits(
+            *self.letter_matrix.shape
+        )
+
+    def pattern_source(self) -> Union[np.ndarray, ComputedPatterns]:
+        """The pattern codes of every guess against every answer of the original
+        word bank, for strategies that score guesses by their patterns. This is the
+        feedback matrix, loaded or built if it fits, and otherwise a
+        ComputedPatterns that computes the codes when they are taken.
+        :return: the guess by answer codes
+        """
+        if self.feedback_matrix_fits():
+            return self.load_feedback_matrix().patterns
+        return ComputedPatterns(self.letter_matrix)
+
+    def load_partitions(self) -> PartitionIndex:
+        """Switches the bank to holding the remaining words as a CandidateSet that
+        is filtered with the (guess, pattern) partitions of the feedback matrix.
+        """
+        if self.partitions is None:
+            self.partitions = PartitionIndex(self.load_feedback_matrix())
+            self.candidates = CandidateSet.from_indices(
+                self.indices, len(self.original_word_bank)
+            )
+        return self.partitions
+
+    def load_letter_matrix(self) -> np.ndarray:
+        """Switches the bank to being array backed, for callers that index the
+        original word bank by position
+        :return: the N by L letter matrix of the original word bank
+        """
+        self._init_arrays()
+        return self.letter_matrix
+
+    def _init_arrays(self) -> None:
+        """Switches the bank to being array backed"""
+        if self.letter_matrix is None:
+            if self._compiled_letters is not None:
+                self.letter_matrix = self._compiled_letters
+            else:
+                self.letter_matrix = to_letter_matrix(self.original_word_bank)
+            self._word_array = np.array(self.original_word_bank, dtype=object)
+            position = {word: i for i, word in enumerate(self.original_word_bank)}
+            self._indices = np.array(
+                [position[word] for word in self.word_bank], dtype=np.int64
+            )
+
+    @property
+    def word_bank(self) -> List[str]:
+        """The words left in the bank"""
+        if self._word_bank is None:
+            self._set_indices(self.candidates.indices(), self.candidates)
+        return self._word_bank
+
+    @word_bank.setter
+    def word_bank(self, word_bank: List[str]) -> None:
+        self._word_bank = word_bank
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Indices of the words left in the bank, only for array backed banks"""
+        if self._indices is None and self.candidates is not None:
+            self._set_indices(self.candidates.indices(), self.candidates)
+        return self._indices
+
+    @property
+    def array_backed(self) -> bool:
+        """Whether the bank is held as a letter matrix"""
+        return self.letter_matrix is not None
+
+    @property
+    def letters(self) -> np.ndarray:
+        """Letter matrix of the words left in the bank, only for array backed banks"""
+        return self.letter_matrix[self.indices]
+
+    def _set_indices(self, indices: np.ndarray, candidates=None) -> None:
+        """Sets the remaining words from their indices in the original word bank"""
+        self._indices = indices
+        self._word_bank = self._word_array[indices].tolist()
+        if self.partitions is not None and candidates is None:
+            candidates = CandidateSet.from_indices(
+                indices, len(self.original_word_bank)
+            )
+        self.candidates = candidates
+
+    def _set_candidates(self, candidates: CandidateSet) -> None:
+        """Sets the remaining words, leaving the word list and indices to be
+        rebuilt when they are next read
+        """
+        self.candidates = candidates
+        self._indices = None
+        self._word_bank = None
+
+    def set_remaining(self, indices: np.ndarray) -> None:
+        """Sets the words left in the bank to the given indices into the original
+        word bank, for search code that moves between candidate sets. Since this is
+        not only a removal, listeners are rebuilt with bank_reset.
+        """
+        self._init_arrays()
+        self._set_indices(np.asarray(indices, dtype=np.int64))
+        for listener in self.listeners:
+            listener.bank_reset()
+
     def reset_bank(self) -> None:
         """Resets the word bank to the original word bank."""
         self.word_bank = self.original_word_bank.copy()
+        if self.array_backed:
+            self._indices = np.arange(len(self.original_word_bank))
+        if self.partitions is not None:
+            self.candidates = CandidateSet.full(len(self.original_word_bank))
+        for listener in self.listeners:
+            listener.bank_reset()
+
+    def guess_patterns(self, guess: str) -> np.ndarray:
+        """Pattern code of the guess against every word left in the bank, from the
+        feedback matrix when the guess is in it, otherwise computed from the letter
+        matrix in one vectorized pass. Switches the bank to being array backed.
+        :param guess: the guessed word
+        :return: pattern codes in the order of indices
+        """
+        self._init_arrays()
+        if self.feedback_matrix is not None and guess in self.feedback_matrix:
+            row = self.feedback_matrix.patterns[self.feedback_matrix.index[guess]]
+            return np.asarray(row[self.indices])
+        return compute_patterns(to_letter_matrix([guess]), self.letters)[0]
+
+    def replay_guesses(self, guesses: List[GuessState]) -> None:
+        """Resets the bank and filters it by every guess in turn. Listeners are
+        rebuilt once at the end with bank_reset, from the few words left, instead of
+        following every reset and filter.
+        :param guesses: guess states, in the order they were guessed
+        """
+        listeners, self.listeners = self.listeners, []
+        try:
+            self.reset_bank()
+            for guess in guesses:
+                self.filter_bank(guess)
+        finally:
+            self.listeners = listeners
+        for listener in self.listeners:
+            listener.bank_reset()
 
     def load_words(self, file_path) -> List[str]:
         """Reads words from a word file and returns of the list of the words
@@ -32,73 +381,137 @@ class WordBank:
                 word_array.append(word)
         return word_array
 
-    def filter_bank(self, guess: List[Tuple[str, LetterState]]) -> None:
+    def filter_bank(self, guess: GuessState) -> None:
         """Given a guess to the word, remove words that cannot be the real answer
         based off the guess's letter states.
-        :param guess: the guess to the word represented as a list of (letter, state)
+        :param guess: the Feedback of the guess, or a list of (letter, state)
         """
-        self.word_bank = [
-            word for word in self.word_bank if self.is_possible_word(word, guess)
-        ]
+        feedback = Feedback.from_states(guess)
+        if not self.array_backed:
+            keep = [feedback.matches(word) for word in self.word_bank]
+            if self.listeners:
+                removed = [word for word, k in zip(self.word_bank, keep) if not k]
+                self._notify_removed(to_letter_matrix(removed))
+            self.word_bank = [word for word, k in zip(self.word_bank, keep) if k]
+            return
+
+        guess_word = feedback.guess
+        if self.partitions is not None and guess_word in self.feedback_matrix:
+            partition = self.partitions.partition(
+                self.feedback_matrix.index[guess_word], feedback.code
+            )
+            remaining = self.candidates & partition
+            if self.listeners:
+                removed = (self.candidates - remaining).indices()
+                self._notify_removed(self.letter_matrix[removed])
+            self._set_candidates(remaining)
+            return
+
+        if self.feedback_matrix is not None and guess_word in self.feedback_matrix:
+            row = self.feedback_matrix.patterns[self.feedback_matrix.index[guess_word]]
+            keep = row[self.indices] == feedback.code
+        else:
+            keep = self.possible_words_mask(self.letters, feedback)
+        if self.listeners:
+            self._notify_removed(self.letter_matrix[self.indices[~keep]])
+        self._set_indices(self.indices[keep])
 
     @staticmethod
-    def is_possible_word(_word: str, guess: List[Tuple[str, LetterState]]) -> None:
-        """Given a guess state check if the given word could be the goal word"""
-        word = list(_word)
-        for i, (guess_letter, state) in enumerate(guess):
-            if state == LetterState.GREEN:
-                if word[i] != guess_letter:
+    def is_possible_word(word: str, guess: GuessState) -> bool:
+        """Given a guess state check if the given word could be the goal word.
+        Greens must match, the letters of yellows must be elsewhere in the word,
+        each using up one copy not matched by a green or an earlier yellow, and grey
+        letters must have no copies left and not be in their own position.
+        Checking many words against one Feedback reuses its rules, see
+        Feedback.matches.
+        """
+        return Feedback.from_states(guess).matches(word)
 
-                    return False
-                word[i] = ""
-        for i, (guess_letter, state) in enumerate(guess):
+    @staticmethod
+    def possible_words_mask(letters: np.ndarray, guess: GuessState) -> np.ndarray:
+        """Vectorized is_possible_word. Applies the same rules, including consuming
+        the first unmatched copy of each yellow letter, to every row of a letter
+        matrix at once.
+        :param letters: N by L letter matrix of the words to check
+        :param guess: the Feedback of the guess, or a list of (letter, state)
+        :return: boolean mask of the words that could be the goal word
+        """
+        rows = np.arange(len(letters))
+        possible = np.ones(len(letters), dtype=bool)
+        # letters of each word not yet matched by a green or yellow
+        unmatched = np.ones(letters.shape, dtype=bool)
+
+        feedback = Feedback.from_states(guess)
+        guess = [
+            (i, ALPHABET.index(guess_letter), LetterState(digit))
+            for i, (guess_letter, digit) in enumerate(
+                zip(feedback.guess, feedback.digits())
+            )
+        ]
+        for i, letter, state in guess:
+            if state == LetterState.GREEN:
+                possible &= letters[:, i] == letter
+                unmatched[:, i] = False
+        for i, letter, state in guess:
             if state == LetterState.YELLOW:
-                if guess_letter not in word or guess_letter == word[i]:
-                    return False
+                matches = (letters == letter) & unmatched
+                found = matches.any(axis=1)
+                possible &= found & (letters[:, i] != letter)
                 # consume the yellow letter
-                word[word.index(guess_letter)] = ""
-        for i, (guess_letter, state) in enumerate(guess):
-            if state == LetterState.GREY and (guess_letter in word):
-                return False
-
-        return True
-
-    def filtered_bank(self, guess: List[Tuple[str, LetterState]]) -> None:
-        """Given a guess to the word, calculate what the next word bank should be
-        :param guess: the guess to the word represented as a list of (letter, state)
-        """
-        for word in self.word_bank:
-            for i, (guess_letter, state) in enumerate(guess):
-                match state:
-                    case LetterState.GREY:
-                        if guess_letter in word:
-                            self.word_bank.remove(word)
-                            break
-                    case LetterState.YELLOW:
-                        if word[i] == guess_letter or guess_letter not in word:
-                            self.word_bank.remove(word)
-                            break
-                    case LetterState.GREEN:
-                        if word[i] != guess_letter:
-                            self.word_bank.remove(word)
-                            break
-                    case _:
-                        raise ValueError(f"unknown letter state: {state}")
+                first = matches.argmax(axis=1)
+                unmatched[rows, first] &= ~found
+        for i, letter, state in guess:
+            if state == LetterState.GREY:
+                matches = (letters == letter) & unmatched
+                possible &= ~matches.any(axis=1) & (letters[:, i] != letter)
+
+        return possible
+
+    def filtered_bank(self, guess: GuessState) -> None:
+        """Given a guess to the word, calculate what the next word bank should be.
+        Unlike filter_bank, a grey letter anywhere in a word rules it out.
+        :param guess: the Feedback of the guess, or a list of (letter, state)
+        """
+        feedback = Feedback.from_states(guess)
+        rules = [
+            (i, guess_letter, digit)
+            for i, (guess_letter, digit) in enumerate(
+                zip(feedback.guess, feedback.digits())
+            )
+        ]
+        grey, yellow = LetterState.GREY.value, LetterState.YELLOW.value
+
+        def possible(word: str) -> bool:
+            for i, guess_letter, digit in rules:
+                if digit == grey:
+                    if guess_letter in word:
+                        return False
+                elif digit == yellow:
+                    if word[i] == guess_letter or guess_letter not in word:
+                        return False
+                elif word[i] != guess_letter:
+                    return False
+            return True
+
+        self.word_bank = [word for word in self.word_bank if possible(word)]
 
     def bank_letter_matrix(self) -> List[List[int]]:
         """
         :return: a matrix of the letters in the word bank
         """
-        # Initialize 26 by len(words in bank) matrix
-        matrix = [[0] * len(self.word_bank[0]) for _ in range(len(ALPHABET))]
-        for word in self.word_bank:
-            for i, letter in enumerate(word):
-                matrix[ALPHABET.index(letter)][i] += 1
-        return matrix
+        # 26 by word length matrix of how often each letter is at each position
+        return self.statistic("position_counts", position_counts).T.tolist()
 
     def remove(self, word):
-        """Removes the word from the word bank"""
-        self.word_bank.remove(word)
+        """Removes the word from the word bank, raising ValueError if it is not in
+        the bank. Listeners are only told once the word is removed.
+        """
+        position = self.word_bank.index(word)
+        if self.array_backed:
+            self._set_indices(np.delete(self.indices, position))
+        else:
+            del self.word_bank[position]
+        self._notify_removed(to_letter_matrix([word]))
 
     def print_bank(self):
         for i, word in enumerate(self.word_bank):
@@ -120,4 +533,6 @@ class WordBank:
         return self.word_bank[item]
 
     def __len__(self):
+        if self.candidates is not None:
+            return len(self.candidates)
         return len(self.word_bank)